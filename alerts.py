@@ -0,0 +1,427 @@
+"""Alert rules evaluated on each snapshot's delta.
+
+Rules are loaded from a JSON list (``--alert-rules``), one object per
+rule with the fields of :class:`AlertRule`::
+
+    [{"kind": "price_cross", "threshold": 0.5, "markets": ["512345"]},
+     {"kind": "price_move", "threshold": 0.1, "window_seconds": 300},
+     {"kind": "volume_spike", "threshold": 50000, "window_seconds": 600,
+      "category": "Crypto"},
+     {"kind": "new_event", "category": "Politics"}]
+
+Prices are the first outcome's (``Yes`` / ``Up``). Each market keeps its
+recent (time, price, volume) samples in a fixed-size :class:`RingBuffer`;
+only markets of events the delta reports as added or changed get a new
+sample and are evaluated, found through the snapshot's (cached) index,
+so a cycle costs time in proportion to what moved and the rules that
+apply to it. Alerts repeating for the same rule
+and market inside the cooldown are suppressed before reaching the sinks.
+"""
+import json
+import logging
+import math
+import queue
+import threading
+import time
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from config import (ALERT_COOLDOWN_SECONDS, ALERT_HISTORY_SIZE,
+                    ALERT_WEBHOOK_TIMEOUT_SECONDS)
+from metrics import ALERTS_FIRED, ALERTS_SUPPRESSED
+from models import Event, Market, ScraperSnapshot
+from snapshot_index import snapshot_index
+
+logger = logging.getLogger(__name__)
+
+RULE_KINDS = ("price_cross", "price_move", "volume_spike", "new_event")
+DIRECTIONS = ("up", "down", "both")
+
+
+@dataclass
+class AlertRule:
+    """One alert rule.
+
+    ``threshold`` means, by ``kind``:
+
+    * ``price_cross`` — the price level crossed between two samples
+    * ``price_move`` — relative move over ``window_seconds`` (0.1 = 10%)
+    * ``volume_spike`` — USD traded within ``window_seconds``
+    * ``new_event`` — unused; fires for events new since the last cycle
+
+    ``markets`` limits a rule to those market ids, ``category`` to events
+    of that category; ``direction`` applies to the price rules.
+
+    ``name`` identifies the rule in alerts and cooldowns, so it must be
+    unique; the default is built from every field that tells two rules
+    apart, e.g. ``price_move:0.1/300s:up@Crypto[512345]``.
+    """
+    kind: str
+    threshold: float = 0.0
+    window_seconds: float = 300.0
+    direction: str = "both"
+    markets: Tuple[str, ...] = ()
+    category: Optional[str] = None
+    cooldown_seconds: Optional[float] = None
+    name: str = ""
+
+    def __post_init__(self):
+        if self.kind not in RULE_KINDS:
+            raise ValueError(f"Unknown alert rule kind: {self.kind}")
+        if self.direction not in DIRECTIONS:
+            raise ValueError(f"Unknown alert direction: {self.direction}")
+        # Rules files may list ids as JSON numbers (or a single id);
+        # Market.id is always a string
+        if isinstance(self.markets, (str, int)):
+            self.markets = (self.markets,)
+        self.markets = tuple(map(str, self.markets))
+        if not self.name:
+            name = (self.kind if self.kind == "new_event"
+                    else f"{self.kind}:{self.threshold:g}")
+            if self.kind in ("price_move", "volume_spike"):
+                name += f"/{self.window_seconds:g}s"
+            if self.kind.startswith("price_") and self.direction != "both":
+                name += f":{self.direction}"
+            if self.category:
+                name += f"@{self.category}"
+            if self.markets:
+                name += f"[{','.join(self.markets)}]"
+            self.name = name
+
+
+def load_rules(path: str) -> List[AlertRule]:
+    with open(path, encoding="utf-8") as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise ValueError(f"{path}: expected a JSON list of alert rules")
+    return [AlertRule(**spec) for spec in specs]
+
+
+@dataclass
+class Alert:
+    rule: str
+    kind: str
+    event_id: str
+    market_id: str
+    title: str
+    message: str
+    value: float
+    ts: float
+    url: str = ""
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class RingBuffer:
+    """The last ``capacity`` (time, price, volume) samples of one market;
+    the oldest sample is overwritten once full."""
+
+    __slots__ = ("_ts", "_price", "_volume", "_next", "size")
+
+    def __init__(self, capacity: int):
+        self._ts = array("d", bytes(8 * capacity))
+        self._price = array("d", bytes(8 * capacity))
+        self._volume = array("d", bytes(8 * capacity))
+        self._next = 0
+        self.size = 0
+
+    def append(self, ts: float, price: float, volume: float) -> None:
+        i = self._next
+        self._ts[i], self._price[i], self._volume[i] = ts, price, volume
+        self._next = (i + 1) % len(self._ts)
+        self.size = min(self.size + 1, len(self._ts))
+
+    def _index(self, age: int) -> int:
+        """Slot of the sample ``age`` appends ago (0 = newest)."""
+        return (self._next - 1 - age) % len(self._ts)
+
+    def get(self, age: int) -> Tuple[float, float, float]:
+        i = self._index(age)
+        return self._ts[i], self._price[i], self._volume[i]
+
+    def as_of(self, ts: float) -> Tuple[float, float, float]:
+        """The sample in effect at ``ts``: the newest one taken at or
+        before it, or the oldest retained if all are newer."""
+        for age in range(self.size):
+            sample = self.get(age)
+            if sample[0] <= ts:
+                return sample
+        return self.get(self.size - 1)
+
+
+def _price(market: Market) -> float:
+    prices = market.outcome_prices
+    return prices[0] if len(prices) else math.nan
+
+
+def _direction_ok(rule: AlertRule, change: float) -> bool:
+    return rule.direction == "both" or (rule.direction == "up") == (change > 0)
+
+
+def _price_cross(rule: AlertRule, ring: RingBuffer, now: float):
+    """Fires when the price moves from below ``threshold`` to at or above
+    it, or back."""
+    if ring.size < 2:
+        return None
+    _, before, _ = ring.get(1)
+    _, after, _ = ring.get(0)
+    level = rule.threshold
+    if (math.isnan(before) or math.isnan(after)
+            or (before >= level) == (after >= level)
+            or not _direction_ok(rule, after - before)):
+        return None
+    way = "above" if after > before else "below"
+    return after, (f"price crossed {way} {level:g}: "
+                   f"{before:.3f} -> {after:.3f}")
+
+
+def _price_move(rule: AlertRule, ring: RingBuffer, now: float):
+    if ring.size < 2:
+        return None
+    _, price, _ = ring.get(0)
+    _, start, _ = ring.as_of(now - rule.window_seconds)
+    if not start or math.isnan(start) or math.isnan(price):
+        return None
+    move = (price - start) / start
+    if abs(move) >= rule.threshold and _direction_ok(rule, move):
+        return move, (f"price moved {move:+.1%} in {rule.window_seconds:g}s: "
+                      f"{start:.3f} -> {price:.3f}")
+    return None
+
+
+def _volume_spike(rule: AlertRule, ring: RingBuffer, now: float):
+    if ring.size < 2:
+        return None
+    _, _, volume = ring.get(0)
+    _, _, start = ring.as_of(now - rule.window_seconds)
+    traded = volume - start
+    if traded >= rule.threshold:
+        return traded, (f"${traded:,.0f} traded in "
+                        f"{rule.window_seconds:g}s")
+    return None
+
+
+_MARKET_CHECKS = {
+    "price_cross": _price_cross,
+    "price_move": _price_move,
+    "volume_spike": _volume_spike,
+}
+
+
+class AlertSink:
+    """Receives the alerts of one snapshot."""
+
+    def send(self, alerts: List[Alert]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class LogSink(AlertSink):
+    def send(self, alerts: List[Alert]) -> None:
+        for alert in alerts:
+            logger.warning("ALERT [%s] %s — %s", alert.rule, alert.title,
+                           alert.message)
+
+
+class FileSink(AlertSink):
+    """Appends alerts to a JSONL file, one object per line."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, alerts: List[Alert]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert.to_dict(), ensure_ascii=False)
+                        + "\n")
+
+
+class WebhookSink(AlertSink):
+    """POSTs ``{"alerts": [...]}`` to a URL from a background thread, so a
+    slow endpoint never holds up scraping; batches beyond ``max_pending``
+    are dropped."""
+
+    def __init__(self, url: str,
+                 timeout: float = ALERT_WEBHOOK_TIMEOUT_SECONDS,
+                 max_pending: int = 100):
+        self.url = url
+        self.timeout = timeout
+        self._queue: "queue.Queue[Optional[List[dict]]]" = queue.Queue(
+            maxsize=max_pending)
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run,
+                                        name="alert-webhook", daemon=True)
+        self._thread.start()
+
+    def send(self, alerts: List[Alert]) -> None:
+        try:
+            self._queue.put_nowait([a.to_dict() for a in alerts])
+        except queue.Full:
+            logger.warning("Alert webhook is behind; dropped %d alerts",
+                           len(alerts))
+
+    def _run(self) -> None:
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            try:
+                response = self._session.post(
+                    self.url, json={"alerts": batch}, timeout=self.timeout)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                logger.warning("Alert webhook failed: %s", e)
+
+    def close(self) -> None:
+        """Deliver what is pending, then stop."""
+        self._queue.put(None)
+        self._thread.join(self.timeout * 2)
+        self._session.close()
+
+
+class AlertEngine:
+    """Evaluates alert rules against each snapshot and feeds the sinks.
+
+    Feed it every published snapshot, in order, tier refreshes included.
+    The first snapshot only seeds the market history: it never fires.
+    Without a delta (no EventCache) every event is evaluated. Rule names
+    key the cooldowns, so two rules with the same name are rejected.
+    """
+
+    def __init__(self, rules: List[AlertRule], sinks: List[AlertSink],
+                 cooldown_seconds: float = ALERT_COOLDOWN_SECONDS,
+                 history: int = ALERT_HISTORY_SIZE):
+        names = [rule.name for rule in rules]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError("Duplicate alert rule names (give each rule a "
+                             f"unique \"name\"): {', '.join(duplicates)}")
+        self.sinks = sinks
+        self.cooldown_seconds = cooldown_seconds
+        self.history = max(2, history)
+        # Market rules: those scoped to market ids by id, the rest for all
+        self._any_market: List[AlertRule] = []
+        self._by_market: Dict[str, List[AlertRule]] = {}
+        self._event_rules: List[AlertRule] = []
+        for rule in rules:
+            if rule.kind == "new_event":
+                self._event_rules.append(rule)
+            elif rule.markets:
+                for market_id in rule.markets:
+                    self._by_market.setdefault(market_id, []).append(rule)
+            else:
+                self._any_market.append(rule)
+        self._cooldowns = {r.name: r.cooldown_seconds for r in rules
+                           if r.cooldown_seconds is not None}
+        self._longest_cooldown = max([cooldown_seconds,
+                                      *self._cooldowns.values()])
+        self._rings: Dict[str, RingBuffer] = {}
+        self._event_markets: Dict[str, List[str]] = {}
+        self._last_fired: Dict[Tuple[str, str], float] = {}
+        self._next_prune = 0.0
+        self._seeded = False
+
+    def process(self, snapshot: ScraperSnapshot) -> List[Alert]:
+        """Alerts fired by ``snapshot`` (after cooldown), already sent."""
+        now = snapshot.captured_at or time.time()
+        delta = snapshot.delta
+        if delta is None:
+            # Seeding (or no delta): every event
+            events = snapshot.events
+            gone = set(self._event_markets) - {e.id for e in events}
+        else:
+            position = snapshot_index(snapshot).position
+            touched = sorted(position[i]
+                             for i in {*delta.added, *delta.changed}
+                             if i in position)
+            events = [snapshot.events[i] for i in touched]
+            gone = delta.removed
+        for event_id in gone:
+            for market_id in self._event_markets.pop(event_id, ()):
+                self._rings.pop(market_id, None)
+
+        fired: List[Alert] = []
+        for event in events:
+            if self._seeded and event.id not in self._event_markets:
+                for rule in self._event_rules:
+                    if rule.category in (None, event.category):
+                        fired.append(self._alert(
+                            rule, event, "", 0.0,
+                            f"new {event.category} event", now))
+            self._event_markets[event.id] = [m.id for m in event.markets]
+            for market in event.markets:
+                self._check_market(event, market, now, fired)
+        self._seeded = True
+
+        alerts = self._cool_down(fired, now)
+        if alerts:
+            for sink in self.sinks:
+                try:
+                    sink.send(alerts)
+                except Exception as e:
+                    logger.error("Alert sink %s failed: %s",
+                                 type(sink).__name__, e)
+        return alerts
+
+    def _check_market(self, event: Event, market: Market, now: float,
+                      fired: List[Alert]) -> None:
+        ring = self._rings.get(market.id)
+        if ring is None:
+            ring = self._rings[market.id] = RingBuffer(self.history)
+        price = _price(market)
+        if ring.size:
+            _, last_price, last_volume = ring.get(0)
+            if last_volume == market.volume and (
+                    last_price == price
+                    or (math.isnan(price) and math.isnan(last_price))):
+                # Only another market of the event changed
+                return
+        ring.append(now, price, market.volume)
+
+        rules = self._by_market.get(market.id)
+        rules = rules + self._any_market if rules else self._any_market
+        for rule in rules:
+            if rule.category is not None and rule.category != event.category:
+                continue
+            result = _MARKET_CHECKS[rule.kind](rule, ring, now)
+            if result is not None:
+                value, message = result
+                fired.append(self._alert(rule, event, market.id, value,
+                                         f"{market.question}: {message}", now))
+
+    @staticmethod
+    def _alert(rule: AlertRule, event: Event, market_id: str, value: float,
+               message: str, now: float) -> Alert:
+        return Alert(rule.name, rule.kind, event.id, market_id, event.title,
+                     message, value, now, event.polymarket_url)
+
+    def _cool_down(self, fired: List[Alert], now: float) -> List[Alert]:
+        """Drop alerts whose rule fired for the same market (or event)
+        within the cooldown."""
+        if now >= self._next_prune:
+            expired = now - self._longest_cooldown
+            self._last_fired = {k: t for k, t in self._last_fired.items()
+                                if t > expired}
+            self._next_prune = now + self._longest_cooldown
+        alerts = []
+        for alert in fired:
+            key = (alert.rule, alert.market_id or alert.event_id)
+            cooldown = self._cooldowns.get(alert.rule, self.cooldown_seconds)
+            last = self._last_fired.get(key)
+            if last is not None and now - last < cooldown:
+                ALERTS_SUPPRESSED.inc(kind=alert.kind)
+                continue
+            self._last_fired[key] = now
+            ALERTS_FIRED.inc(kind=alert.kind)
+            alerts.append(alert)
+        return alerts
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
@@ -1,78 +1,318 @@
+import json
 import time
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED
+from concurrent.futures import wait as wait_futures
+from typing import (List, Dict, Any, Callable, Optional, Iterator,
+                    Sequence, Tuple)
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+
+from cassette import CassetteRecorder, CassettePlayer
+from http_cache import HTTPCache
+from metrics import (REQUEST_SECONDS, REQUEST_RETRIES, RATE_LIMITED,
+                     RESPONSE_BYTES, RATE_LIMIT)
+from rate_limiter import RateLimiter, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
 
+class IncompleteCrawl(Exception):
+    """Raised when a page of a full crawl could not be fetched, so the
+    events seen are not all the active events."""
+
+
+@dataclass
+class TransferStats:
+    """Bytes moved by the client since the counters were last taken."""
+    requests: int = 0
+    not_modified: int = 0
+    wire_bytes: int = 0       # response bodies as sent (compressed)
+    body_bytes: int = 0       # response bodies after decoding, incl. cache hits
+
+
 class GammaAPIClient:
     """Client for the Polymarket Gamma API."""
 
     def __init__(self, base_url: str, page_limit: int, max_pages: int,
-                 request_delay: float):
+                 request_delay: float, max_workers: int = 1,
+                 max_requests_per_second: float = 0.0,
+                 http_cache: Optional[HTTPCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 recorder: Optional[CassetteRecorder] = None,
+                 player: Optional[CassettePlayer] = None,
+                 event_decoder: Optional[Callable[[bytes], list]] = None):
         self.base_url = base_url
         self.page_limit = page_limit
         self.max_pages = max_pages
         self.request_delay = request_delay
+        self.max_workers = max(1, max_workers)
+        # Pass one limiter to several clients to share a single budget
+        self.rate_limiter = rate_limiter or RateLimiter(
+            max_requests_per_second, burst=self.max_workers)
+        self.http_cache = http_cache
+        self.recorder = recorder
+        self.player = player
+        # Decodes /events pages (e.g. typed_decode.decode_event_page);
+        # None keeps plain json dicts
+        self.event_decoder = event_decoder
+        self._stats_lock = threading.Lock()
+        self._stats = TransferStats()
         self.session = requests.Session()
+        # One pooled connection per worker so parallel pages reuse sockets
+        adapter = HTTPAdapter(pool_connections=1,
+                              pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update({
             "Accept": "application/json",
             "User-Agent": "PolymarketScraper/1.0",
+            # gzip/deflate, plus br when brotli is installed for urllib3
+            "Accept-Encoding": DEFAULT_ACCEPT_ENCODING,
         })
 
-    def _get(self, endpoint: str, params: dict = None,
-             max_retries: int = 3) -> Optional[Any]:
-        """Single GET request with retry and exponential backoff."""
+    def _count_transfer(self, response: requests.Response,
+                        body_bytes: int) -> None:
+        try:
+            wire = response.raw.tell()
+        except (AttributeError, OSError):
+            wire = len(response.content)
+        RESPONSE_BYTES.inc(wire, kind="wire")
+        RESPONSE_BYTES.inc(body_bytes, kind="decoded")
+        with self._stats_lock:
+            self._stats.requests += 1
+            self._stats.wire_bytes += wire
+            self._stats.body_bytes += body_bytes
+            if response.status_code == 304:
+                self._stats.not_modified += 1
+
+    def take_transfer_stats(self) -> TransferStats:
+        """Return the transfer counters and start a fresh set."""
+        with self._stats_lock:
+            stats, self._stats = self._stats, TransferStats()
+        return stats
+
+    def _get(self, endpoint: str, params: dict = None, max_retries: int = 3,
+             decode: Optional[Callable[[bytes], Any]] = None
+             ) -> Optional[Any]:
+        """Response for ``endpoint`` decoded with ``decode`` (default
+        ``json.loads``), or None on failure.
+
+        Served from the cassette player when replaying; otherwise fetched
+        live and, when recording, written to the current cassette cycle.
+        """
+        if self.player is not None:
+            return self.player.response(endpoint, params, decode)
+        if self.recorder is None:
+            return self._fetch(endpoint, params, max_retries, decode)[0]
+        start = self.recorder.now()
+        data, body = self._fetch(endpoint, params, max_retries, decode)
+        self.recorder.record(endpoint, params, start, self.recorder.now(),
+                             body)
+        return data
+
+    def _fetch(self, endpoint: str, params: dict = None, max_retries: int = 3,
+               decode: Optional[Callable[[bytes], Any]] = None
+               ) -> Tuple[Optional[Any], Optional[bytes]]:
+        """Single GET request with retry and jittered exponential backoff;
+        returns the decoded body and the raw body.
+
+        Every attempt takes a token from the rate limiter; a 429 slows the
+        limiter down and its Retry-After pauses all callers sharing it.
+
+        With an HTTP cache, the request is made conditional on the cached
+        ETag/Last-Modified and a 304 is answered from the cached body.
+        """
         url = f"{self.base_url}{endpoint}"
+        limiter = self.rate_limiter
+        cache = self.http_cache
+        cache_key = cache.key(url, params) if cache is not None else None
+        loads = decode or json.loads
         for attempt in range(max_retries):
+            entry = cache.get(cache_key) if cache is not None else None
+            headers = entry.validators() if entry else None
+            limiter.acquire()
+            start = time.perf_counter()
             try:
-                response = self.session.get(url, params=params, timeout=15)
+                response = self.session.get(url, params=params,
+                                            headers=headers, timeout=15)
+                REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                        endpoint=endpoint,
+                                        status=response.status_code)
+                RATE_LIMIT.set(limiter.rate)
+                if response.status_code == 304 and entry is not None:
+                    body = cache.read_body(cache_key, entry)
+                    self._count_transfer(response, len(body or b""))
+                    limiter.on_success()
+                    if body is not None:
+                        try:
+                            return loads(body), body
+                        except ValueError:
+                            cache.discard(cache_key)
+                    # Entry vanished or was corrupt; refetch unconditionally
+                    continue
+                self._count_transfer(response, len(response.content))
                 if response.status_code == 200:
-                    return response.json()
+                    limiter.on_success()
+                    if cache is not None:
+                        cache.put(
+                            cache_key, response.headers.get("ETag"),
+                            response.headers.get("Last-Modified"),
+                            response.content)
+                    return loads(response.content), response.content
                 elif response.status_code == 429:
-                    wait = 2 ** attempt
-                    logger.warning("Rate limited. Waiting %ds...", wait)
+                    retry_after = parse_retry_after(
+                        response.headers.get("Retry-After"))
+                    limiter.on_rate_limited(retry_after)
+                    RATE_LIMITED.inc()
+                    REQUEST_RETRIES.inc(reason="rate_limited")
+                    wait = limiter.backoff(attempt, retry_after)
+                    logger.warning("Rate limited. Waiting %.1fs, "
+                                   "rate now %.1f/s", wait, limiter.rate)
                     time.sleep(wait)
                 elif response.status_code >= 500:
-                    wait = 2 ** attempt
-                    logger.warning("Server error %d. Retry in %ds",
+                    REQUEST_RETRIES.inc(reason="server_error")
+                    wait = limiter.backoff(attempt)
+                    logger.warning("Server error %d. Retry in %.1fs",
                                    response.status_code, wait)
                     time.sleep(wait)
                 else:
                     logger.error("Request failed: %d %s",
                                  response.status_code, url)
-                    return None
-            except requests.exceptions.RequestException as e:
-                wait = 2 ** attempt
-                logger.error("Request exception: %s. Retry in %ds", e, wait)
+                    return None, None
+            except (requests.exceptions.RequestException, ValueError) as e:
+                REQUEST_SECONDS.observe(time.perf_counter() - start,
+                                        endpoint=endpoint, status="error")
+                REQUEST_RETRIES.inc(reason="exception")
+                wait = limiter.backoff(attempt)
+                logger.error("Request exception: %s. Retry in %.1fs", e, wait)
                 time.sleep(wait)
-        return None
+        return None, None
 
-    def fetch_all_active_events(self) -> List[Dict[str, Any]]:
-        """Paginate through all active, non-closed events."""
-        all_events: List[Dict[str, Any]] = []
+    def _events_page_params(self, page: int) -> dict:
+        return {
+            "active": "true",
+            "closed": "false",
+            "order": "volume24hr",
+            "ascending": "false",
+            "limit": self.page_limit,
+            "offset": page * self.page_limit,
+        }
+
+    def _iter_pages_sequentially(self) -> Iterator[List[Dict[str, Any]]]:
         for page in range(self.max_pages):
-            offset = page * self.page_limit
-            params = {
-                "active": "true",
-                "closed": "false",
-                "order": "volume24hr",
-                "ascending": "false",
-                "limit": self.page_limit,
-                "offset": offset,
-            }
-            page_data = self._get("/events", params=params)
+            page_data = self._get("/events",
+                                  params=self._events_page_params(page),
+                                  decode=self.event_decoder)
             if page_data is None:
-                logger.error("Failed to fetch page %d. Stopping.", page)
-                break
-            all_events.extend(page_data)
+                raise IncompleteCrawl(f"Failed to fetch page {page}")
+            yield page_data
             if len(page_data) < self.page_limit:
-                break
-            time.sleep(self.request_delay)
+                return
+            # Without a rate cap, fall back to the fixed courtesy delay
+            if self.rate_limiter.max_rate <= 0:
+                time.sleep(self.request_delay)
+
+    def _iter_pages_concurrently(self) -> Iterator[List[Dict[str, Any]]]:
+        """Fetch up to ``max_workers`` pages at once, yielding in offset order.
+
+        No new pages are scheduled past the first short (or failed) page;
+        pages already in flight beyond it are discarded. A failed page
+        raises IncompleteCrawl once the pages before it are yielded.
+        """
+        stop_at = self.max_pages
+        next_page = 0
+        next_yield = 0
+        results: Dict[int, Optional[List[Dict[str, Any]]]] = {}
+        in_flight = {}
+
+        def schedule():
+            nonlocal next_page
+            while next_page < stop_at and len(in_flight) < self.max_workers:
+                future = pool.submit(
+                    self._get, "/events",
+                    params=self._events_page_params(next_page),
+                    decode=self.event_decoder)
+                in_flight[future] = next_page
+                next_page += 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="gamma-fetch") as pool:
+            schedule()
+            while next_yield < stop_at:
+                done, _ = wait_futures(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = in_flight.pop(future)
+                    page_data = future.result()
+                    results[page] = page_data
+                    if page_data is None or len(page_data) < self.page_limit:
+                        stop_at = min(stop_at, page + 1)
+
+                # Refill before yielding so requests stay in flight while
+                # the consumer parses the page it was handed
+                schedule()
+
+                while next_yield < stop_at and next_yield in results:
+                    page_data = results.pop(next_yield)
+                    if page_data is None:
+                        raise IncompleteCrawl(
+                            f"Failed to fetch page {next_yield}")
+                    yield page_data
+                    next_yield += 1
+
+    def iter_active_event_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Yield pages of active, non-closed events in offset order.
+
+        Pages are handed out as soon as they (and every page before them)
+        arrive, so callers can parse one page while the next is in flight.
+        Raises IncompleteCrawl after the last good page if a page fails
+        for good, so a partial crawl is never mistaken for a complete one.
+        """
+        if self.max_workers > 1:
+            pages = self._iter_pages_concurrently()
+        else:
+            pages = self._iter_pages_sequentially()
+        tape = self.player or self.recorder
+        if tape is None:
+            return pages
+        return self._taped_cycle(tape, pages)
+
+    @staticmethod
+    def _taped_cycle(tape, pages: Iterator[List[Dict[str, Any]]]
+                     ) -> Iterator[List[Dict[str, Any]]]:
+        # One pass over the pages is one cassette cycle
+        tape.begin_cycle()
+        try:
+            yield from pages
+        finally:
+            tape.end_cycle()
+
+    def fetch_all_active_events(self) -> List[Dict[str, Any]]:
+        """Paginate through all active, non-closed events; raises
+        IncompleteCrawl if a page fails."""
+        all_events: List[Dict[str, Any]] = []
+        for page_data in self.iter_active_event_pages():
+            all_events.extend(page_data)
         return all_events
 
+    def fetch_events_by_id(self, ids: Sequence[str]) -> Optional[list]:
+        """Current payloads of specific events, open or not, requested
+        ``page_limit`` ids at a time. None if any request fails."""
+        events = []
+        for start in range(0, len(ids), self.page_limit):
+            chunk = list(ids[start:start + self.page_limit])
+            page = self._get("/events",
+                             params={"id": chunk, "limit": len(chunk)},
+                             decode=self.event_decoder)
+            if page is None:
+                return None
+            events.extend(page)
+        return events
+
     def fetch_tags(self) -> List[Dict[str, Any]]:
         """Fetch all available tags."""
         result = self._get("/tags")
@@ -80,12 +320,14 @@ class GammaAPIClient:
 
 
 if __name__ == "__main__":
-    from config import (GAMMA_BASE_URL, API_PAGE_LIMIT,
-                        MAX_PAGES, REQUEST_DELAY_SECONDS)
+    from config import (GAMMA_BASE_URL, API_PAGE_LIMIT, MAX_PAGES,
+                        REQUEST_DELAY_SECONDS, FETCH_WORKERS,
+                        MAX_REQUESTS_PER_SECOND)
 
     logging.basicConfig(level=logging.INFO)
     client = GammaAPIClient(GAMMA_BASE_URL, API_PAGE_LIMIT,
-                            MAX_PAGES, REQUEST_DELAY_SECONDS)
+                            MAX_PAGES, REQUEST_DELAY_SECONDS,
+                            FETCH_WORKERS, MAX_REQUESTS_PER_SECOND)
     events = client.fetch_all_active_events()
     print(f"Fetched {len(events)} events")
     if events:
@@ -0,0 +1,179 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import replace
+from typing import Callable, Optional, Tuple
+
+from api_client import IncompleteCrawl
+from models import ScraperSnapshot, SnapshotDelta
+from metrics import CYCLE_LAG_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotBuffer:
+    """Double buffer between the scraper thread and the render loop.
+
+    The scraper builds the next snapshot off to the side and publishes it
+    with a single reference swap; readers always see a complete snapshot
+    and a version number that changes on every publish.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ScraperSnapshot] = None
+        self._version = 0
+
+    def publish(self, snapshot: ScraperSnapshot) -> None:
+        with self._lock:
+            self._snapshot = snapshot
+            self._version += 1
+
+    def latest(self) -> Tuple[int, Optional[ScraperSnapshot]]:
+        with self._lock:
+            return self._version, self._snapshot
+
+
+class ScraperThread(threading.Thread):
+    """Runs scrape cycles on a fixed start-to-start cadence.
+
+    ``cycle`` returns a finished snapshot; its ``cycle_lag_seconds`` is
+    set to how late the cycle started relative to its schedule before it
+    is published. If a cycle overruns by more than a whole interval the
+    schedule is realigned instead of firing a burst of catch-up cycles.
+    ``cycle`` returning None means the source is exhausted (e.g. the end
+    of a replay) and ends the thread; a cycle raising IncompleteCrawl
+    publishes nothing, so the last complete snapshot stays current.
+    """
+
+    def __init__(self, cycle: Callable[[], Optional[ScraperSnapshot]],
+                 interval: float, buffer: SnapshotBuffer,
+                 on_snapshot: Optional[Callable[[ScraperSnapshot], None]] = None):
+        super().__init__(name="scraper", daemon=True)
+        self.cycle = cycle
+        self.interval = interval
+        self.buffer = buffer
+        self.on_snapshot = on_snapshot
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _run_cycle(self, cycle: Callable[[], Optional[ScraperSnapshot]],
+                   lag: float) -> bool:
+        """Run one cycle and publish its snapshot; False once ``cycle``
+        reports the source exhausted."""
+        try:
+            snapshot = cycle()
+            if snapshot is None:
+                return False
+            snapshot.cycle_lag_seconds = lag
+            CYCLE_LAG_SECONDS.set(lag)
+            self.buffer.publish(snapshot)
+            if self.on_snapshot:
+                self.on_snapshot(snapshot)
+        except IncompleteCrawl as e:
+            logger.error("Scrape cycle incomplete, keeping the last "
+                         "snapshot: %s", e)
+        except Exception as e:
+            logger.error("Scrape cycle failed: %s", e, exc_info=True)
+        return True
+
+    def run(self) -> None:
+        scheduled = time.monotonic()
+        while not self._stop_event.is_set():
+            lag = max(0.0, time.monotonic() - scheduled)
+            if not self._run_cycle(self.cycle, lag):
+                return
+
+            scheduled += self.interval
+            if time.monotonic() - scheduled > self.interval:
+                if self.interval > 0:
+                    logger.warning("Scrape cycle overran the %.0fs interval",
+                                   self.interval)
+                scheduled = time.monotonic()
+            self._stop_event.wait(max(0.0, scheduled - time.monotonic()))
+
+
+def combine_deltas(earlier: Optional[SnapshotDelta],
+                   later: Optional[SnapshotDelta]) -> Optional[SnapshotDelta]:
+    """The delta across two consecutive snapshots, i.e. from the one
+    before ``earlier``'s snapshot to ``later``'s; None (everything may
+    have changed) if either is None."""
+    if earlier is None or later is None:
+        return None
+    gone = set(later.removed)
+    came_back = set(earlier.removed) & set(later.added)
+    added = [eid for eid in earlier.added if eid not in gone]
+    added += [eid for eid in later.added if eid not in came_back]
+    new = set(added)
+    changed = list(dict.fromkeys(
+        eid for eid in earlier.changed + later.changed + list(came_back)
+        if eid not in new and eid not in gone))
+    removed = [eid for eid in earlier.removed if eid not in came_back]
+    removed += [eid for eid in later.removed if eid not in earlier.added]
+    return SnapshotDelta(added=added, changed=changed,
+                         removed=list(dict.fromkeys(removed)))
+
+
+class ExportWorker(threading.Thread):
+    """Runs exports for published snapshots off the scrape/render threads.
+
+    Holds at most one pending snapshot: if exports fall behind, the older
+    pending snapshot is replaced by the newer one rather than queueing.
+    The replacement carries the delta of both (a copy of the snapshot
+    with :func:`combine_deltas`), so delta-driven handlers such as the
+    history store still see every event that changed in between, and is
+    only ``partial`` if both were.
+
+    With ``coalesce=False`` every snapshot is handled, in order, for
+    handlers that need each one (the changelog keeps every refresh's
+    timestamp); a warning is logged as the backlog grows.
+    """
+
+    def __init__(self, handler: Callable[[ScraperSnapshot], None],
+                 name: str = "exporter", coalesce: bool = True):
+        super().__init__(name=name, daemon=True)
+        self.handler = handler
+        self.coalesce = coalesce
+        self._pending: "queue.Queue[Optional[ScraperSnapshot]]" = queue.Queue(
+            maxsize=1 if coalesce else 0)
+
+    def submit(self, snapshot: ScraperSnapshot) -> None:
+        if not self.coalesce:
+            self._pending.put(snapshot)
+            backlog = self._pending.qsize()
+            if backlog and backlog % 10 == 0:
+                logger.warning("%s is %d snapshots behind", self.name,
+                               backlog)
+            return
+        try:
+            self._pending.put_nowait(snapshot)
+        except queue.Full:
+            try:
+                skipped = self._pending.get_nowait()
+                if skipped is not None:
+                    logger.warning("Export of %s skipped; exports are behind",
+                                   skipped.timestamp)
+                    snapshot = replace(
+                        snapshot,
+                        delta=combine_deltas(skipped.delta, snapshot.delta),
+                        partial=skipped.partial and snapshot.partial)
+            except queue.Empty:
+                pass
+            self._pending.put_nowait(snapshot)
+
+    def stop(self) -> None:
+        """Finish the pending exports, then exit."""
+        self._pending.put(None)
+
+    def run(self) -> None:
+        while True:
+            snapshot = self._pending.get()
+            if snapshot is None:
+                return
+            try:
+                self.handler(snapshot)
+            except Exception as e:
+                logger.error("Export failed: %s", e, exc_info=True)
@@ -0,0 +1,5 @@
+"""Offline benchmarks for the scraper.
+
+Run from the repository root: ``python -m benchmarks`` for the full
+suite, or a single study such as ``python -m benchmarks.memory``.
+"""
@@ -0,0 +1,279 @@
+"""End-to-end benchmark suite on synthetic data.
+
+    python -m benchmarks [--events N] [--markets N] [--cassette DIR]
+                         [--latency MS] [--error-rate P] [--repeat N]
+                         [--parse-workers N] [--only NAME ...]
+                         [--save PATH] [--baseline PATH]
+
+Covers fetching from a local ``benchmarks.server`` stand-in, snapshot
+building (cold and with a warm EventCache), every export format and a
+cold ``Dashboard.render``. Each benchmark is warmed up once, timed
+``--repeat`` times (median and best reported), then run once more under
+tracemalloc for peak Python allocations. The snapshot's columnar view is
+dropped before each run so consumers are measured on their own.
+
+``--parse-workers`` adds ``parse_pool``: a cold snapshot build on a
+``ParsePool`` of that many processes, started once outside the timings.
+
+``--cassette`` swaps the synthetic payload for the first cycle of a
+cassette recorded with ``main.py --record``, i.e. real API responses.
+
+``--save`` writes the results as JSON and ``--baseline`` compares against
+such a file, to track changes across commits.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional
+
+from rich.console import Console
+
+from api_client import GammaAPIClient
+from benchmarks.server import GammaStubServer
+from cassette import CassettePlayer
+from benchmarks.synthetic import (generate_events, PROFILE_EVENTS,
+                                  PROFILE_MARKETS)
+from config import API_PAGE_LIMIT, FETCH_WORKERS
+from data_processor import DataProcessor, EventCache, SnapshotBuilder
+from display import Dashboard
+from exporter import Exporter, EXPORT_FORMATS, pa
+from parse_pool import ParsePool
+from rate_limiter import RateLimiter
+
+
+@dataclass
+class Benchmark:
+    name: str
+    unit: str
+    items: int
+    run: Callable[[], object]
+
+
+@dataclass
+class Result:
+    name: str
+    unit: str
+    items: int
+    median_seconds: float
+    best_seconds: float
+    peak_mb: float
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.median_seconds if self.median_seconds else 0.0
+
+
+def _measure(bench: Benchmark, repeat: int,
+             before: Callable[[], None]) -> Result:
+    before()
+    bench.run()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        before()
+        start = time.perf_counter()
+        bench.run()
+        timings.append(time.perf_counter() - start)
+
+    before()
+    tracemalloc.start()
+    bench.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return Result(bench.name, bench.unit, bench.items,
+                  statistics.median(timings), min(timings), peak / 1e6)
+
+
+def _cassette_events(directory: str) -> List[dict]:
+    """Events of the first recorded cycle, in page order."""
+    _, requests = CassettePlayer.load(CassettePlayer(directory, 0).paths[0])
+    pages = sorted((meta["params"].get("offset", 0), body)
+                   for meta, body in requests
+                   if meta["endpoint"] == "/events" and body is not None)
+    return [event for _, body in pages for event in json.loads(body)]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _benchmarks(raw: List[dict], server: GammaStubServer, snapshot,
+                exporter: Exporter,
+                pool: Optional[ParsePool] = None) -> List[Benchmark]:
+    events = snapshot.total_events
+    markets = snapshot.total_markets
+    max_pages = -(-len(raw) // API_PAGE_LIMIT) + 1
+    client = GammaAPIClient(server.url, API_PAGE_LIMIT, max_pages, 0.0,
+                            FETCH_WORKERS, rate_limiter=RateLimiter(0))
+
+    warm_cache = EventCache()
+    builder = SnapshotBuilder(warm_cache)
+    builder.add_page(raw)
+    builder.finalize(0.0)
+
+    def parse_cached():
+        cached = SnapshotBuilder(warm_cache)
+        cached.add_page(raw)
+        return cached.finalize(0.0)
+
+    def render():
+        dashboard = Dashboard()
+        dashboard.console = Console(file=io.StringIO(), width=160,
+                                    force_terminal=True)
+        dashboard.console.print(dashboard.render(snapshot))
+
+    benches = [
+        Benchmark("fetch", "events", len(raw),
+                  client.fetch_all_active_events),
+        Benchmark("parse", "markets", markets,
+                  lambda: DataProcessor.build_snapshot(raw, 0.0)),
+        Benchmark("parse_cached", "markets", markets, parse_cached),
+    ]
+    if pool is not None:
+        def parse_pool():
+            pooled = SnapshotBuilder(pool=pool)
+            pooled.add_page(raw)
+            return pooled.finalize(0.0)
+
+        benches.append(Benchmark("parse_pool", "markets", markets,
+                                 parse_pool))
+    for fmt in EXPORT_FORMATS:
+        if fmt == "parquet" and pa is None:
+            continue
+        per_market = fmt in ("markets", "parquet")
+        benches.append(Benchmark(
+            f"export_{fmt}", "markets" if per_market else "events",
+            markets if per_market else events,
+            lambda fmt=fmt: exporter.export(snapshot, [fmt])))
+    benches.append(Benchmark("render", "events", events, render))
+    return benches
+
+
+def _print_report(results: List[Result],
+                  baseline: Dict[str, dict]) -> None:
+    header = (f"{'benchmark':<16}{'median':>10}{'best':>10}"
+              f"{'throughput':>22}{'peak MB':>10}")
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = (f"{r.name:<16}{r.median_seconds:>9.3f}s{r.best_seconds:>9.3f}s"
+                f"{r.throughput:>14,.0f} {r.unit + '/s':<9}{r.peak_mb:>8.1f}")
+        base = baseline.get(r.name)
+        if base and base["median_seconds"]:
+            change = r.median_seconds / base["median_seconds"] - 1
+            line += f"{change:>+10.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=PROFILE_EVENTS)
+    parser.add_argument("--markets", type=int, default=PROFILE_MARKETS)
+    parser.add_argument("--cassette", metavar="DIR",
+                        help="Benchmark a recorded cycle instead of "
+                             "synthetic events")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Stub server latency per request in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of stub requests answered with 503")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--parse-workers", type=int, default=0, metavar="N",
+                        help="Also benchmark parsing on N worker processes")
+    parser.add_argument("--only", nargs="+", metavar="NAME",
+                        help="Run only these benchmarks")
+    parser.add_argument("--save", metavar="PATH",
+                        help="Write results as JSON")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="Compare against results saved with --save")
+    args = parser.parse_args()
+
+    baseline = {}
+    baseline_profile = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = {r["name"]: r for r in saved["results"]}
+        baseline_profile = saved.get("profile", {})
+
+    if args.cassette:
+        raw = _cassette_events(args.cassette)
+    else:
+        raw = generate_events(args.events, args.markets)
+    snapshot = DataProcessor.build_snapshot(raw, 0.0)
+    source = f"Cassette {args.cassette}" if args.cassette else "Synthetic"
+    print(f"{source} profile: {snapshot.total_events} events, "
+          f"{snapshot.total_markets} markets, latency {args.latency:g} ms, "
+          f"error rate {args.error_rate:.0%}, timed runs: {args.repeat}")
+    if baseline:
+        print(f"Baseline: {args.baseline}")
+        profile = (baseline_profile.get("events"),
+                   baseline_profile.get("markets"))
+        if profile != (snapshot.total_events, snapshot.total_markets):
+            print("  warning: baseline was run on a different profile")
+    print()
+
+    pool = ParsePool(args.parse_workers) if args.parse_workers > 0 else None
+    server = GammaStubServer(raw, latency=args.latency / 1000,
+                             error_rate=args.error_rate).start()
+    cwd = os.getcwd()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Exports land in EXPORT_DIR relative to the working directory
+        os.chdir(tmp)
+        try:
+            exporter = Exporter()
+
+            def drop_derived():
+                # Columns and indexes are per-snapshot caches; time their
+                # build on every run
+                snapshot.columns = None
+                snapshot.index = None
+
+            for bench in _benchmarks(raw, server, snapshot, exporter, pool):
+                if args.only and bench.name not in args.only:
+                    continue
+                results.append(_measure(bench, args.repeat, drop_derived))
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+            server.server_close()
+            if pool is not None:
+                pool.close()
+
+    _print_report(results, baseline)
+    if args.error_rate:
+        print(f"\nStub server: {server.requests} requests, "
+              f"{server.errors} injected errors")
+
+    if args.save:
+        payload = {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "profile": {"events": snapshot.total_events,
+                        "markets": snapshot.total_markets,
+                        "latency_ms": args.latency,
+                        "error_rate": args.error_rate,
+                        "repeat": args.repeat},
+            "results": [asdict(r) for r in results],
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
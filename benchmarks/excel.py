@@ -0,0 +1,57 @@
+"""Excel export: standard in-memory workbook vs write-only engine.
+
+    python -m benchmarks.excel [--events N] [--markets N]
+
+Times both engines on the same synthetic snapshot, then re-runs each
+under tracemalloc to report peak Python allocations.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import (generate_events, PROFILE_EVENTS,
+                                  PROFILE_MARKETS)
+from data_processor import DataProcessor
+from exporter import Exporter
+
+
+def _run(exporter: Exporter, snapshot, write_only: bool, path: str) -> None:
+    if write_only:
+        exporter._export_excel_write_only(snapshot, path)
+    else:
+        exporter._export_excel_standard(snapshot, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=PROFILE_EVENTS)
+    parser.add_argument("--markets", type=int, default=PROFILE_MARKETS)
+    args = parser.parse_args()
+
+    snapshot = DataProcessor.build_snapshot(
+        generate_events(args.events, args.markets), 0.0)
+    print(f"Synthetic snapshot: {snapshot.total_events} events, "
+          f"{snapshot.total_markets} markets")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exporter = Exporter()
+        for label, write_only in (("standard  ", False),
+                                  ("write-only", True)):
+            path = os.path.join(tmp, f"{label.strip()}.xlsx")
+            start = time.perf_counter()
+            _run(exporter, snapshot, write_only, path)
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(path)
+
+            tracemalloc.start()
+            _run(exporter, snapshot, write_only, path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {label}: {elapsed:6.2f}s  peak {peak / 1e6:7.1f} MB  "
+                  f"file {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Retained memory per market: plain dataclasses vs the compact models.
+
+    python -m benchmarks.memory [--events N] [--markets N]
+
+Both variants decode the same JSON payload (as the API client would),
+parse it, drop the raw dicts and measure what stays allocated.
+"""
+import argparse
+import gc
+import json
+import re
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Optional
+
+from benchmarks.synthetic import (generate_events, PROFILE_EVENTS,
+                                  PROFILE_MARKETS)
+from config import POLYMARKET_BASE_URL
+from data_processor import DataProcessor
+
+
+# ── Pre-compaction models: per-instance __dict__, price strings, no interning ──
+
+@dataclass
+class LegacyTag:
+    id: str
+    label: str
+    slug: str
+
+
+@dataclass
+class LegacyMarket:
+    id: str
+    question: str
+    slug: str
+    outcomes: List[str]
+    outcome_prices: List[str]
+    volume: float
+    volume_24hr: float
+    liquidity: float
+    active: bool
+    closed: bool
+    end_date: Optional[str]
+    polymarket_url: str
+    description: str = ""
+    resolved_by: Optional[str] = None
+    oracle_type: str = "Unknown"
+    oracle_link: str = ""
+    uma_bond: Optional[float] = None
+    uma_reward: Optional[float] = None
+    created_at: Optional[str] = None
+
+
+@dataclass
+class LegacyEvent:
+    id: str
+    title: str
+    slug: str
+    volume: float
+    volume_24hr: float
+    liquidity: float
+    active: bool
+    closed: bool
+    tags: List[LegacyTag]
+    markets: List[LegacyMarket]
+    polymarket_url: str
+    category: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+    description: str = ""
+    created_at: Optional[str] = None
+
+
+def _legacy_market(raw: dict, event_slug: str) -> LegacyMarket:
+    slug = raw.get("slug", "")
+    uma_bond = (float(raw["umaBond"])
+                if raw.get("umaBond") is not None else None)
+    resolved_by = raw.get("resolvedBy") or ""
+    oracle_type = "UMA" if uma_bond is not None else "Unknown"
+    oracle_link = (f"https://polygonscan.com/address/{resolved_by}"
+                   if resolved_by else "")
+    if oracle_type == "Unknown":
+        match = re.search(r'https?://data\.chain\.link/[^\s,)"]+',
+                          raw.get("description", ""))
+        if match:
+            oracle_type = "Chainlink"
+            oracle_link = match.group(0).rstrip(".")
+    return LegacyMarket(
+        id=raw.get("id", ""),
+        question=raw.get("question", ""),
+        slug=slug,
+        outcomes=json.loads(raw.get("outcomes", "[]")),
+        outcome_prices=json.loads(raw.get("outcomePrices", "[]")),
+        volume=float(raw.get("volumeNum") or 0),
+        volume_24hr=float(raw.get("volume24hr") or 0),
+        liquidity=float(raw.get("liquidity") or 0),
+        active=raw.get("active", False),
+        closed=raw.get("closed", False),
+        end_date=raw.get("endDate"),
+        polymarket_url=f"{POLYMARKET_BASE_URL}/{event_slug}/{slug}",
+        description=raw.get("description", ""),
+        resolved_by=resolved_by or None,
+        oracle_type=oracle_type,
+        oracle_link=oracle_link,
+        uma_bond=uma_bond,
+        uma_reward=(float(raw["umaReward"])
+                    if raw.get("umaReward") is not None else None),
+        created_at=raw.get("createdAt"),
+    )
+
+
+def _legacy_event(raw: dict) -> LegacyEvent:
+    slug = raw.get("slug", "")
+    tags = [LegacyTag(str(t.get("id", "")), t.get("label", ""),
+                      t.get("slug", "")) for t in raw.get("tags", [])]
+    markets = [_legacy_market(m, slug) for m in raw.get("markets", [])]
+    return LegacyEvent(
+        id=str(raw.get("id", "")),
+        title=raw.get("title", ""),
+        slug=slug,
+        volume=sum(m.volume for m in markets),
+        volume_24hr=sum(m.volume_24hr for m in markets),
+        liquidity=sum(m.liquidity for m in markets),
+        active=raw.get("active", False),
+        closed=raw.get("closed", False),
+        tags=tags,
+        markets=markets,
+        polymarket_url=f"{POLYMARKET_BASE_URL}/{slug}",
+        category=DataProcessor.determine_category(tags),
+        start_date=raw.get("startDate"),
+        end_date=raw.get("endDate"),
+        description=raw.get("description", ""),
+        created_at=raw.get("createdAt"),
+    )
+
+
+def retained_bytes(payload: bytes, parse) -> int:
+    gc.collect()
+    tracemalloc.start()
+    raw_events = json.loads(payload)
+    parsed = [parse(raw) for raw in raw_events]
+    del raw_events
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=PROFILE_EVENTS)
+    parser.add_argument("--markets", type=int, default=PROFILE_MARKETS)
+    args = parser.parse_args()
+
+    raw_events = generate_events(args.events, args.markets)
+    num_markets = sum(len(e["markets"]) for e in raw_events)
+    payload = json.dumps(raw_events).encode()
+    del raw_events
+
+    before = retained_bytes(payload, _legacy_event)
+    after = retained_bytes(payload, DataProcessor.parse_event)
+
+    print(f"Synthetic snapshot: {args.events} events, {num_markets} markets")
+    print(f"  plain dataclasses : {before / num_markets:8.0f} bytes/market "
+          f"({before / 1e6:.1f} MB)")
+    print(f"  compact models    : {after / num_markets:8.0f} bytes/market "
+          f"({after / 1e6:.1f} MB)")
+    print(f"  reduction         : {1 - after / before:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
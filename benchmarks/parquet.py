@@ -0,0 +1,133 @@
+"""Parquet export: round-trip parity with the JSON export.
+
+    python -m benchmarks.parquet [--events N] [--markets N] [--cassette DIR]
+
+Exports one snapshot as JSON and as Parquet, reads both files back and
+checks every value of the events and markets tables against the JSON
+export's events and their markets: counts, ids and order, list columns
+(tags, outcomes, prices), dictionary-encoded columns and nullable ones.
+Also prints both exports' sizes and times. Exits non-zero on any
+mismatch, or if pyarrow is not installed.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.parse import _cassette_pages
+from benchmarks.synthetic import (generate_events, PROFILE_EVENTS,
+                                  PROFILE_MARKETS)
+from data_processor import DataProcessor
+from export_store import ExportStore
+from exporter import Exporter, pq
+
+# Parquet column -> value of a JSON event record
+_EVENT_COLUMNS = {
+    "event_id": lambda e: e["id"],
+    "tags": lambda e: [t["label"] for t in e["tags"]],
+    "num_markets": lambda e: len(e["markets"]),
+}
+# Parquet column -> value of a JSON market record (and its event's)
+_MARKET_COLUMNS = {
+    "event_id": lambda e, m: e["id"],
+    "market_id": lambda e, m: m["id"],
+    "outcomes": lambda e, m: list(map(str, m["outcomes"])),
+}
+
+
+def _expected(names: List[str], record: Dict[str, Any], columns,
+              *context) -> Dict[str, Any]:
+    return {name: columns[name](*context) if name in columns
+            else record[name] for name in names}
+
+
+def _compare(table: str, rows: List[Dict[str, Any]],
+             expected: List[Dict[str, Any]], key: str) -> List[str]:
+    if len(rows) != len(expected):
+        return [f"{table}: {len(rows)} rows vs {len(expected)} in JSON"]
+    problems = []
+    for row, want in zip(rows, expected):
+        for name, value in row.items():
+            if value != want[name]:
+                problems.append(f"{table} {row[key]} {name}: "
+                                f"{value!r} vs {want[name]!r}")
+    return problems
+
+
+def check_round_trip(json_path: str, events_path: str,
+                     markets_path: str) -> List[str]:
+    """Differences between the Parquet tables and the JSON export."""
+    with open(json_path, "rb") as f:
+        exported = json.load(f)
+    events = pq.read_table(events_path)
+    markets = pq.read_table(markets_path)
+
+    expected_events = []
+    expected_markets = []
+    for e in exported["events"]:
+        expected_events.append(_expected(events.column_names, e,
+                                         _EVENT_COLUMNS, e))
+        expected_markets.extend(
+            _expected(markets.column_names, m, _MARKET_COLUMNS, e, m)
+            for m in e["markets"])
+
+    problems = _compare("event", events.to_pylist(), expected_events,
+                        "event_id")
+    problems += _compare("market", markets.to_pylist(), expected_markets,
+                         "market_id")
+    metadata = events.schema.metadata or {}
+    scraped_at = metadata.get(b"scraped_at", b"").decode()
+    if scraped_at != exported["scraped_at"]:
+        problems.append(f"scraped_at: {scraped_at!r} vs "
+                        f"{exported['scraped_at']!r}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=PROFILE_EVENTS)
+    parser.add_argument("--markets", type=int, default=PROFILE_MARKETS)
+    parser.add_argument("--cassette", metavar="DIR",
+                        help="Use a recorded cycle instead of synthetic "
+                             "events")
+    args = parser.parse_args()
+
+    if pq is None:
+        sys.exit("pyarrow is not installed; nothing to compare")
+    if args.cassette:
+        raw = [e for body in _cassette_pages(args.cassette)
+               for e in json.loads(body)]
+    else:
+        raw = generate_events(args.events, args.markets)
+    snapshot = DataProcessor.build_snapshot(raw, 0.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exporter = Exporter(json_compact=True,
+                            store=ExportStore(tmp, compression="none"))
+        start = time.perf_counter()
+        json_path = exporter.export_json(snapshot)
+        json_s = time.perf_counter() - start
+        start = time.perf_counter()
+        events_path, markets_path = exporter.export_parquet(snapshot)
+        parquet_s = time.perf_counter() - start
+
+        problems = check_round_trip(json_path, events_path, markets_path)
+        for problem in problems[:20]:
+            print(f"  round trip: {problem}")
+        if problems:
+            sys.exit(f"{len(problems)} round-trip problems")
+        json_mb = os.path.getsize(json_path) / 1e6
+        parquet_mb = (os.path.getsize(events_path)
+                      + os.path.getsize(markets_path)) / 1e6
+
+    print(f"{snapshot.total_events} events, {snapshot.total_markets} "
+          f"markets: Parquet round trip matches the JSON export\n")
+    print(f"  json    {json_mb:7.1f} MB  {json_s * 1e3:7.0f} ms")
+    print(f"  parquet {parquet_mb:7.1f} MB  {parquet_s * 1e3:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
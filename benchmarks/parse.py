@@ -0,0 +1,172 @@
+"""Page decoding: json.loads dicts vs msgspec typed structs.
+
+    python -m benchmarks.parse [--events N] [--markets N] [--cassette DIR]
+                               [--repeat N]
+
+First checks that both paths build identical snapshots (events, markets
+and every field on them) from the same ``/events`` response bodies, then
+times decoding and Event building separately for each path, cold and
+with a warm EventCache. Markets with null or malformed ``outcomes`` /
+``outcomePrices`` are checked on both paths too: they must parse, to no
+outcomes for a bad list and to NaN for a bad price entry. Exits non-zero
+on any parity mismatch.
+"""
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+from benchmarks.synthetic import (generate_events, PROFILE_EVENTS,
+                                  PROFILE_MARKETS)
+from cassette import CassettePlayer
+from config import API_PAGE_LIMIT
+from data_processor import EventCache, SnapshotBuilder
+from typed_decode import decode_event_page, msgspec
+
+
+def _pages(raw: List[dict]) -> List[bytes]:
+    return [json.dumps(raw[i:i + API_PAGE_LIMIT]).encode()
+            for i in range(0, len(raw), API_PAGE_LIMIT)]
+
+
+def _cassette_pages(directory: str) -> List[bytes]:
+    _, requests = CassettePlayer.load(CassettePlayer(directory, 0).paths[0])
+    return [body for _, body in sorted(
+        (meta["params"].get("offset", 0), body) for meta, body in requests
+        if meta["endpoint"] == "/events" and body is not None)]
+
+
+def _build(pages: List[list], cache: EventCache = None):
+    builder = SnapshotBuilder(cache)
+    for page in pages:
+        builder.add_page(page)
+    return builder.finalize(0.0)
+
+
+def check_parity(bodies: List[bytes]) -> List[str]:
+    """Differences between the dict and typed snapshots of ``bodies``."""
+    expected = _build([json.loads(b) for b in bodies])
+    decoded = [decode_event_page(b) for b in bodies]
+    problems = [f"page {i} fell back to json dicts"
+                for i, page in enumerate(decoded)
+                if page and isinstance(page[0], dict)]
+    actual = _build(decoded)
+    if len(expected.events) != len(actual.events):
+        problems.append(f"{len(expected.events)} events vs "
+                        f"{len(actual.events)}")
+    for want, got in zip(expected.events, actual.events):
+        if want != got:
+            problems.append(f"event {want.id} differs")
+    for name in ("total_markets", "total_volume"):
+        if getattr(expected, name) != getattr(actual, name):
+            problems.append(f"{name}: {getattr(expected, name)} vs "
+                            f"{getattr(actual, name)}")
+    if list(expected.categories) != list(actual.categories):
+        problems.append("category keys differ")
+    return problems
+
+
+# (outcomes, outcomePrices) as sent -> (outcomes, prices) parsed; None
+# stands for a NaN price
+_MALFORMED = [
+    (None, None, [], []),
+    ("null", "null", [], []),
+    ("[not json", "not json", [], []),
+    ('"Yes"', '"0.5"', [], []),
+    ('["Yes", "No"]', '["0.5", "abc"]', ["Yes", "No"], [0.5, None]),
+    ('["Yes", "No"]', '["abc", "0.25"]', ["Yes", "No"], [None, 0.25]),
+    ('["Yes", "No"]', '["0.5", null]', ["Yes", "No"], [0.5, None]),
+    (["Yes", "No"], ["0.5", "abc"], ["Yes", "No"], [0.5, None]),
+    (["Yes", "No"], [0.75, "0.25"], ["Yes", "No"], [0.75, 0.25]),
+]
+
+
+def check_malformed() -> List[str]:
+    """Problems parsing markets with null or malformed outcomes/prices."""
+    raw = [{"id": str(i), "slug": f"malformed-{i}", "markets": [
+        {"id": str(i), "outcomes": outcomes, "outcomePrices": prices}]}
+        for i, (outcomes, prices, _, _) in enumerate(_MALFORMED)]
+    body = json.dumps(raw).encode()
+    paths = [("json", json.loads(body))]
+    if msgspec is not None:
+        paths.append(("msgspec", decode_event_page(body)))
+    problems = []
+    for label, page in paths:
+        if label == "msgspec" and page and isinstance(page[0], dict):
+            problems.append("malformed page fell back to json dicts")
+        try:
+            snapshot = _build([page])
+        except Exception as e:
+            problems.append(f"{label}: {type(e).__name__}: {e}")
+            continue
+        for event, (sent, sent_prices, outcomes, prices) in zip(
+                snapshot.events, _MALFORMED):
+            market = event.markets[0]
+            got = [None if math.isnan(p) else p
+                   for p in market.outcome_prices]
+            if market.outcomes != outcomes or got != prices:
+                problems.append(
+                    f"{label}: {sent!r} / {sent_prices!r} parsed to "
+                    f"{market.outcomes!r} / {got!r}")
+    return problems
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=PROFILE_EVENTS)
+    parser.add_argument("--markets", type=int, default=PROFILE_MARKETS)
+    parser.add_argument("--cassette", metavar="DIR",
+                        help="Use a recorded cycle instead of synthetic "
+                             "events")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if msgspec is None:
+        sys.exit("msgspec is not installed; nothing to compare")
+    if args.cassette:
+        bodies = _cassette_pages(args.cassette)
+    else:
+        bodies = _pages(generate_events(args.events, args.markets))
+    mb = sum(map(len, bodies)) / 1e6
+
+    problems = check_parity(bodies) + check_malformed()
+    for problem in problems[:20]:
+        print(f"  parity: {problem}")
+    if problems:
+        sys.exit(f"{len(problems)} parity problems")
+
+    json_pages = [json.loads(b) for b in bodies]
+    typed_pages = [decode_event_page(b) for b in bodies]
+    snapshot = _build(json_pages)
+    print(f"{snapshot.total_events} events, {snapshot.total_markets} "
+          f"markets in {len(bodies)} pages ({mb:.1f} MB): parity OK\n")
+
+    for label, decode, pages in (("json   ", json.loads, json_pages),
+                                 ("msgspec", decode_event_page, typed_pages)):
+        warm = EventCache()
+        _build(pages, warm)
+        decode_s = _time(lambda: [decode(b) for b in bodies], args.repeat)
+        build_s = _time(lambda: _build(pages), args.repeat)
+        cached_s = _time(lambda: _build(pages, warm), args.repeat)
+        total = decode_s + build_s
+        print(f"  {label}: decode {decode_s * 1e3:7.1f} ms "
+              f"({mb / decode_s:6.1f} MB/s)  build {build_s * 1e3:7.1f} ms  "
+              f"cached {cached_s * 1e3:6.1f} ms  "
+              f"total {snapshot.total_markets / total:9,.0f} markets/s")
+
+
+if __name__ == "__main__":
+    main()
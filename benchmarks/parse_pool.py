@@ -0,0 +1,150 @@
+"""Parse pool: parent-side cost and break-even against in-process parsing.
+
+    python -m benchmarks.parse_pool [--events N] [--markets N]
+                                    [--cassette DIR] [--workers N]
+                                    [--repeat N]
+
+First checks that a ``ParsePool`` builds the same snapshot as an
+in-process parse, from json dicts and (with msgspec) typed RawEvents.
+Then splits a pooled parse into the parent's share (encoding the batch,
+unpickling the results and rebuilding the Events) and the workers' share
+(decoding, parsing, packing and pickling), and compares them with the
+in-process parse. The pool can only win when the parent's share is
+below the in-process time, and then needs at least
+
+    workers > workers' share / (in-process - parent's share)
+
+processes, on as many free cores. Finally times the pool end to end with
+``--workers`` processes. Exits non-zero on any parity mismatch.
+"""
+import argparse
+import json
+import math
+import os
+import pickle
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+from benchmarks.synthetic import (generate_events, PROFILE_EVENTS,
+                                  PROFILE_MARKETS)
+from benchmarks.parse import _cassette_pages, _pages
+from data_processor import SnapshotBuilder, _parse
+from parse_pool import ParsePool, _decode, _encode, _pack, _unpack
+from typed_decode import decode_event_page, msgspec
+
+
+def _build(pages: List[list], pool: ParsePool = None):
+    builder = SnapshotBuilder(pool=pool)
+    for page in pages:
+        builder.add_page(page)
+    return builder.finalize(0.0)
+
+
+def check_parity(pages: List[list], pool: ParsePool) -> List[str]:
+    """Differences between the in-process and pooled snapshots."""
+    expected = _build(pages)
+    actual = _build(pages, pool)
+    problems = []
+    if len(expected.events) != len(actual.events):
+        problems.append(f"{len(expected.events)} events vs "
+                        f"{len(actual.events)}")
+    for want, got in zip(expected.events, actual.events):
+        if want != got:
+            problems.append(f"event {want.id} differs")
+    return problems
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def _split(raws: list, batch: int, repeat: int):
+    """(in-process, parent's share, workers' share) seconds for ``raws``
+    shipped in batches of ``batch`` events."""
+    batches = [raws[i:i + batch] for i in range(0, len(raws), batch)]
+    encoded = [_encode(b) for b in batches]
+
+    def work(payload) -> bytes:
+        return pickle.dumps(_pack([_parse(r) for r in _decode(*payload)]),
+                            pickle.HIGHEST_PROTOCOL)
+
+    results = [work(payload) for payload in encoded]
+
+    def parent():
+        for b in batches:
+            _encode(b)
+        for b, result in zip(batches, results):
+            _unpack(pickle.loads(result), b)
+
+    def workers():
+        for payload in encoded:
+            work(payload)
+
+    in_process = _time(lambda: [_parse(r) for r in raws], repeat)
+    return (in_process, _time(parent, repeat), _time(workers, repeat),
+            sum(len(r) for r in results) / 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=PROFILE_EVENTS)
+    parser.add_argument("--markets", type=int, default=PROFILE_MARKETS)
+    parser.add_argument("--cassette", metavar="DIR",
+                        help="Use a recorded cycle instead of synthetic "
+                             "events")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.cassette:
+        bodies = _cassette_pages(args.cassette)
+    else:
+        bodies = _pages(generate_events(args.events, args.markets))
+    variants = [("json   ", [json.loads(b) for b in bodies])]
+    if msgspec is not None:
+        variants.append(("msgspec", [decode_event_page(b) for b in bodies]))
+
+    pool = ParsePool(args.workers)
+    try:
+        problems = []
+        for label, pages in variants:
+            problems += [f"{label.strip()}: {p}"
+                         for p in check_parity(pages, pool)]
+        for problem in problems[:20]:
+            print(f"  parity: {problem}")
+        if problems:
+            sys.exit(f"{len(problems)} parity problems")
+        snapshot = _build(variants[0][1])
+        print(f"{snapshot.total_events} events, {snapshot.total_markets} "
+              f"markets, batches of {pool.min_events}, {args.workers} "
+              f"workers on {os.cpu_count()} cores: parity OK\n")
+
+        for label, pages in variants:
+            raws = [raw for page in pages for raw in page]
+            in_process, parent, workers, mb = _split(raws, pool.min_events,
+                                                     args.repeat)
+            pooled = _time(lambda: _build(pages, pool), args.repeat)
+            if parent < in_process:
+                needed = math.floor(workers / (in_process - parent)) + 1
+                verdict = f"breaks even above {needed - 1} workers"
+            else:
+                verdict = "never breaks even"
+            print(f"  {label}: in-process {in_process * 1e3:6.0f} ms  "
+                  f"parent {parent * 1e3:6.0f} ms  "
+                  f"workers {workers * 1e3:6.0f} ms  "
+                  f"results {mb:5.1f} MB  pool {pooled * 1e3:6.0f} ms  "
+                  f"→ {verdict}")
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
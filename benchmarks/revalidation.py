@@ -0,0 +1,135 @@
+"""HTTP cache revalidation: 200 / 304 paths against the stub server.
+
+    python -m benchmarks.revalidation [--events N] [--markets N]
+
+Runs full crawls through a ``GammaAPIClient`` with an ``HTTPCache`` (in a
+temporary directory) against ``benchmarks.server`` and checks, cycle by
+cycle, how many pages were answered 200 and 304 and that the parsed
+snapshot always matches the events being served:
+
+* cold cache: every page 200 and cached
+* warm cache: every page 304 (``If-None-Match``), served from the cache
+* one event changed: only its page 200
+* cache file of one page deleted: its 304 can't be served, so that page
+  is refetched unconditionally
+* cache reopened from disk: every page 304
+* Last-Modified only (no ETags): 304 via ``If-Modified-Since``, and a
+  changed page 200
+
+Prints requests, 304s and bytes on the wire per cycle; exits non-zero on
+any mismatch.
+"""
+import argparse
+import copy
+import os
+import sys
+import tempfile
+from typing import List, Optional
+
+from api_client import GammaAPIClient
+from benchmarks.server import GammaStubServer
+from benchmarks.synthetic import generate_events
+from config import API_PAGE_LIMIT
+from data_processor import DataProcessor
+from http_cache import HTTPCache
+from rate_limiter import RateLimiter
+
+
+def _change_event(events: List[dict], index: int) -> List[dict]:
+    """``events`` with the prices of the event at ``index`` moved."""
+    events = copy.deepcopy(events)
+    for market in events[index]["markets"]:
+        market["outcomePrices"] = '["0.999", "0.001"]'
+    return events
+
+
+class _Check:
+    def __init__(self, server: GammaStubServer, pages: int):
+        self.server = server
+        self.pages = pages
+        self.problems: List[str] = []
+
+    def cycle(self, label: str, cache: HTTPCache,
+              expect_200: Optional[int], retried: int = 0) -> None:
+        """Crawl once; ``expect_200`` pages answered 200 (the rest 304),
+        or None to require every page 200. ``retried`` pages are expected
+        to take a second, unconditional request."""
+        client = GammaAPIClient(self.server.url, API_PAGE_LIMIT,
+                                self.pages + 1, 0.0, 1,
+                                http_cache=cache,
+                                rate_limiter=RateLimiter(0))
+        served = DataProcessor.build_snapshot(self.server.events, 0.0)
+        fetched = DataProcessor.build_snapshot(
+            client.fetch_all_active_events(), 0.0)
+        stats = client.take_transfer_stats()
+        ok = stats.requests - stats.not_modified
+        print(f"  {label:<28}{stats.requests:>9}{ok:>7}"
+              f"{stats.not_modified:>7}{stats.wire_bytes / 1024:>12.1f}"
+              f"{stats.body_bytes / 1024:>12.1f}")
+
+        if stats.requests != self.pages + retried:
+            self.problems.append(f"{label}: {stats.requests} requests, "
+                                 f"expected {self.pages + retried}")
+        want = self.pages if expect_200 is None else expect_200
+        if ok != want:
+            self.problems.append(f"{label}: {ok} pages answered 200, "
+                                 f"expected {want}")
+        if fetched.events != served.events:
+            self.problems.append(f"{label}: snapshot differs from the "
+                                 f"events served")
+        if len(cache) != self.pages:
+            self.problems.append(f"{label}: {len(cache)} cache entries, "
+                                 f"expected {self.pages}")
+
+
+def check_revalidation(events: List[dict], directory: str) -> List[str]:
+    server = GammaStubServer(events).start()
+    try:
+        pages = len(events) // API_PAGE_LIMIT + 1
+        check = _Check(server, pages)
+        print(f"  {'cycle':<28}{'requests':>9}{'200':>7}{'304':>7}"
+              f"{'wire KB':>12}{'decoded KB':>12}")
+
+        path = os.path.join(directory, "etag")
+        cache = HTTPCache(path, 1 << 30)
+        check.cycle("cold cache", cache, None)
+        check.cycle("warm cache", cache, 0)
+        server.set_events(_change_event(server.events, API_PAGE_LIMIT + 1))
+        check.cycle("one event changed", cache, 1)
+        victim = next(iter(cache._entries.values())).path
+        os.remove(victim)
+        check.cycle("one cache file deleted", cache, 1, retried=1)
+        check.cycle("reopened from disk", HTTPCache(path, 1 << 30), 0)
+
+        server.etags = False
+        cache = HTTPCache(os.path.join(directory, "last_modified"), 1 << 30)
+        check.cycle("Last-Modified: cold", cache, None)
+        check.cycle("Last-Modified: warm", cache, 0)
+        server.set_events(_change_event(server.events, 0))
+        check.cycle("Last-Modified: one changed", cache, 1)
+        return check.problems
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--markets", type=int, default=4000)
+    args = parser.parse_args()
+
+    events = generate_events(args.events, args.markets)
+    print(f"{len(events)} events in pages of {API_PAGE_LIMIT}\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        problems = check_revalidation(events, tmp)
+    print()
+    for problem in problems[:20]:
+        print(f"  revalidation: {problem}")
+    if problems:
+        sys.exit(f"{len(problems)} revalidation problems")
+    print("200 / 304 paths OK")
+
+
+if __name__ == "__main__":
+    main()
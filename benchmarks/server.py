@@ -0,0 +1,194 @@
+"""Local stand-in for the Gamma API's ``/events`` endpoint.
+
+    python -m benchmarks.server [--port N] [--latency MS] [--error-rate P]
+
+Serves synthetic events with ``limit``/``offset`` pagination (or by
+repeated ``id`` parameters, as tier refreshes request them), an optional
+per-request latency and a random fraction of 503 responses. Point the
+scraper at it with ``GAMMA_BASE_URL=http://127.0.0.1:PORT python main.py``.
+
+Pages carry an ``ETag`` (a hash of the body, unless ``etags`` is off) and
+a ``Last-Modified`` that moves only when the page's body changes, and are
+answered with 304 when the request's ``If-None-Match`` (or, without one,
+``If-Modified-Since``) still matches.
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import (generate_events, PROFILE_EVENTS,
+                                  PROFILE_MARKETS)
+
+
+class GammaStubServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding pre-encoded ``/events`` pages."""
+
+    daemon_threads = True
+
+    def __init__(self, events: List[Dict[str, Any]], host: str = "127.0.0.1",
+                 port: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        super().__init__((host, port), _EventsHandler)
+        self.events = events
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        # False: Last-Modified only, to exercise If-Modified-Since
+        self.etags = True
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # Encoded pages (body, ETag, Last-Modified epoch) keyed by (offset,
+        # limit) so the server's own JSON encoding doesn't show up in
+        # fetch timings after the first cycle
+        self._pages: Dict[Tuple[int, int], Tuple[bytes, str, int]] = {}
+        # Pages before the last set_events(), to keep unchanged pages'
+        # Last-Modified
+        self._previous: Dict[Tuple[int, int], Tuple[bytes, str, int]] = {}
+        self._modified = int(time.time())
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_events(self, events: List[Dict[str, Any]]) -> None:
+        """Serve ``events`` from now on; pages whose body changes get a new
+        ETag and a Last-Modified at least a second later than before."""
+        with self._lock:
+            self._previous.update(self._pages)
+            self._pages = {}
+            self.events = events
+            self._modified = max(int(time.time()), self._modified + 1)
+
+    def page(self, offset: int, limit: int) -> Tuple[bytes, str, int]:
+        """(body, ETag, Last-Modified epoch) of one page."""
+        key = (offset, limit)
+        page = self._pages.get(key)
+        if page is None:
+            body = json.dumps(self.events[offset:offset + limit]).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+            previous = self._previous.get(key)
+            modified = (previous[2] if previous and previous[1] == etag
+                        else self._modified)
+            page = self._pages[key] = (body, etag, modified)
+        return page
+
+    def by_id(self, ids: List[str]) -> bytes:
+        """Encoded events with the given ids, like ``/events?id=1&id=2``."""
+        wanted = set(ids)
+        return json.dumps([e for e in self.events
+                           if str(e.get("id")) in wanted]).encode()
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            return fail
+
+    def start(self) -> "GammaStubServer":
+        threading.Thread(target=self.serve_forever, name="gamma-stub",
+                         daemon=True).start()
+        return self
+
+
+class _EventsHandler(BaseHTTPRequestHandler):
+    server: GammaStubServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"",
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_modified(self, etag: str, modified: int) -> bool:
+        """Whether the request's validators still match the page."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None and self.server.etags:
+            return etag in (t.strip() for t in if_none_match.split(","))
+        since = self.headers.get("If-Modified-Since")
+        if since is None:
+            return False
+        try:
+            return modified <= parsedate_to_datetime(since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    def _send_page(self, page: Tuple[bytes, str, int]) -> None:
+        body, etag, modified = page
+        headers = {"Last-Modified": formatdate(modified, usegmt=True)}
+        if self.server.etags:
+            headers["ETag"] = etag
+        if self._not_modified(etag, modified):
+            with self.server._lock:
+                self.server.not_modified += 1
+            self._send(304, headers=headers)
+            return
+        self._send(200, body, headers)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/events":
+            self._send(404)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if self.server.should_fail():
+            self._send(503)
+            return
+        query = parse_qs(url.query)
+        if "id" in query:
+            self._send(200, self.server.by_id(query["id"]))
+            return
+        try:
+            offset = int(query.get("offset", ["0"])[0])
+            limit = int(query.get("limit", ["100"])[0])
+        except ValueError:
+            self._send(400)
+            return
+        self._send_page(self.server.page(offset, limit))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--events", type=int, default=PROFILE_EVENTS)
+    parser.add_argument("--markets", type=int, default=PROFILE_MARKETS)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Per-request latency in milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = GammaStubServer(generate_events(args.events, args.markets),
+                             port=args.port, latency=args.latency / 1000,
+                             error_rate=args.error_rate)
+    print(f"Serving {len(server.events)} synthetic events at "
+          f"{server.url}/events (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
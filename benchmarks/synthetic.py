@@ -0,0 +1,151 @@
+"""Synthetic Gamma API payloads shaped like the README's measured profile."""
+import json
+import random
+from typing import List, Dict, Any, Optional
+
+from data_processor import PRIORITY_TAGS
+
+# README "实测数据（2026-02-25）"
+PROFILE_EVENTS = 4515
+PROFILE_MARKETS = 35388
+PROFILE_CATEGORIES = 48
+PROFILE_CHAINLINK_EVENTS = 586
+
+_CRYPTO_ASSETS = ["BTC", "ETH", "SOL", "XRP"]
+_FILLER = (
+    "This market will resolve according to the official results published "
+    "by the relevant authority. If no such result is available by the end "
+    "date, the market will resolve based on a consensus of credible "
+    "reporting. Any ambiguity will be settled by the resolution source "
+    "listed below, and edits to the question text do not affect resolution. "
+)
+
+
+def _category_labels(num_categories: int) -> List[str]:
+    labels = list(PRIORITY_TAGS[:num_categories])
+    extra = 0
+    while len(labels) < num_categories:
+        extra += 1
+        labels.append(f"Topic {extra}")
+    return labels
+
+
+def _split_markets(rng: random.Random, num_events: int,
+                   num_markets: int) -> List[int]:
+    """Skewed markets-per-event counts (>= 1 each) summing to num_markets."""
+    counts = [1] * num_events
+    remaining = num_markets - num_events
+    weights = [min(rng.paretovariate(1.3), 40.0) for _ in range(num_events)]
+    total_weight = sum(weights)
+    for i, w in enumerate(weights):
+        extra = int(remaining * w / total_weight)
+        counts[i] += extra
+    shortfall = num_markets - sum(counts)
+    for i in range(shortfall):
+        counts[i % num_events] += 1
+    return counts
+
+
+def _market(rng: random.Random, event_id: int, index: int,
+            chainlink: bool) -> Dict[str, Any]:
+    yes = round(rng.random(), 3)
+    volume = rng.lognormvariate(9, 2.5)
+    if chainlink:
+        asset = rng.choice(_CRYPTO_ASSETS)
+        description = (
+            f"This market will resolve to \"Up\" if the {asset}/USD price at "
+            "the end of the window is greater than or equal to the price at "
+            "the start. Resolution source: "
+            f"https://data.chain.link/streams/{asset.lower()}-usd. "
+            + _FILLER * 2
+        )
+        outcomes = ["Up", "Down"]
+        uma_bond = None
+        uma_reward = None
+    else:
+        description = _FILLER * rng.randint(2, 8)
+        outcomes = ["Yes", "No"]
+        uma_bond = "500"
+        uma_reward = "5"
+    return {
+        "id": str(500000 + event_id * 100 + index),
+        "question": f"Synthetic question {event_id}-{index}?",
+        "slug": f"synthetic-question-{event_id}-{index}",
+        "outcomes": json.dumps(outcomes),
+        "outcomePrices": json.dumps([str(yes), str(round(1 - yes, 3))]),
+        "volume": str(volume),
+        "volumeNum": volume,
+        "volume24hr": volume * rng.random() * 0.05,
+        "liquidity": str(rng.lognormvariate(7, 2)),
+        "active": True,
+        "closed": False,
+        "endDate": "2026-12-31T00:00:00Z",
+        "description": description,
+        "resolvedBy": "0x6507a3b2c1d0e9f8a7b6c5d4e3f2a1b0c9d8e7f6",
+        "umaBond": uma_bond,
+        "umaReward": uma_reward,
+        "createdAt": "2025-06-10T12:00:00Z",
+        "updatedAt": "2026-02-25T08:00:00Z",
+    }
+
+
+def generate_events(num_events: int = PROFILE_EVENTS,
+                    num_markets: int = PROFILE_MARKETS,
+                    num_categories: int = PROFILE_CATEGORIES,
+                    chainlink_events: Optional[int] = None,
+                    seed: int = 42) -> List[Dict[str, Any]]:
+    """Raw ``/events`` dicts, ordered by descending 24h volume like the API.
+
+    Chainlink events are single-market crypto windows; the remaining
+    markets are spread over UMA events with a long-tailed distribution.
+    By default Chainlink events keep the profile's share of ``num_events``.
+    Always returns exactly ``num_markets`` markets, or raises ValueError
+    when that can't be done (fewer markets than events).
+    """
+    if num_markets < num_events:
+        raise ValueError(f"{num_markets} markets can't fill {num_events} "
+                         f"events of at least one market each")
+    rng = random.Random(seed)
+    labels = _category_labels(num_categories)
+    if chainlink_events is None:
+        chainlink_events = round(num_events * PROFILE_CHAINLINK_EVENTS
+                                 / PROFILE_EVENTS)
+    # Markets beyond one per event need at least one UMA event to hold them
+    chainlink_events = min(chainlink_events,
+                           num_events - (num_markets > num_events))
+    uma_events = num_events - chainlink_events
+    uma_counts = (_split_markets(rng, uma_events, num_markets - chainlink_events)
+                  if uma_events else [])
+
+    events = []
+    for event_id in range(num_events):
+        chainlink = event_id >= uma_events
+        if chainlink:
+            label = "Crypto"
+            count = 1
+        else:
+            label = labels[rng.randrange(len(labels))]
+            count = uma_counts[event_id]
+        markets = [_market(rng, event_id, i, chainlink) for i in range(count)]
+        events.append({
+            "id": str(100000 + event_id),
+            "title": f"Synthetic event {event_id}",
+            "slug": f"synthetic-event-{event_id}",
+            "active": True,
+            "closed": False,
+            "tags": [
+                {"id": "1", "label": "All", "slug": "all"},
+                {"id": str(10 + sum(map(ord, label))), "label": label,
+                 "slug": label.lower().replace(" ", "-")},
+            ],
+            "markets": markets,
+            "startDate": "2025-06-10T00:00:00Z",
+            "endDate": "2026-12-31T00:00:00Z",
+            "description": _FILLER * rng.randint(1, 4),
+            "createdAt": "2025-06-10T12:00:00Z",
+            "updatedAt": "2026-02-25T08:00:00Z",
+        })
+
+    events.sort(key=lambda e: sum(m["volume24hr"] for m in e["markets"]),
+                reverse=True)
+    return events
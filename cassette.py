@@ -0,0 +1,195 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+_CYCLE_FILE = "cycle{:06d}.cas.gz"
+
+
+class CassetteExhausted(Exception):
+    """Raised when a replay asks for a cycle past the last recorded one."""
+
+
+def _request_key(endpoint: str, params: Optional[dict]) -> str:
+    return f"{endpoint}?{urlencode(sorted((params or {}).items()))}"
+
+
+class CassetteRecorder:
+    """Records every API response of each scrape cycle to a cassette.
+
+    A cycle becomes one gzip file: a JSON header line, then per request a
+    JSON metadata line (endpoint, params, start/end offsets in seconds from
+    the cycle start, body size) followed by the raw response body. Failed
+    requests are recorded with no body, so broken cycles replay as broken.
+    """
+
+    def __init__(self, directory: str, compresslevel: int = 3):
+        self.directory = directory
+        self.compresslevel = compresslevel
+        os.makedirs(directory, exist_ok=True)
+        existing = [n for n in os.listdir(directory) if n.endswith(".cas.gz")]
+        self._cycle = len(existing)
+        self._lock = threading.Lock()
+        self._started_at = 0.0
+        self._origin = 0.0
+        self._active = False
+        self._requests: List[Tuple[dict, Optional[bytes]]] = []
+
+    def begin_cycle(self) -> None:
+        with self._lock:
+            self._cycle += 1
+            self._started_at = time.time()
+            self._origin = time.monotonic()
+            self._requests = []
+            self._active = True
+
+    def now(self) -> float:
+        """Seconds since the current cycle began."""
+        return time.monotonic() - self._origin
+
+    def record(self, endpoint: str, params: Optional[dict], start: float,
+               end: float, body: Optional[bytes]) -> None:
+        if not self._active:
+            return
+        meta = {"endpoint": endpoint, "params": params or {},
+                "start": round(start, 6), "end": round(end, 6),
+                "size": -1 if body is None else len(body)}
+        with self._lock:
+            self._requests.append((meta, body))
+
+    def end_cycle(self) -> None:
+        with self._lock:
+            requests, self._requests = self._requests, []
+            self._active = False
+            header = {"version": CASSETTE_VERSION, "cycle": self._cycle,
+                      "started_at": self._started_at,
+                      "duration": round(self.now(), 6),
+                      "requests": len(requests)}
+            path = os.path.join(self.directory,
+                                _CYCLE_FILE.format(self._cycle))
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with gzip.open(tmp_path, "wb", compresslevel=self.compresslevel) as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            for meta, body in sorted(requests, key=lambda r: r[0]["start"]):
+                f.write(json.dumps(meta).encode() + b"\n")
+                if body is not None:
+                    f.write(body)
+                f.write(b"\n")
+        os.replace(tmp_path, path)
+        logger.info("Recorded cycle %d (%d requests) to %s",
+                    header["cycle"], len(requests), path)
+
+
+class CassettePlayer:
+    """Serves recorded cycles back in place of the API.
+
+    ``speed`` scales recorded time: 1.0 replays at recorded speed (both
+    per-request latency and the gaps between cycles), 10.0 ten times
+    faster, and 0 as fast as possible.
+    """
+
+    def __init__(self, directory: str, speed: float = 1.0):
+        self.directory = directory
+        self.speed = speed
+        self.paths = sorted(
+            os.path.join(directory, n) for n in os.listdir(directory)
+            if n.endswith(".cas.gz"))
+        if not self.paths:
+            raise FileNotFoundError(f"No cassette cycles in {directory}")
+        self._index = 0
+        self._first_started_at: Optional[float] = None
+        self._replay_origin = 0.0
+        self._cycle_origin = 0.0
+        self._lock = threading.Lock()
+        self._responses: Dict[str, List[Tuple[dict, Optional[bytes]]]] = {}
+        self._closed = threading.Event()
+        self._advanced = False
+
+    @staticmethod
+    def load(path: str) -> Tuple[dict, List[Tuple[dict, Optional[bytes]]]]:
+        """Header and (metadata, body) pairs of one recorded cycle."""
+        with gzip.open(path, "rb") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in {path}")
+            requests = []
+            for _ in range(header["requests"]):
+                meta = json.loads(f.readline())
+                body = f.read(meta["size"]) if meta["size"] >= 0 else None
+                f.read(1)
+                requests.append((meta, body))
+        return header, requests
+
+    def _sleep_until(self, deadline: float) -> None:
+        if self.speed > 0:
+            self._closed.wait(max(0.0, deadline - time.monotonic()))
+
+    def advance(self) -> None:
+        """Load the next recorded cycle and wait for its (scaled) start
+        time. Called by :meth:`begin_cycle` unless done beforehand, so
+        callers can keep the wait out of their cycle timings."""
+        if self._index >= len(self.paths):
+            raise CassetteExhausted(self.directory)
+        path = self.paths[self._index]
+        self._index += 1
+        header, requests = self.load(path)
+
+        now = time.monotonic()
+        if self._first_started_at is None:
+            self._first_started_at = header["started_at"]
+            self._replay_origin = now
+        elif self.speed > 0:
+            gap = header["started_at"] - self._first_started_at
+            self._sleep_until(self._replay_origin + gap / self.speed)
+
+        responses: Dict[str, List[Tuple[dict, Optional[bytes]]]] = {}
+        for meta, body in requests:
+            key = _request_key(meta["endpoint"], meta["params"])
+            responses.setdefault(key, []).append((meta, body))
+        with self._lock:
+            self._responses = responses
+        self._advanced = True
+        logger.info("Replaying cycle %d of %d from %s", self._index,
+                    len(self.paths), path)
+
+    def begin_cycle(self) -> None:
+        if not self._advanced:
+            self.advance()
+        self._advanced = False
+        with self._lock:
+            self._cycle_origin = time.monotonic()
+
+    def response(self, endpoint: str, params: Optional[dict],
+                 decode: Optional[Callable[[bytes], Any]] = None
+                 ) -> Optional[Any]:
+        """The recorded result of this request, decoded with ``decode``
+        (default ``json.loads``) and delivered no earlier than its recorded
+        completion time (scaled by ``speed``)."""
+        key = _request_key(endpoint, params)
+        with self._lock:
+            recorded = self._responses.get(key)
+            entry = recorded.pop(0) if recorded else None
+        if entry is None:
+            logger.debug("No recorded response for %s", key)
+            return None
+        meta, body = entry
+        if self.speed > 0:
+            self._sleep_until(self._cycle_origin + meta["end"] / self.speed)
+        if body is None:
+            return None
+        return (decode or json.loads)(body)
+
+    def end_cycle(self) -> None:
+        with self._lock:
+            self._responses = {}
+
+    def close(self) -> None:
+        """Cut any pending replay wait short (e.g. on shutdown)."""
+        self._closed.set()
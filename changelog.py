@@ -0,0 +1,298 @@
+"""Market-level changelog: append-only JSONL deltas plus full checkpoints.
+
+    python changelog.py DIR [--at TIME] [--out PATH]
+
+Each snapshot is diffed against the previous one, market by market, and
+only the differences are appended to the current segment,
+``changes-<ms>.jsonl``, one JSON object per line::
+
+    {"ts": 1760775263.1, "op": "add", "id": "...", "record": {...}}
+    {"ts": 1760775293.4, "op": "change", "id": "...", "fields": {...}}
+    {"ts": 1760775323.9, "op": "remove", "id": "..."}
+
+``fields`` holds only the fields that changed. Every ``checkpoint_interval``
+seconds the full state is written to ``checkpoint-<ms>.jsonl.gz`` (a
+header line, then one record per market) and a new segment is started;
+segments also roll over past ``max_bytes``. :func:`rebuild` restores the
+state at any time from the nearest checkpoint before it plus the segments
+that follow. Run as a script it rebuilds the state at ``--at`` (default:
+latest) and writes the records as JSON.
+"""
+import argparse
+import gzip
+import json
+import logging
+import math
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import (CHANGELOG_CHECKPOINT_SECONDS, CHANGELOG_MAX_BYTES,
+                    JSON_ENCODER)
+from exporter import MARKET_CSV_COLUMNS, atomic_write, _json_encoder
+from models import Event, ScraperSnapshot
+
+logger = logging.getLogger(__name__)
+
+# The market CSV schema, minus the per-file scrape time
+RECORD_FIELDS = tuple(c for c in MARKET_CSV_COLUMNS if c != "scraped_at")
+_CHECKPOINT = "checkpoint-{:013d}.jsonl.gz"
+_SEGMENT = "changes-{:013d}.jsonl"
+
+
+@dataclass
+class ChangelogStats:
+    """What one :meth:`Changelog.record` call wrote."""
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    bytes: int = 0
+    checkpoint: Optional[str] = None
+
+
+def _market_records(event: Event) -> Iterator[Tuple[str, tuple]]:
+    """(market id, values in RECORD_FIELDS order) for each market."""
+    for m in event.markets:
+        yield m.id, (
+            event.id,
+            event.title,
+            event.category,
+            m.id,
+            m.question,
+            list(m.outcomes),
+            # NaN (an unparseable price) never equals itself; null does
+            [None if math.isnan(p) else p for p in m.outcome_prices],
+            round(m.volume, 2),
+            round(m.volume_24hr, 2),
+            round(m.liquidity, 2),
+            m.active,
+            m.closed,
+            m.end_date,
+            m.oracle_type,
+            m.oracle_link,
+            m.resolved_by,
+            m.uma_bond,
+            m.uma_reward,
+            m.created_at,
+            m.polymarket_url,
+        )
+
+
+def _ms(ts: float) -> int:
+    return int(ts * 1000)
+
+
+def _stamp(name: str) -> int:
+    return int(name.split("-", 1)[1].split(".", 1)[0])
+
+
+class Changelog:
+    """Appends per-market differences between consecutive snapshots.
+
+    Feed it every published snapshot, in order, including tier refreshes:
+    events the snapshot's delta reports as unchanged are the same objects
+    as before and are skipped, so a cycle costs time in proportion to what
+    moved. Without a delta (no EventCache) every event is compared.
+    """
+
+    def __init__(self, directory: str,
+                 checkpoint_interval: float = CHANGELOG_CHECKPOINT_SECONDS,
+                 max_bytes: int = CHANGELOG_MAX_BYTES,
+                 json_encoder: str = JSON_ENCODER):
+        self.directory = directory
+        self.checkpoint_interval = checkpoint_interval
+        self.max_bytes = max_bytes
+        self._dumps = _json_encoder(json_encoder)
+        os.makedirs(directory, exist_ok=True)
+        # market id -> record values; event id -> its market ids
+        self._records: Dict[str, tuple] = {}
+        self._event_markets: Dict[str, List[str]] = {}
+        self._segment = None
+        self._segment_bytes = 0
+        self._checkpointed_at: Optional[float] = None
+
+    def record(self, snapshot: ScraperSnapshot) -> ChangelogStats:
+        ts = snapshot.captured_at or time.time()
+        stats = ChangelogStats()
+        lines: List[bytes] = []
+        dumps = self._dumps
+        # Until the first checkpoint holds the state, there is nothing to
+        # append changes to
+        logging_changes = self._checkpointed_at is not None
+
+        def emit(entry: dict) -> None:
+            if logging_changes:
+                lines.append(dumps(entry, False) + b"\n")
+
+        delta = snapshot.delta
+        if delta is None or not logging_changes:
+            touched = None
+            gone = set(self._event_markets) - {e.id for e in snapshot.events}
+        else:
+            touched = set(delta.added) | set(delta.changed)
+            gone = set(delta.removed)
+
+        for event_id in gone:
+            for market_id in self._event_markets.pop(event_id, ()):
+                if self._records.pop(market_id, None) is not None:
+                    emit({"ts": ts, "op": "remove", "id": market_id})
+                    stats.removed += 1
+
+        for event in snapshot.events:
+            if touched is not None and event.id not in touched:
+                continue
+            previous_ids = self._event_markets.get(event.id, ())
+            market_ids = []
+            for market_id, values in _market_records(event):
+                market_ids.append(market_id)
+                old = self._records.get(market_id)
+                if old == values:
+                    continue
+                self._records[market_id] = values
+                if old is None:
+                    emit({"ts": ts, "op": "add", "id": market_id,
+                          "record": dict(zip(RECORD_FIELDS, values))})
+                    stats.added += 1
+                else:
+                    emit({"ts": ts, "op": "change", "id": market_id,
+                          "fields": {f: v for f, v, o in zip(
+                              RECORD_FIELDS, values, old) if v != o}})
+                    stats.changed += 1
+            self._event_markets[event.id] = market_ids
+            for market_id in set(previous_ids) - set(market_ids):
+                if self._records.pop(market_id, None) is not None:
+                    emit({"ts": ts, "op": "remove", "id": market_id})
+                    stats.removed += 1
+
+        if logging_changes:
+            stats.bytes = self._append(lines, ts)
+        if (not logging_changes
+                or ts - self._checkpointed_at >= self.checkpoint_interval):
+            stats.checkpoint = self._write_checkpoint(ts)
+        return stats
+
+    def _append(self, lines: List[bytes], ts: float) -> int:
+        if not lines:
+            return 0
+        if self._segment is None or self._segment_bytes >= self.max_bytes:
+            self._open_segment(ts)
+        data = b"".join(lines)
+        # One write per snapshot; a crash can leave at most a torn last
+        # line, which rebuild() ignores
+        self._segment.write(data)
+        self._segment.flush()
+        self._segment_bytes += len(data)
+        return len(data)
+
+    def _open_segment(self, ts: float) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        path = os.path.join(self.directory, _SEGMENT.format(_ms(ts)))
+        self._segment = open(path, "ab")
+        self._segment_bytes = self._segment.tell()
+
+    def _write_checkpoint(self, ts: float) -> str:
+        path = os.path.join(self.directory, _CHECKPOINT.format(_ms(ts)))
+        dumps = self._dumps
+        with atomic_write(path, "wb") as raw, \
+                gzip.open(raw, "wb", compresslevel=6) as f:
+            f.write(dumps({"checkpoint": ts, "markets": len(self._records)},
+                          False) + b"\n")
+            for values in self._records.values():
+                f.write(dumps(dict(zip(RECORD_FIELDS, values)), False)
+                        + b"\n")
+        self._checkpointed_at = ts
+        # Changes after the checkpoint start a fresh segment
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        logger.info("Changelog checkpoint: %d markets to %s",
+                    len(self._records), path)
+        return path
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+
+def _read_lines(path: str) -> Iterator[dict]:
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning("Skipping torn line in %s", path)
+                return
+
+
+def rebuild(directory: str, at: Optional[float] = None) -> Dict[str, dict]:
+    """Market records (keyed by market id) as of epoch time ``at``,
+    default the latest state. Empty before the first checkpoint."""
+    names = sorted(os.listdir(directory))
+    checkpoints = [n for n in names if n.startswith("checkpoint-")
+                   and n.endswith(".jsonl.gz")]
+    if at is not None:
+        checkpoints = [n for n in checkpoints if _stamp(n) <= _ms(at)]
+    if not checkpoints:
+        return {}
+
+    records: Dict[str, dict] = {}
+    with gzip.open(os.path.join(directory, checkpoints[-1]), "rb") as f:
+        since = json.loads(f.readline())["checkpoint"]
+        for line in f:
+            record = json.loads(line)
+            records[record["market_id"]] = record
+
+    segments = [n for n in names if n.startswith("changes-")
+                and n.endswith(".jsonl")]
+    # The segment open when the checkpoint was taken may hold later lines
+    start = max((i for i, n in enumerate(segments)
+                 if _stamp(n) <= _ms(since)), default=0)
+    for name in segments[start:]:
+        for entry in _read_lines(os.path.join(directory, name)):
+            ts = entry["ts"]
+            if ts <= since:
+                continue
+            if at is not None and ts > at:
+                return records
+            if entry["op"] == "add":
+                records[entry["id"]] = entry["record"]
+            elif entry["op"] == "change" and entry["id"] in records:
+                records[entry["id"]].update(entry["fields"])
+            elif entry["op"] == "remove":
+                records.pop(entry["id"], None)
+    return records
+
+
+def _parse_time(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--at", type=_parse_time, metavar="TIME",
+                        help="Epoch seconds or ISO-8601 time "
+                             "(default: latest)")
+    parser.add_argument("--out", metavar="PATH",
+                        help="Write the records as JSON (default: stdout)")
+    args = parser.parse_args()
+
+    records = list(rebuild(args.directory, args.at).values())
+    if args.out:
+        with atomic_write(args.out, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        print(f"{len(records)} markets written to {args.out}")
+    else:
+        json.dump(records, sys.stdout, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from models import ScraperSnapshot
+
+
+class SnapshotColumns:
+    """Column-oriented NumPy view of a ScraperSnapshot.
+
+    Per-event arrays are aligned with ``snapshot.events``; per-market arrays
+    are flattened in the same order, with ``market_offsets[i]:
+    market_offsets[i + 1]`` selecting the markets of event ``i``. Category
+    and oracle labels are stored as integer codes into ``category_names`` /
+    ``oracle_names``.
+    """
+
+    def __init__(self, snapshot: ScraperSnapshot):
+        events = snapshot.events
+        n = len(events)
+        self.events = events
+
+        self.category_names: List[str] = list(snapshot.categories)
+        category_codes = {name: i for i, name in enumerate(self.category_names)}
+        self.category_code = np.fromiter(
+            (category_codes[e.category] for e in events), np.int32, n)
+        self.volume = np.fromiter((e.volume for e in events), np.float64, n)
+        self.volume_24hr = np.fromiter(
+            (e.volume_24hr for e in events), np.float64, n)
+        self.liquidity = np.fromiter(
+            (e.liquidity for e in events), np.float64, n)
+        self.market_count = np.fromiter(
+            (len(e.markets) for e in events), np.int64, n)
+
+        self.market_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(self.market_count, out=self.market_offsets[1:])
+        total = int(self.market_offsets[-1])
+        markets = [m for e in events for m in e.markets]
+        self.market_volume = np.fromiter(
+            (m.volume for m in markets), np.float64, total)
+        self.market_volume_24hr = np.fromiter(
+            (m.volume_24hr for m in markets), np.float64, total)
+        self.market_liquidity = np.fromiter(
+            (m.liquidity for m in markets), np.float64, total)
+
+        oracle_codes = {"Unknown": 0}
+        self.market_oracle_code = np.fromiter(
+            (oracle_codes.setdefault(m.oracle_type, len(oracle_codes))
+             for m in markets), np.int32, total)
+        # Event oracle = oracle of its top market (DataProcessor.parse_event)
+        self.oracle_code = np.fromiter(
+            (oracle_codes.setdefault(e.oracle_type or "Unknown",
+                                     len(oracle_codes)) for e in events),
+            np.int32, n)
+        self.oracle_names: List[str] = list(oracle_codes)
+
+    def category_totals(self) -> List[Tuple[str, int, int, float, float, float]]:
+        """(category, events, markets, volume, volume_24hr, liquidity) rows
+        in ``snapshot.categories`` order."""
+        k = len(self.category_names)
+        codes = self.category_code
+        events = np.bincount(codes, minlength=k)
+        markets = np.bincount(codes, weights=self.market_count, minlength=k)
+        volume = np.bincount(codes, weights=self.volume, minlength=k)
+        volume_24hr = np.bincount(codes, weights=self.volume_24hr, minlength=k)
+        liquidity = np.bincount(codes, weights=self.liquidity, minlength=k)
+        return [
+            (name, int(events[i]), int(markets[i]), float(volume[i]),
+             float(volume_24hr[i]), float(liquidity[i]))
+            for i, name in enumerate(self.category_names)
+        ]
+
+    def oracle_totals(self) -> List[Tuple[str, int, int, float, float]]:
+        """(oracle_type, events, markets, volume, volume_24hr) rows for every
+        oracle type that is the top-market oracle of at least one event."""
+        k = len(self.oracle_names)
+        codes = self.oracle_code
+        events = np.bincount(codes, minlength=k)
+        markets = np.bincount(codes, weights=self.market_count, minlength=k)
+        volume = np.bincount(codes, weights=self.volume, minlength=k)
+        volume_24hr = np.bincount(codes, weights=self.volume_24hr, minlength=k)
+        return [
+            (name, int(events[i]), int(markets[i]), float(volume[i]),
+             float(volume_24hr[i]))
+            for i, name in enumerate(self.oracle_names) if events[i]
+        ]
+
+
+def snapshot_columns(snapshot: ScraperSnapshot) -> SnapshotColumns:
+    """Columnar view of ``snapshot``, built on first use and cached on it."""
+    if snapshot.columns is None:
+        snapshot.columns = SnapshotColumns(snapshot)
+    return snapshot.columns
@@ -1,5 +1,8 @@
-# API endpoints
-GAMMA_BASE_URL = "https://gamma-api.polymarket.com"
+import os
+
+# API endpoints (override the base URL to target e.g. benchmarks.server)
+GAMMA_BASE_URL = os.environ.get("GAMMA_BASE_URL",
+                                "https://gamma-api.polymarket.com")
 EVENTS_ENDPOINT = "/events"
 MARKETS_ENDPOINT = "/markets"
 TAGS_ENDPOINT = "/tags"
@@ -9,11 +12,86 @@ POLYMARKET_BASE_URL = "https://polymarket.com/event"
 
 # Scraper settings
 REFRESH_INTERVAL_SECONDS = 30
+
+# Tiered refresh: between full sweeps (every REFRESH_INTERVAL_SECONDS), hot
+# and warm events are re-fetched by id on their own cadence and merged into
+# the snapshot. An event is hot on high 24h volume, an end date close
+# ahead, or a top price that moved since it was last seen; caps keep each
+# tier to a few requests. HOT_REFRESH_SECONDS = 0 turns tiers off.
+HOT_REFRESH_SECONDS = 5
+WARM_REFRESH_SECONDS = 15
+HOT_VOLUME_24HR = 250_000
+WARM_VOLUME_24HR = 25_000
+HOT_ENDS_WITHIN_SECONDS = 15 * 60
+WARM_ENDS_WITHIN_SECONDS = 6 * 3600
+HOT_PRICE_MOVE = 0.02
+MAX_HOT_EVENTS = 100
+MAX_WARM_EVENTS = 300
 API_PAGE_LIMIT = 100
 MAX_PAGES = 50
 
 # Rate limiting (conservative delay between paginated requests)
 REQUEST_DELAY_SECONDS = 0.05
 
+# Concurrent page fetching (1 worker = sequential pagination)
+FETCH_WORKERS = 4
+MAX_REQUESTS_PER_SECOND = 20.0
+
+# Opt-in process pool for parsing (0 = parse in the main process). Only
+# batches of at least PARSE_POOL_MIN_EVENTS events needing a parse are
+# sent to it, so small snapshots and mostly-cached cycles stay in-process.
+# Used with JSON_DECODER = "json" only; see python -m benchmarks.parse_pool
+# for the worker count it needs to beat an in-process parse
+PARSE_WORKERS = 0
+PARSE_POOL_MIN_EVENTS = 500
+
+# Adaptive rate limiting: a 429 halves the request rate (not below the
+# minimum); each successful request adds the recovery step back
+RATE_LIMIT_MIN_RATE = 1.0
+RATE_LIMIT_RECOVERY_STEP = 0.5
+
+# On-disk HTTP response cache (conditional requests via ETag/Last-Modified)
+HTTP_CACHE_DIR = ".http_cache"
+HTTP_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Market-level delta changelog (--changelog): JSONL segments rolled over at
+# CHANGELOG_MAX_BYTES, with a full gzip checkpoint every interval
+CHANGELOG_DIR = "changelog"
+CHANGELOG_CHECKPOINT_SECONDS = 3600
+CHANGELOG_MAX_BYTES = 64 * 1024 * 1024
+
+# Instrumentation: Prometheus text endpoint (0 = disabled) and the
+# directory for --profile-cycle dumps
+METRICS_PORT = 0
+PROFILE_DIR = "profiles"
+
+# Dashboard: events table rows per page
+DASHBOARD_PAGE_SIZE = 25
+
 # Export settings
 EXPORT_DIR = "exports"
+JSON_COMPACT = False      # True: no indentation in JSON exports
+JSON_ENCODER = "auto"     # "auto" (orjson if installed) | "orjson" | "json"
+JSON_DECODER = "auto"     # API pages: "auto" (msgspec if installed) | "msgspec" | "json"
+EXCEL_WRITE_ONLY = True   # stream Excel rows via openpyxl write-only sheets
+CSV_GZIP = False          # gzip market-level CSV exports on the fly
+CSV_ROWS_PER_FILE = 0     # roll market-level CSV every N rows (0 = one file)
+
+# Export storage (export_store.py): on-the-fly compression of CSV/JSON
+# exports, hourly archives of older files and retention (0 = no limit)
+EXPORT_COMPRESSION = "none"   # "none" | "gzip" | "zstd" (needs zstandard)
+EXPORT_ARCHIVE_HOURLY = True  # roll finished hours into exports/archive/
+EXPORT_RETENTION_HOURS = 72
+EXPORT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Alert rules (--alert-rules): repeats of a rule for the same market are
+# suppressed for the cooldown; each market keeps its last N samples
+ALERT_COOLDOWN_SECONDS = 300
+ALERT_HISTORY_SIZE = 64
+ALERT_WEBHOOK_TIMEOUT_SECONDS = 5
+
+# Price/volume history store (--history-db)
+HISTORY_RETENTION_DAYS = 30
+HISTORY_DOWNSAMPLE_AFTER_HOURS = 24
+HISTORY_DOWNSAMPLE_BUCKET_SECONDS = 900
+HISTORY_COMPACT_INTERVAL_SECONDS = 3600
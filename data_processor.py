@@ -1,9 +1,15 @@
+import json
+import math
 import re
+import sys
+import time
+from array import array
 from datetime import datetime, timezone
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
-from models import Tag, Market, Event, ScraperSnapshot
+from models import Tag, Market, Event, ScraperSnapshot, SnapshotDelta
 from config import POLYMARKET_BASE_URL
+from metrics import PAGE_PARSE_SECONDS, SNAPSHOT_SECONDS, SNAPSHOT_SIZE
 
 PRIORITY_TAGS = [
     "Politics", "Crypto", "Sports", "Finance",
@@ -11,17 +17,69 @@ PRIORITY_TAGS = [
     "AI", "Technology", "Culture", "World",
 ]
 
+# Lower-cased label -> position in PRIORITY_TAGS (lower wins)
+_PRIORITY_RANK = {tag.lower(): i for i, tag in enumerate(PRIORITY_TAGS)}
+
+_CHAINLINK_URL = re.compile(r'https?://data\.chain\.link/[^\s,)"]+')
+
+# Tags repeat across thousands of events; share one Tag per (id, label, slug)
+_TAG_CACHE: Dict[Tuple[str, str, str], Tag] = {}
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _shared_tag(tag_id: str, label: str, slug: str) -> Tag:
+    key = (tag_id, label, slug)
+    tag = _TAG_CACHE.get(key)
+    if tag is None:
+        tag = Tag(id=_intern(tag_id), label=_intern(label),
+                  slug=_intern(slug))
+        _TAG_CACHE[key] = tag
+    return tag
+
+
+def _price(value) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return math.nan
+
+
+def _price_array(values) -> array:
+    """Decoded ``outcomePrices`` as floats. An entry that isn't a number
+    becomes NaN, keeping the prices aligned with the outcomes; anything
+    but a list gives no prices."""
+    if not isinstance(values, list):
+        return array("d")
+    try:
+        return array("d", map(float, values))
+    except (ValueError, TypeError):
+        return array("d", map(_price, values))
+
+
+def _epoch(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds of an ISO-8601 API timestamp, or None."""
+    if not value:
+        return None
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if when.tzinfo is None:
+        return None
+    return when.timestamp()
+
 
 class DataProcessor:
     """Transforms raw Gamma API data into structured, categorized objects."""
 
     @staticmethod
     def parse_market(raw: dict, event_slug: str) -> Market:
-        slug = raw.get("slug", "")
         outcomes = raw.get("outcomes", [])
         if isinstance(outcomes, str):
             try:
-                import json
                 outcomes = json.loads(outcomes)
             except Exception:
                 outcomes = []
@@ -29,10 +87,10 @@ class DataProcessor:
         outcome_prices = raw.get("outcomePrices", [])
         if isinstance(outcome_prices, str):
             try:
-                import json
                 outcome_prices = json.loads(outcome_prices)
             except Exception:
                 outcome_prices = []
+        outcome_prices = _price_array(outcome_prices)
 
         volume = 0.0
         try:
@@ -52,13 +110,6 @@ class DataProcessor:
         except (ValueError, TypeError):
             pass
 
-        url = ""
-        if event_slug and slug:
-            url = f"{POLYMARKET_BASE_URL}/{event_slug}/{slug}"
-        elif event_slug:
-            url = f"{POLYMARKET_BASE_URL}/{event_slug}"
-
-        resolved_by = raw.get("resolvedBy") or ""
         uma_bond = None
         uma_reward = None
         try:
@@ -72,49 +123,88 @@ class DataProcessor:
         except (ValueError, TypeError):
             pass
 
+        return DataProcessor.build_market(
+            id=raw.get("id", ""),
+            question=raw.get("question", ""),
+            slug=raw.get("slug", ""),
+            outcomes=outcomes,
+            outcome_prices=outcome_prices,
+            volume=volume,
+            volume_24hr=volume_24hr,
+            liquidity=liquidity,
+            active=raw.get("active", False),
+            closed=raw.get("closed", False),
+            end_date=raw.get("endDate"),
+            description=raw.get("description", ""),
+            resolved_by=raw.get("resolvedBy") or "",
+            uma_bond=uma_bond,
+            uma_reward=uma_reward,
+            created_at=raw.get("createdAt"),
+            event_slug=event_slug,
+        )
+
+    @staticmethod
+    def build_market(*, id, question, slug, outcomes, outcome_prices: array,
+                     volume: float, volume_24hr: float, liquidity: float,
+                     active, closed, end_date, description, resolved_by: str,
+                     uma_bond: Optional[float], uma_reward: Optional[float],
+                     created_at, event_slug: str) -> Market:
+        """Market from decoded field values; shared by every decoding path.
+
+        Adds the market URL and oracle detection and interns the strings
+        that repeat across markets. ``outcomes`` that aren't a list (e.g.
+        a null in the API response) give a market without outcomes.
+        """
+        if not isinstance(outcomes, list):
+            outcomes = []
+        outcomes = [_intern(o) for o in outcomes]
+
+        url = ""
+        if event_slug and slug:
+            url = f"{POLYMARKET_BASE_URL}/{event_slug}/{slug}"
+        elif event_slug:
+            url = f"{POLYMARKET_BASE_URL}/{event_slug}"
+
+        resolved_by = _intern(resolved_by)
         oracle_type = "UMA" if uma_bond is not None else "Unknown"
-        oracle_link = (f"https://polygonscan.com/address/{resolved_by}"
-                       if resolved_by else "")
+        oracle_link = ""
+        if resolved_by:
+            oracle_link = sys.intern(
+                f"https://polygonscan.com/address/{resolved_by}")
 
         if oracle_type == "Unknown":
-            desc = raw.get("description", "")
-            cl_match = re.search(r'https?://data\.chain\.link/[^\s,)"]+', desc)
+            cl_match = _CHAINLINK_URL.search(description)
             if cl_match:
                 oracle_type = "Chainlink"
-                oracle_link = cl_match.group(0).rstrip(".")
+                oracle_link = sys.intern(cl_match.group(0).rstrip("."))
 
         return Market(
-            id=raw.get("id", ""),
-            question=raw.get("question", ""),
+            id=id,
+            question=question,
             slug=slug,
             outcomes=outcomes,
             outcome_prices=outcome_prices,
             volume=volume,
             volume_24hr=volume_24hr,
             liquidity=liquidity,
-            active=raw.get("active", False),
-            closed=raw.get("closed", False),
-            end_date=raw.get("endDate"),
+            active=active,
+            closed=closed,
+            end_date=end_date,
             polymarket_url=url,
-            description=raw.get("description", ""),
+            description=description,
             resolved_by=resolved_by or None,
             oracle_type=oracle_type,
             oracle_link=oracle_link,
             uma_bond=uma_bond,
             uma_reward=uma_reward,
-            created_at=raw.get("createdAt"),
+            created_at=created_at,
         )
 
     @staticmethod
     def parse_event(raw: dict) -> Event:
-        tags = [
-            Tag(
-                id=str(t.get("id", "")),
-                label=t.get("label", ""),
-                slug=t.get("slug", ""),
-            )
-            for t in raw.get("tags", [])
-        ]
+        tags = [_shared_tag(str(t.get("id", "")), t.get("label", ""),
+                            t.get("slug", ""))
+                for t in raw.get("tags", [])]
 
         slug = raw.get("slug", "")
         markets = [
@@ -122,39 +212,98 @@ class DataProcessor:
             for m in raw.get("markets", [])
         ]
 
-        category = DataProcessor.determine_category(tags)
+        return DataProcessor.build_event(
+            id=str(raw.get("id", "")),
+            title=raw.get("title", ""),
+            slug=slug,
+            active=raw.get("active", False),
+            closed=raw.get("closed", False),
+            tags=tags,
+            markets=markets,
+            start_date=raw.get("startDate"),
+            end_date=raw.get("endDate"),
+            description=raw.get("description", ""),
+            created_at=raw.get("createdAt"),
+        )
+
+    @staticmethod
+    def build_event(*, id: str, title, slug, active, closed, tags: List[Tag],
+                    markets: List[Market], start_date, end_date, description,
+                    created_at) -> Event:
+        """Event from decoded fields and parsed markets; computes the
+        category, totals and top-market fields."""
+        category = sys.intern(DataProcessor.determine_category(tags))
 
         volume = sum(m.volume for m in markets) if markets else 0.0
         volume_24hr = sum(m.volume_24hr for m in markets) if markets else 0.0
         liquidity = sum(m.liquidity for m in markets) if markets else 0.0
 
+        top_index = max(range(len(markets)), key=lambda i: markets[i].volume,
+                        default=-1)
+        top_market = markets[top_index] if top_index >= 0 else None
+        top_outcome, top_price = DataProcessor.leading_outcome(top_market)
+
         return Event(
-            id=str(raw.get("id", "")),
-            title=raw.get("title", ""),
+            id=id,
+            title=title,
             slug=slug,
             volume=volume,
             volume_24hr=volume_24hr,
             liquidity=liquidity,
-            active=raw.get("active", False),
-            closed=raw.get("closed", False),
+            active=active,
+            closed=closed,
             tags=tags,
             markets=markets,
             polymarket_url=f"{POLYMARKET_BASE_URL}/{slug}" if slug else "",
             category=category,
-            start_date=raw.get("startDate"),
-            end_date=raw.get("endDate"),
-            description=raw.get("description", ""),
-            created_at=raw.get("createdAt"),
+            start_date=start_date,
+            end_date=end_date,
+            description=description,
+            created_at=created_at,
+            top_market_index=top_index,
+            top_outcome=top_outcome,
+            top_price=top_price,
+            oracle_type=top_market.oracle_type if top_market else "",
+            short_url=slug,
         )
 
+    @staticmethod
+    def leading_outcome(market: Optional[Market]) -> Tuple[str, Optional[float]]:
+        """(outcome, price) of the market's highest-priced outcome; NaN
+        (unparseable) prices are skipped."""
+        if market is None or not market.outcome_prices:
+            return "", None
+        prices = market.outcome_prices
+        if any(map(math.isnan, prices)):
+            valid = [p for p in prices if not math.isnan(p)]
+            if not valid:
+                return "", None
+            top_price = max(valid)
+        else:
+            top_price = max(prices)
+        best_idx = prices.index(top_price)
+        outcome = (market.outcomes[best_idx]
+                   if best_idx < len(market.outcomes) else "")
+        return outcome, top_price
+
     @staticmethod
     def determine_category(tags: List[Tag]) -> str:
-        labels = [t.label for t in tags if t.label and t.label != "All"]
-        for priority in PRIORITY_TAGS:
-            for label in labels:
-                if label.lower() == priority.lower():
-                    return priority
-        return labels[0] if labels else "Uncategorized"
+        """Highest-priority PRIORITY_TAGS label among the tags, else the
+        first label; one rank lookup per tag."""
+        best = len(PRIORITY_TAGS)
+        first = None
+        for tag in tags:
+            label = tag.label
+            if not label or label == "All":
+                continue
+            if first is None:
+                first = label
+            rank = _PRIORITY_RANK.get(label.lower(), best)
+            if rank < best:
+                best = rank
+        if best < len(PRIORITY_TAGS):
+            return PRIORITY_TAGS[best]
+        return first or "Uncategorized"
 
     @staticmethod
     def categorize_events(events: List[Event]) -> Dict[str, List[Event]]:
@@ -163,46 +312,257 @@ class DataProcessor:
             categories.setdefault(event.category, []).append(event)
         return dict(sorted(categories.items()))
 
+    @staticmethod
+    def fingerprint(raw: dict) -> int:
+        """Cheap change detector for a raw event payload.
+
+        Combines the event's ``updatedAt`` and active/closed flags with the
+        price/volume fields of every market, which are the values that move
+        between cycles.
+        """
+        market_fields = []
+        for m in raw.get("markets", []):
+            prices = m.get("outcomePrices")
+            if isinstance(prices, list):
+                prices = tuple(prices)
+            market_fields.append((
+                m.get("id"),
+                m.get("updatedAt"),
+                prices,
+                m.get("volumeNum") or m.get("volume"),
+                m.get("volume24hr"),
+                m.get("liquidity"),
+            ))
+        return hash((raw.get("updatedAt"), raw.get("active"),
+                     raw.get("closed"), tuple(market_fields)))
+
     @staticmethod
     def build_snapshot(raw_events: List[dict],
                        fetch_duration: float) -> ScraperSnapshot:
-        all_events = [DataProcessor.parse_event(raw) for raw in raw_events]
-        seen_ids: set = set()
-        events: List[Event] = []
-        for e in all_events:
-            if e.id not in seen_ids:
-                seen_ids.add(e.id)
-                events.append(e)
-        total_markets = sum(len(e.markets) for e in events)
-        total_volume = sum(e.volume for e in events)
-        categories = DataProcessor.categorize_events(events)
+        builder = SnapshotBuilder()
+        builder.add_page(raw_events)
+        return builder.finalize(fetch_duration)
+
+
+def _parse(raw) -> Event:
+    if isinstance(raw, dict):
+        return DataProcessor.parse_event(raw)
+    return raw.parse()
+
+
+class EventCache:
+    """Parsed events from the previous cycle, keyed by event id.
+
+    Kept alive across cycles so unchanged events are reused instead of
+    being parsed again.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[int, Event]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class SnapshotBuilder:
+    """Incrementally parses pages of raw events into a ScraperSnapshot.
+
+    Pages can be fed as they arrive from the API; each raw dict is parsed
+    once and can be dropped by the caller afterwards. Deduplication happens
+    on the fly; totals and category buckets are computed on finalize.
+
+    When an EventCache is given, events whose fingerprint matches the
+    previous cycle reuse the cached Event, and the finalized snapshot
+    carries a SnapshotDelta of added/changed/removed event ids.
+
+    :meth:`merge` instead finalizes a tier refresh: the parsed events
+    replace their counterparts in the previous snapshot.
+
+    With a ``parse_pool.ParsePool``, events that need parsing are shipped
+    to it in batches of ``pool.min_events``; a smaller remainder is parsed
+    in-process by :meth:`flush` while the batches are in flight.
+    """
+
+    def __init__(self, cache: Optional[EventCache] = None, pool=None):
+        self._cache = cache
+        self._pool = pool
+        self._entries: Dict[str, Tuple[int, Event]] = {}
+        self._added: List[str] = []
+        self._changed: List[str] = []
+        self._seen_ids: set = set()
+        # None marks a slot whose event the pool is still parsing
+        self._events: List[Optional[Event]] = []
+        # (slot, event id, fingerprint, raw) not yet handed to the pool
+        self._pending: List[tuple] = []
+        self._batches: List[tuple] = []
+        self._refreshed_at: Dict[str, float] = {}
+
+    def add_page(self, raw_events: list) -> None:
+        """Parse one page of raw event dicts or ``typed_decode.RawEvent``s."""
+        received_at = time.time()
+        with PAGE_PARSE_SECONDS.time():
+            for raw in raw_events:
+                if isinstance(raw, dict):
+                    event_id = str(raw.get("id", ""))
+                else:
+                    event_id = raw.event_id
+                if event_id in self._seen_ids:
+                    continue
+                self._seen_ids.add(event_id)
+                self._refreshed_at[event_id] = received_at
+
+                fingerprint = None
+                if self._cache is not None:
+                    if isinstance(raw, dict):
+                        fingerprint = DataProcessor.fingerprint(raw)
+                    else:
+                        fingerprint = raw.fingerprint()
+                    cached = self._cache.entries.get(event_id)
+                    if cached is not None and cached[0] == fingerprint:
+                        self._entries[event_id] = cached
+                        self._events.append(cached[1])
+                        continue
+                    if cached is None:
+                        self._added.append(event_id)
+                    else:
+                        self._changed.append(event_id)
+
+                if self._pool is None:
+                    self._events.append(None)
+                    self._place(len(self._events) - 1, event_id,
+                                fingerprint, _parse(raw))
+                    continue
+                self._pending.append(
+                    (len(self._events), event_id, fingerprint, raw))
+                self._events.append(None)
+                if len(self._pending) >= self._pool.min_events:
+                    self._submit()
+
+    def _place(self, slot: int, event_id: str, fingerprint, event: Event):
+        self._events[slot] = event
+        if self._cache is not None:
+            self._entries[event_id] = (fingerprint, event)
+
+    def _submit(self) -> None:
+        batch, self._pending = self._pending, []
+        self._batches.append(
+            (self._pool.submit([raw for *_, raw in batch]), batch))
+
+    def flush(self) -> None:
+        """Parse what is left and wait for the pool's batches; called by
+        :meth:`finalize`, or beforehand to include the wait in a timing."""
+        batch, self._pending = self._pending, []
+        for slot, event_id, fingerprint, raw in batch:
+            self._place(slot, event_id, fingerprint, _parse(raw))
+        batches, self._batches = self._batches, []
+        for future, batch in batches:
+            events = self._pool.result(future, [raw for *_, raw in batch])
+            for (slot, event_id, fingerprint, _), event in zip(batch, events):
+                self._place(slot, event_id, fingerprint, event)
+
+    def finalize(self, fetch_duration: float) -> ScraperSnapshot:
+        """Finalize a complete crawl: cached events not seen in it are
+        reported removed and the EventCache is replaced. A crawl that
+        stopped early must not be finalized."""
+        self.flush()
+        delta = None
+        if self._cache is not None:
+            removed = [eid for eid in self._cache.entries
+                       if eid not in self._entries]
+            delta = SnapshotDelta(added=self._added, changed=self._changed,
+                                  removed=removed)
+            self._cache.entries = self._entries
+        SNAPSHOT_SECONDS.observe(fetch_duration)
+        return self._snapshot(self._events, delta, self._refreshed_at,
+                              fetch_duration)
+
+    def merge(self, previous: ScraperSnapshot, requested: List[str],
+              fetch_duration: float) -> ScraperSnapshot:
+        """Finalize a refresh of the ``requested`` event ids on top of
+        ``previous``.
+
+        Refreshed events replace their counterparts in place; requested
+        events missing from the response or no longer active and open are
+        removed. The delta covers only the requested events, and the
+        EventCache (if any) is updated rather than replaced.
+        """
+        self.flush()
+        fresh = {e.id: e for e in self._events
+                 if e.active and not e.closed}
+        removed = [eid for eid in requested if eid not in fresh]
+        gone = set(removed)
+        events = []
+        for event in previous.events:
+            if event.id in gone:
+                continue
+            events.append(fresh.pop(event.id, event))
+        events.extend(e for e in self._events if e.id in fresh)
+
+        refreshed_at = dict(previous.refreshed_at)
+        refreshed_at.update(self._refreshed_at)
+        for eid in removed:
+            refreshed_at.pop(eid, None)
+        delta = SnapshotDelta(
+            added=[eid for eid in self._added if eid not in gone],
+            changed=[eid for eid in self._changed if eid not in gone],
+            removed=removed)
+        if self._cache is not None:
+            self._cache.entries.update(self._entries)
+            for eid in removed:
+                self._cache.entries.pop(eid, None)
+        snapshot = self._snapshot(events, delta, refreshed_at,
+                                  fetch_duration)
+        snapshot.partial = True
+        return snapshot
+
+    @staticmethod
+    def _snapshot(events: List[Event], delta: Optional[SnapshotDelta],
+                  refreshed_at: Dict[str, float],
+                  fetch_duration: float) -> ScraperSnapshot:
+        categories: Dict[str, List[Event]] = {}
+        total_markets = 0
+        total_volume = 0.0
+        for event in events:
+            categories.setdefault(event.category, []).append(event)
+            total_markets += len(event.markets)
+            total_volume += event.volume
 
+        SNAPSHOT_SIZE.set(len(events), kind="events")
+        SNAPSHOT_SIZE.set(total_markets, kind="markets")
         return ScraperSnapshot(
             timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"),
             events=events,
             total_events=len(events),
             total_markets=total_markets,
             total_volume=total_volume,
-            categories=categories,
+            categories=dict(sorted(categories.items())),
             fetch_duration_seconds=fetch_duration,
+            delta=delta,
+            captured_at=time.time(),
+            refreshed_at=refreshed_at,
         )
 
 
 if __name__ == "__main__":
     import logging
     from api_client import GammaAPIClient
-    from config import (GAMMA_BASE_URL, API_PAGE_LIMIT,
-                        MAX_PAGES, REQUEST_DELAY_SECONDS)
+    from columnar import snapshot_columns
+    from config import (GAMMA_BASE_URL, API_PAGE_LIMIT, MAX_PAGES,
+                        REQUEST_DELAY_SECONDS, FETCH_WORKERS,
+                        MAX_REQUESTS_PER_SECOND)
 
     logging.basicConfig(level=logging.INFO)
     client = GammaAPIClient(GAMMA_BASE_URL, API_PAGE_LIMIT,
-                            MAX_PAGES, REQUEST_DELAY_SECONDS)
-    raw = client.fetch_all_active_events()
-    snapshot = DataProcessor.build_snapshot(raw, 0.0)
+                            MAX_PAGES, REQUEST_DELAY_SECONDS,
+                            FETCH_WORKERS, MAX_REQUESTS_PER_SECOND)
+    builder = SnapshotBuilder()
+    for page in client.iter_active_event_pages():
+        builder.add_page(page)
+    snapshot = builder.finalize(0.0)
     print(f"Events: {snapshot.total_events}")
     print(f"Markets: {snapshot.total_markets}")
     print(f"Total Volume: ${snapshot.total_volume:,.2f}")
     print("\nCategories:")
-    for cat, evts in snapshot.categories.items():
-        cat_vol = sum(e.volume for e in evts)
-        print(f"  {cat}: {len(evts)} events (${cat_vol:,.0f})")
+    for cat, n_events, _, cat_vol, _, _ in \
+            snapshot_columns(snapshot).category_totals():
+        print(f"  {cat}: {n_events} events (${cat_vol:,.0f})")
@@ -1,3 +1,17 @@
+import os
+import queue
+import select
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import termios
+    import tty
+except ImportError:  # non-POSIX terminal: no keyboard navigation
+    termios = tty = None
+
 from rich.console import Console, Group
 from rich.table import Table
 from rich.panel import Panel
@@ -5,6 +19,10 @@ from rich.text import Text
 from rich import box
 
 from models import ScraperSnapshot
+from columnar import snapshot_columns
+from snapshot_index import snapshot_index
+from config import DASHBOARD_PAGE_SIZE
+from metrics import RENDER_SECONDS
 
 CATEGORY_COLORS = {
     "Politics": "red",
@@ -22,6 +40,18 @@ CATEGORY_COLORS = {
 }
 
 
+SORT_LABELS = {
+    "volume_24hr": "24h Vol",
+    "volume": "Volume",
+    "liquidity": "Liquidity",
+    "market_count": "Markets",
+    "end_date": "Ends soonest",
+}
+
+# Rendered events tables kept for the current snapshot (filter/sort/offset)
+_TABLE_CACHE_SIZE = 16
+
+
 def format_volume(vol: float) -> str:
     if vol >= 1_000_000:
         return f"${vol / 1_000_000:.1f}M"
@@ -34,8 +64,65 @@ def format_volume(vol: float) -> str:
 class Dashboard:
     """Rich terminal dashboard for displaying Polymarket data."""
 
-    def __init__(self):
+    def __init__(self, page_size: int = DASHBOARD_PAGE_SIZE,
+                 sort_key: str = "volume_24hr"):
         self.console = Console()
+        self.page_size = page_size
+        self.sort_key = sort_key
+        self.offset = 0
+        # Everything below is derived from the current snapshot and
+        # dropped when a new one arrives; the header also shows the data
+        # age, so only it is rebuilt on every refresh tick.
+        self._snapshot = None
+        self._category_table = None
+        self._changed_ids = frozenset()
+        self._tables: "OrderedDict[tuple, Table]" = OrderedDict()
+
+    def _use_snapshot(self, snapshot: ScraperSnapshot) -> None:
+        if snapshot is self._snapshot:
+            return
+        first = self._snapshot is None
+        self._snapshot = snapshot
+        self._category_table = None
+        self._tables.clear()
+        # Nothing to compare against on the first snapshot shown
+        delta = snapshot.delta
+        self._changed_ids = (frozenset(delta.added + delta.changed)
+                             if delta and not first else frozenset())
+
+    # ── Viewport navigation ──
+
+    def scroll(self, rows: int) -> None:
+        self.offset = max(0, self.offset + rows)
+
+    def page_down(self) -> None:
+        self.scroll(self.page_size)
+
+    def page_up(self) -> None:
+        self.scroll(-self.page_size)
+
+    def home(self) -> None:
+        self.offset = 0
+
+    def cycle_sort(self) -> None:
+        # In the order the UI lists them, starting from the default
+        keys = list(SORT_LABELS)
+        idx = keys.index(self.sort_key)
+        self.sort_key = keys[(idx + 1) % len(keys)]
+        self.offset = 0
+
+    def handle_key(self, key: str) -> None:
+        actions = {
+            "up": lambda: self.scroll(-1),
+            "down": lambda: self.scroll(1),
+            "page_up": self.page_up,
+            "page_down": self.page_down,
+            "home": self.home,
+            "sort": self.cycle_sort,
+        }
+        action = actions.get(key)
+        if action:
+            action()
 
     def build_header(self, snapshot: ScraperSnapshot) -> Panel:
         header = Text()
@@ -51,6 +138,13 @@ class Dashboard:
         header.append(f"Fetch: {snapshot.fetch_duration_seconds:.1f}s",
                        style="dim")
         header.append("  |  ", style="dim")
+        lag = snapshot.cycle_lag_seconds
+        header.append(f"Lag: {lag:.1f}s",
+                      style="bold red" if lag >= 1 else "dim")
+        header.append("  |  ", style="dim")
+        age = max(0.0, time.time() - snapshot.captured_at)
+        header.append(f"Age: {age:.0f}s", style="dim")
+        header.append("  |  ", style="dim")
         header.append(f"Updated: {snapshot.timestamp}", style="dim")
         return Panel(header, border_style="bright_blue")
 
@@ -67,13 +161,12 @@ class Dashboard:
         table.add_column("Total Volume", justify="right", width=14)
         table.add_column("24h Volume", justify="right", width=14)
 
-        for cat_name, cat_events in snapshot.categories.items():
-            cat_vol = sum(e.volume for e in cat_events)
-            cat_24h = sum(e.volume_24hr for e in cat_events)
+        totals = snapshot_columns(snapshot).category_totals()
+        for cat_name, cat_events, _, cat_vol, cat_24h, _ in totals:
             color = CATEGORY_COLORS.get(cat_name, "white")
             table.add_row(
                 Text(cat_name, style=color),
-                str(len(cat_events)),
+                str(cat_events),
                 format_volume(cat_vol),
                 format_volume(cat_24h),
             )
@@ -82,9 +175,26 @@ class Dashboard:
 
     def build_events_table(self, snapshot: ScraperSnapshot,
                            category_filter: str = None) -> Table:
+        """Render only the current viewport of the sorted, filtered events.
+
+        Rows for events added or changed since the previous snapshot are
+        highlighted.
+        """
+        self._use_snapshot(snapshot)
+        index = snapshot_index(snapshot)
+        order = index.ordered(self.sort_key, category=category_filter or None)
+        self.offset = min(self.offset, max(0, len(order) - self.page_size))
+        start = self.offset
+        visible = [index.events[i]
+                   for i in order[start:start + self.page_size]]
+
         title = "Active Polymarket Events"
         if category_filter:
             title += f" [{category_filter}]"
+        if len(order):
+            title += (f"  ·  {start + 1}-{start + len(visible)} "
+                      f"of {len(order)}")
+        title += f"  ·  sort: {SORT_LABELS[self.sort_key]}"
 
         table = Table(
             title=title,
@@ -92,6 +202,9 @@ class Dashboard:
             show_lines=True,
             expand=True,
             title_style="bold cyan",
+            caption="↑/↓ scroll  ·  PgUp/PgDn page  ·  Home top  ·  "
+                    "s sort  ·  q quit",
+            caption_style="dim",
         )
         table.add_column("#", style="dim", width=4, justify="right")
         table.add_column("Title", style="white", max_width=38, no_wrap=True)
@@ -105,30 +218,13 @@ class Dashboard:
         table.add_column("Oracle", style="bright_cyan", width=6)
         table.add_column("Link", style="blue", max_width=35, no_wrap=True)
 
-        events = snapshot.events
-        if category_filter:
-            events = [e for e in events if e.category == category_filter]
-
-        events = sorted(events, key=lambda e: e.volume_24hr, reverse=True)
-
-        for idx, event in enumerate(events, 1):
-            top_market = max(event.markets, key=lambda m: m.volume,
-                             default=None)
-            top_outcome = ""
+        for idx, event in enumerate(visible, start + 1):
             top_price = ""
-            if top_market and top_market.outcome_prices:
-                try:
-                    prices = [float(p) for p in top_market.outcome_prices]
-                    best_idx = prices.index(max(prices))
-                    if best_idx < len(top_market.outcomes):
-                        top_outcome = top_market.outcomes[best_idx]
-                    top_price = f"{max(prices):.1%}"
-                except (ValueError, TypeError):
-                    pass
+            if event.top_price is not None:
+                top_price = f"{event.top_price:.1%}"
 
             color = CATEGORY_COLORS.get(event.category, "white")
-            short_url = event.polymarket_url.replace(
-                "https://polymarket.com/event/", "")
+            short_url = event.short_url
             if len(short_url) > 33:
                 short_url = short_url[:30] + "..."
 
@@ -139,10 +235,6 @@ class Dashboard:
                 except (IndexError, TypeError):
                     pass
 
-            top_market = max(event.markets, key=lambda m: m.volume,
-                             default=None)
-            oracle = top_market.oracle_type if top_market else ""
-
             table.add_row(
                 str(idx),
                 event.title[:38],
@@ -150,11 +242,12 @@ class Dashboard:
                 str(len(event.markets)),
                 format_volume(event.volume),
                 format_volume(event.volume_24hr),
-                top_outcome,
+                event.top_outcome,
                 top_price,
                 created,
-                oracle,
+                event.oracle_type,
                 short_url,
+                style="on grey23" if event.id in self._changed_ids else None,
             )
 
         return table
@@ -169,8 +262,70 @@ class Dashboard:
                 )
             )
 
-        return Group(
-            self.build_header(snapshot),
-            self.build_category_summary_table(snapshot),
-            self.build_events_table(snapshot, category_filter),
-        )
+        with RENDER_SECONDS.time():
+            self._use_snapshot(snapshot)
+            if self._category_table is None:
+                self._category_table = self.build_category_summary_table(
+                    snapshot)
+
+            key = (category_filter, self.sort_key, self.offset,
+                   self.page_size)
+            events_table = self._tables.get(key)
+            if events_table is None:
+                events_table = self.build_events_table(snapshot,
+                                                       category_filter)
+                # offset may have been clamped while building
+                key = (category_filter, self.sort_key, self.offset,
+                       self.page_size)
+                self._tables[key] = events_table
+                if len(self._tables) > _TABLE_CACHE_SIZE:
+                    self._tables.popitem(last=False)
+            else:
+                self._tables.move_to_end(key)
+            return Group(self.build_header(snapshot), self._category_table,
+                         events_table)
+
+
+class KeyReader(threading.Thread):
+    """Feeds dashboard navigation keys from a POSIX terminal into a queue.
+
+    The terminal is put in cbreak mode while running and restored on stop.
+    """
+
+    KEYS = {
+        "\x1b[A": "up", "k": "up",
+        "\x1b[B": "down", "j": "down",
+        "\x1b[5~": "page_up", "p": "page_up",
+        "\x1b[6~": "page_down", "n": "page_down", " ": "page_down",
+        "\x1b[H": "home", "\x1b[1~": "home", "g": "home",
+        "s": "sort",
+        "q": "quit",
+    }
+
+    def __init__(self, keys: "queue.Queue[str]"):
+        super().__init__(name="keys", daemon=True)
+        self.keys = keys
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def available() -> bool:
+        return termios is not None and sys.stdin.isatty()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def run(self) -> None:
+        fd = sys.stdin.fileno()
+        saved = termios.tcgetattr(fd)
+        try:
+            tty.setcbreak(fd)
+            while not self._stop_event.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.2)
+                if not ready:
+                    continue
+                data = os.read(fd, 16).decode("utf-8", errors="ignore")
+                key = self.KEYS.get(data) or self.KEYS.get(data[:1])
+                if key:
+                    self.keys.put(key)
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, saved)
@@ -0,0 +1,290 @@
+"""Storage for exports/: compression, hourly archives, retention, manifest.
+
+Exporter asks the store for file names and writes CSV/JSON through
+:meth:`ExportStore.open`, which compresses on the fly (gzip, or zstd with
+the zstandard package) into a temp file that is renamed into place. After
+each export :meth:`ExportStore.commit`:
+
+* rolls the loose files of every finished hour into one archive under
+  ``archive/`` (``polymarket_<YYYYmmdd_HH>.tar``),
+* deletes archives and files older than ``retention_hours``, then the
+  oldest ones until the directory is under ``max_bytes``,
+* rewrites ``manifest.json``: the latest files of each format plus every
+  loose file and archive with its size, so consumers never need to list
+  the directory.
+
+Only ``polymarket_*`` files are managed; anything else in the directory
+(e.g. a history database) is left alone. The files of the latest export
+of each format are never archived or deleted.
+"""
+import gzip
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional zstd compression of exports
+    zstandard = None
+
+from config import (EXPORT_DIR, EXPORT_COMPRESSION, EXPORT_ARCHIVE_HOURLY,
+                    EXPORT_RETENTION_HOURS, EXPORT_MAX_BYTES)
+from metrics import EXPORT_STORE_BYTES
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+MANIFEST = "manifest.json"
+ARCHIVE_DIR = "archive"
+_PREFIX = "polymarket_"
+_HOUR = "%Y%m%d_%H"
+
+
+@contextmanager
+def atomic_write(filepath: str, mode: str = "w", **kwargs):
+    """Open a temp file next to ``filepath`` and rename it into place on
+    success, so readers never observe a partially written export."""
+    tmp_path = f"{filepath}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _hour_start(key: str) -> float:
+    return datetime.strptime(key, _HOUR).timestamp()
+
+
+class ExportStore:
+    """Names, writes and cleans up the files of one export directory.
+
+    ``retention_hours`` / ``max_bytes`` of 0 disable that limit.
+    """
+
+    def __init__(self, directory: str = EXPORT_DIR,
+                 compression: str = EXPORT_COMPRESSION,
+                 archive_hourly: bool = EXPORT_ARCHIVE_HOURLY,
+                 retention_hours: float = EXPORT_RETENTION_HOURS,
+                 max_bytes: int = EXPORT_MAX_BYTES):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown export compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("EXPORT_COMPRESSION='zstd' requires the "
+                              "zstandard package")
+        self.directory = directory
+        self.compression = compression
+        self.archive_hourly = archive_hourly
+        self.retention_hours = retention_hours
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, ARCHIVE_DIR), exist_ok=True)
+        self._latest: Dict[str, dict] = self._load_latest()
+
+    @property
+    def suffix(self) -> str:
+        """File name suffix of compressed CSV/JSON exports."""
+        return COMPRESSION_SUFFIXES[self.compression]
+
+    def path(self, template: str, compress: bool = False) -> str:
+        """Path for a new export: ``template`` with the current local time
+        (``YYYYmmdd_HHMMSS``) filled in, plus :attr:`suffix` if
+        ``compress``."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = template.format(timestamp) + (self.suffix if compress else "")
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def open(self, path: str, text: bool = False):
+        """Atomically write ``path``, compressed according to its suffix
+        (``.gz`` / ``.zst``). Yields a binary stream, or a UTF-8 text
+        stream with ``newline=""`` (as csv expects) if ``text``."""
+        with atomic_write(path, "wb") as raw:
+            if path.endswith(".gz"):
+                stream = gzip.open(raw, "wb", compresslevel=6)
+            elif path.endswith(".zst"):
+                if zstandard is None:
+                    raise ImportError("zstd exports require the zstandard "
+                                      "package")
+                stream = zstandard.ZstdCompressor(level=3).stream_writer(
+                    raw, closefd=False)
+            else:
+                stream = raw
+            try:
+                if text:
+                    wrapper = io.TextIOWrapper(stream, encoding="utf-8",
+                                               newline="")
+                    try:
+                        yield wrapper
+                    finally:
+                        # Flush into the stream but leave closing it to us
+                        wrapper.detach()
+                else:
+                    yield stream
+            finally:
+                if stream is not raw:
+                    stream.close()
+
+    # ── Housekeeping ──
+
+    def commit(self, written: List[Tuple[str, str]],
+               scraped_at: str = "") -> None:
+        """Record one export's ``(format, path)`` pairs as the latest of
+        their formats, then archive, apply retention and rewrite the
+        manifest."""
+        now = time.time()
+        by_format: Dict[str, List[str]] = {}
+        for fmt, path in written:
+            by_format.setdefault(fmt, []).append(os.path.basename(path))
+        for fmt, names in by_format.items():
+            self._latest[fmt] = {"files": names, "scraped_at": scraped_at,
+                                 "written_at": now}
+
+        files, archives = self._scan()
+        if self.archive_hourly:
+            files, archives = self._archive(files, archives, now)
+        files, archives = self._retain(files, archives, now)
+        total = (sum(size for _, size, _ in files)
+                 + sum(size for _, size, _ in archives))
+        EXPORT_STORE_BYTES.set(total)
+        self._write_manifest(files, archives, total, now)
+
+    def _protected(self) -> set:
+        return {name for entry in self._latest.values()
+                for name in entry["files"]}
+
+    def _scan(self):
+        """(name, bytes, mtime) of loose export files and of archives
+        (relative paths), oldest first."""
+        files, archives = [], []
+        for listing, directory in ((files, ""), (archives, ARCHIVE_DIR)):
+            with os.scandir(os.path.join(self.directory, directory)) as it:
+                for entry in it:
+                    if (not entry.name.startswith(_PREFIX)
+                            or ".tmp" in entry.name or not entry.is_file()):
+                        continue
+                    st = entry.stat()
+                    listing.append((os.path.join(directory, entry.name),
+                                    st.st_size, st.st_mtime))
+        files.sort(key=lambda f: f[2])
+        archives.sort()
+        return files, archives
+
+    def _archive(self, files, archives, now: float):
+        """Roll loose files of finished hours into one archive per hour."""
+        current = time.strftime(_HOUR, time.localtime(now))
+        protected = self._protected()
+        hours: Dict[str, List[str]] = {}
+        for name, _, mtime in files:
+            hour = time.strftime(_HOUR, time.localtime(mtime))
+            if hour < current and name not in protected:
+                hours.setdefault(hour, []).append(name)
+        if not hours:
+            return files, archives
+
+        # Plain CSV/JSON compress well; compressed members and Excel/
+        # Parquet (already compressed inside) are only bundled
+        mode, ext = (("w:gz", ".tar.gz") if self.compression == "none"
+                     else ("w", ".tar"))
+        for hour, names in sorted(hours.items()):
+            base = os.path.join(self.directory, ARCHIVE_DIR,
+                                f"{_PREFIX}{hour}")
+            path, n = base + ext, 1
+            while os.path.exists(path):
+                # Files of an hour that was archived before a restart
+                path, n = f"{base}_{n}{ext}", n + 1
+            try:
+                with atomic_write(path, "wb") as f, \
+                        tarfile.open(fileobj=f, mode=mode) as tar:
+                    for name in names:
+                        tar.add(os.path.join(self.directory, name),
+                                arcname=name)
+            except OSError as e:
+                logger.warning("Could not archive %s exports: %s", hour, e)
+                continue
+            for name in names:
+                self._unlink(name)
+            logger.info("Archived %d %s exports to %s", len(names), hour,
+                        path)
+        return self._scan()
+
+    def _retain(self, files, archives, now: float):
+        """Drop what is older than retention_hours, then the oldest
+        archives and files while over max_bytes."""
+        protected = self._protected()
+        if self.retention_hours > 0:
+            cutoff = now - self.retention_hours * 3600
+            for name, _, mtime in files:
+                if mtime < cutoff and name not in protected:
+                    self._unlink(name)
+            for name, _, _ in archives:
+                hour = os.path.basename(name)[len(_PREFIX):][:11]
+                try:
+                    ended = _hour_start(hour) + 3600
+                except ValueError:
+                    continue
+                if ended < cutoff:
+                    self._unlink(name)
+            files, archives = self._scan()
+
+        if self.max_bytes > 0:
+            total = (sum(size for _, size, _ in files)
+                     + sum(size for _, size, _ in archives))
+            # Archives hold older data than any loose file
+            candidates = archives + [f for f in files
+                                     if f[0] not in protected]
+            dropped = 0
+            for name, size, _ in candidates:
+                if total <= self.max_bytes:
+                    break
+                self._unlink(name)
+                total -= size
+                dropped += 1
+            if dropped:
+                logger.warning("Export directory over %d bytes: deleted "
+                               "%d oldest files", self.max_bytes, dropped)
+                files, archives = self._scan()
+        return files, archives
+
+    def _unlink(self, name: str) -> None:
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    # ── Manifest ──
+
+    def _load_latest(self) -> Dict[str, dict]:
+        """Latest-export entries of a previous run whose files still
+        exist."""
+        try:
+            with open(os.path.join(self.directory, MANIFEST), "rb") as f:
+                latest = json.load(f).get("latest", {})
+        except (OSError, ValueError):
+            return {}
+        return {fmt: entry for fmt, entry in latest.items()
+                if all(os.path.exists(os.path.join(self.directory, name))
+                       for name in entry.get("files", ()))}
+
+    def _write_manifest(self, files, archives, total: int,
+                        now: float) -> None:
+        manifest = {
+            "updated_at": now,
+            "total_bytes": total,
+            "latest": self._latest,
+            "files": [{"name": name, "bytes": size, "modified": mtime}
+                      for name, size, mtime in files],
+            "archives": [{"name": name, "bytes": size}
+                         for name, size, _ in archives],
+        }
+        path = os.path.join(self.directory, MANIFEST)
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
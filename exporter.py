@@ -1,29 +1,205 @@
 import csv
+import itertools
 import json
 import os
+from array import array
 from dataclasses import asdict
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional faster JSON encoder
+    orjson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional columnar (Parquet) export
+    pa = pq = None
 
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import (Font, PatternFill, Alignment, Border, Side,
+                             NamedStyle)
+from openpyxl.styles.fonts import DEFAULT_FONT
 from openpyxl.utils import get_column_letter
 
 from models import ScraperSnapshot
-from config import EXPORT_DIR
+from columnar import snapshot_columns
+from snapshot_index import snapshot_index
+from metrics import EXPORT_SECONDS
+from export_store import ExportStore, atomic_write
+from config import (JSON_COMPACT, JSON_ENCODER, EXCEL_WRITE_ONLY, CSV_GZIP,
+                    CSV_ROWS_PER_FILE)
+
+EXPORT_FORMATS = ("csv", "json", "excel", "markets", "parquet")
+
+MARKET_CSV_COLUMNS = [
+    "event_id", "event_title", "category", "market_id", "question",
+    "outcomes", "outcome_prices", "volume", "volume_24hr", "liquidity",
+    "active", "closed", "end_date", "oracle_type", "oracle_link",
+    "resolved_by", "uma_bond", "uma_reward", "created_at",
+    "polymarket_url", "scraped_at",
+]
+
+EXCEL_EVENT_HEADERS = [
+    "Event Name",
+    "Event Link",
+    "Volume (USD)",
+    "End Date",
+    "Created At",
+    "Rules",
+    "Background",
+    "Oracle Link",
+    "Oracle Type",
+]
+EXCEL_EVENT_WIDTHS = {
+    1: 45, 2: 55, 3: 20,
+    4: 22, 5: 22,
+    6: 60, 7: 60,
+    8: 55, 9: 12,
+}
+EXCEL_CATEGORY_HEADERS = ["Category", "Events", "Markets",
+                          "Total Volume (USD)", "24h Volume (USD)",
+                          "Liquidity (USD)"]
+EXCEL_CATEGORY_WIDTHS = {1: 20, 2: 10, 3: 10, 4: 20, 5: 20, 6: 20}
+EXCEL_ORACLE_HEADERS = ["Oracle Type", "Events", "Markets",
+                        "Total Volume (USD)", "24h Volume (USD)"]
+EXCEL_ORACLE_WIDTHS = {1: 16, 2: 10, 3: 10, 4: 22, 5: 22}
+MONEY_FORMAT = '#,##0.00'
+
+
+def _json_default(obj):
+    if isinstance(obj, array):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} "
+                    "is not JSON serializable")
+
+
+def _utc(epoch) -> str:
+    """``YYYY-MM-DD HH:MM:SS UTC`` for epoch seconds, or "" if unknown."""
+    if not epoch:
+        return ""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(
+        "%Y-%m-%d %H:%M:%S UTC")
+
+
+def _json_encoder(backend: str):
+    """Return ``dumps(obj, indent) -> bytes`` for the requested backend."""
+    if backend not in ("auto", "orjson", "json"):
+        raise ValueError(f"Unknown JSON encoder: {backend}")
+    if backend == "orjson" and orjson is None:
+        raise ImportError("JSON_ENCODER='orjson' requires the orjson package")
+    if backend != "json" and orjson is not None:
+        def dumps(obj, indent: bool) -> bytes:
+            option = orjson.OPT_INDENT_2 if indent else 0
+            return orjson.dumps(obj, default=_json_default, option=option)
+        return dumps
+
+    def dumps(obj, indent: bool) -> bytes:
+        return json.dumps(
+            obj, ensure_ascii=False, default=_json_default,
+            indent=2 if indent else None,
+            separators=None if indent else (",", ":"),
+        ).encode("utf-8")
+    return dumps
+
+
+def _excel_named_styles():
+    """Named styles for the write-only engine: header, totals, and a plain
+    and striped variant of each data cell kind (text, url, money, wrap)."""
+    header = NamedStyle(
+        name="pm_header",
+        font=Font(bold=True, color="FFFFFF", size=11),
+        fill=PatternFill(start_color="2F5496", end_color="2F5496",
+                         fill_type="solid"),
+        alignment=Alignment(horizontal="center", vertical="center",
+                            wrap_text=True),
+    )
+    total_font = Font(bold=True, size=11)
+    styles = [
+        header,
+        NamedStyle(name="pm_total", font=total_font),
+        NamedStyle(name="pm_total_money", font=total_font,
+                   number_format=MONEY_FORMAT),
+    ]
+    thin_border = Border(bottom=Side(style="thin", color="D9E2F3"))
+    stripe_fill = PatternFill(start_color="F2F6FC", end_color="F2F6FC",
+                              fill_type="solid")
+    kinds = {
+        "text": {"font": DEFAULT_FONT},
+        "url": {"font": Font(color="0563C1", underline="single")},
+        "money": {"font": DEFAULT_FONT, "number_format": MONEY_FORMAT},
+        "wrap": {"font": DEFAULT_FONT,
+                 "alignment": Alignment(vertical="top", wrap_text=True)},
+    }
+    for kind, extra in kinds.items():
+        styles.append(NamedStyle(name=f"pm_{kind}", border=thin_border,
+                                 **extra))
+        styles.append(NamedStyle(name=f"pm_{kind}_stripe",
+                                 border=thin_border, fill=stripe_fill,
+                                 **extra))
+    return styles
+
+
+def _scrape_info_rows(snapshot: ScraperSnapshot, oracle_types: int):
+    return [
+        ("Scraped At", snapshot.timestamp),
+        ("Total Events", snapshot.total_events),
+        ("Total Markets", snapshot.total_markets),
+        ("Total Volume (USD)", round(snapshot.total_volume, 2)),
+        ("Total Categories", len(snapshot.categories)),
+        ("Oracle Types", oracle_types),
+        ("Fetch Duration (seconds)", round(snapshot.fetch_duration_seconds, 2)),
+    ]
 
 
 class Exporter:
-    """Exports scraped data to CSV, JSON, and Excel files."""
-
-    def __init__(self):
-        os.makedirs(EXPORT_DIR, exist_ok=True)
+    """Exports scraped data to CSV, JSON, and Excel files.
+
+    File names, compression of CSV/JSON, archiving and retention are up to
+    the ExportStore (by default one on EXPORT_DIR).
+    """
+
+    def __init__(self, json_compact: bool = JSON_COMPACT,
+                 json_encoder: str = JSON_ENCODER,
+                 excel_write_only: bool = EXCEL_WRITE_ONLY,
+                 csv_gzip: bool = CSV_GZIP,
+                 csv_rows_per_file: int = CSV_ROWS_PER_FILE,
+                 store: ExportStore = None):
+        self.store = store if store is not None else ExportStore()
+        self.json_compact = json_compact
+        self.excel_write_only = excel_write_only
+        self.csv_gzip = csv_gzip
+        self.csv_rows_per_file = csv_rows_per_file
+        self._dumps = _json_encoder(json_encoder)
+
+    def export(self, snapshot: ScraperSnapshot,
+               formats) -> List[Tuple[str, str]]:
+        """Run each requested export format; returns (format, path) pairs."""
+        methods = {
+            "csv": self.export_csv,
+            "json": self.export_json,
+            "excel": self.export_excel,
+            "markets": self.export_markets_csv,
+            "parquet": self.export_parquet,
+        }
+        written: List[Tuple[str, str]] = []
+        for fmt in formats:
+            with EXPORT_SECONDS.time(format=fmt):
+                result = methods[fmt](snapshot)
+            paths = result if isinstance(result, list) else [result]
+            written.extend((fmt, path) for path in paths)
+        self.store.commit(written, snapshot.timestamp)
+        return written
 
     def export_csv(self, snapshot: ScraperSnapshot) -> str:
-        filepath = self._generate_filename("polymarket_events_{}.csv")
+        filepath = self.store.path("polymarket_events_{}.csv", compress=True)
+        refreshed_at = snapshot.refreshed_at
         rows = []
         for event in snapshot.events:
-            top_market = max(event.markets, key=lambda m: m.volume,
-                             default=None)
+            top_market = event.top_market
             row = {
                 "event_id": event.id,
                 "title": event.title,
@@ -39,49 +215,222 @@ class Exporter:
                 "oracle_link": top_market.oracle_link if top_market else "",
                 "resolved_by": top_market.resolved_by or "" if top_market else "",
                 "top_market_question": top_market.question if top_market else "",
-                "top_outcome": "",
-                "top_price": "",
+                "top_outcome": event.top_outcome,
+                "top_price": (round(event.top_price, 4)
+                              if event.top_price is not None else ""),
                 "polymarket_url": event.polymarket_url,
                 "scraped_at": snapshot.timestamp,
+                "refreshed_at": _utc(refreshed_at.get(event.id)),
             }
-            if top_market and top_market.outcome_prices:
-                try:
-                    prices = [float(p) for p in top_market.outcome_prices]
-                    best_idx = prices.index(max(prices))
-                    if best_idx < len(top_market.outcomes):
-                        row["top_outcome"] = top_market.outcomes[best_idx]
-                    row["top_price"] = round(max(prices), 4)
-                except (ValueError, TypeError):
-                    pass
             rows.append(row)
 
         if rows:
-            with open(filepath, "w", newline="", encoding="utf-8") as f:
+            with self.store.open(filepath, text=True) as f:
                 writer = csv.DictWriter(f, fieldnames=rows[0].keys())
                 writer.writeheader()
                 writer.writerows(rows)
         return filepath
 
+    def export_markets_csv(self, snapshot: ScraperSnapshot) -> List[str]:
+        """One row per market, streamed from the snapshot through csv.writer.
+
+        Outcomes and prices are ``; ``-joined in matching order. With
+        ``csv_rows_per_file`` set, output rolls over to ``_partNNN`` files
+        of at most that many rows. Each file is compressed on the fly as
+        the store's CSV/JSON exports are, or with gzip if ``csv_gzip`` is
+        set and the store does not compress. Returns the paths written, in
+        order.
+        """
+        base, ext = os.path.splitext(
+            self.store.path("polymarket_markets_{}.csv"))
+        ext += self.store.suffix or (".gz" if self.csv_gzip else "")
+        limit = self.csv_rows_per_file
+        rows = self._market_rows(snapshot)
+        paths: List[str] = []
+        while True:
+            first = next(rows, None)
+            if first is None and paths:
+                break
+            path = (f"{base}_part{len(paths) + 1:03d}{ext}" if limit > 0
+                    else f"{base}{ext}")
+            with self.store.open(path, text=True) as f:
+                writer = csv.writer(f)
+                writer.writerow(MARKET_CSV_COLUMNS)
+                if first is not None:
+                    writer.writerow(first)
+                    writer.writerows(itertools.islice(rows, limit - 1)
+                                     if limit > 0 else rows)
+            paths.append(path)
+            if first is None:
+                break
+        return paths
+
+    @staticmethod
+    def _market_rows(snapshot: ScraperSnapshot):
+        scraped_at = snapshot.timestamp
+        for event in snapshot.events:
+            for m in event.markets:
+                yield (
+                    event.id,
+                    event.title,
+                    event.category,
+                    m.id,
+                    m.question,
+                    "; ".join(map(str, m.outcomes)),
+                    "; ".join(map(str, m.outcome_prices)),
+                    round(m.volume, 2),
+                    round(m.volume_24hr, 2),
+                    round(m.liquidity, 2),
+                    m.active,
+                    m.closed,
+                    m.end_date or "",
+                    m.oracle_type,
+                    m.oracle_link,
+                    m.resolved_by or "",
+                    "" if m.uma_bond is None else m.uma_bond,
+                    "" if m.uma_reward is None else m.uma_reward,
+                    m.created_at or "",
+                    m.polymarket_url,
+                    scraped_at,
+                )
+
+    def export_parquet(self, snapshot: ScraperSnapshot) -> List[str]:
+        """Typed columnar export: an events table and a markets table.
+
+        The two Parquet files share a timestamp and join on ``event_id``.
+        Outcomes/prices/tags are list columns; category and oracle type
+        are dictionary-encoded straight from the snapshot's columnar codes.
+        """
+        if pa is None:
+            raise ImportError("Parquet export requires the pyarrow package")
+        columns = snapshot_columns(snapshot)
+        events = snapshot.events
+        markets = [m for e in events for m in e.markets]
+
+        def dictionary(codes, names):
+            return pa.DictionaryArray.from_arrays(
+                pa.array(codes, type=pa.int32()), pa.array(names, pa.string()))
+
+        def strings(values):
+            return pa.array(values, type=pa.string())
+
+        events_table = pa.table({
+            "event_id": strings([e.id for e in events]),
+            "title": strings([e.title for e in events]),
+            "slug": strings([e.slug for e in events]),
+            "category": dictionary(columns.category_code,
+                                   columns.category_names),
+            "oracle_type": dictionary(columns.oracle_code,
+                                      columns.oracle_names),
+            "tags": pa.array([[t.label for t in e.tags] for e in events],
+                             type=pa.list_(pa.string())),
+            "num_markets": pa.array(columns.market_count, type=pa.int32()),
+            "volume": pa.array(columns.volume),
+            "volume_24hr": pa.array(columns.volume_24hr),
+            "liquidity": pa.array(columns.liquidity),
+            "active": pa.array([e.active for e in events], type=pa.bool_()),
+            "closed": pa.array([e.closed for e in events], type=pa.bool_()),
+            "start_date": strings([e.start_date for e in events]),
+            "end_date": strings([e.end_date for e in events]),
+            "created_at": strings([e.created_at for e in events]),
+            "top_outcome": strings([e.top_outcome for e in events]),
+            "top_price": pa.array([e.top_price for e in events],
+                                  type=pa.float64()),
+            "description": strings([e.description for e in events]),
+            "polymarket_url": strings([e.polymarket_url for e in events]),
+        })
+        market_event_ids = [e.id for e in events for _ in e.markets]
+        markets_table = pa.table({
+            "event_id": strings(market_event_ids),
+            "market_id": strings([m.id for m in markets]),
+            "question": strings([m.question for m in markets]),
+            "slug": strings([m.slug for m in markets]),
+            "outcomes": pa.array([list(map(str, m.outcomes)) for m in markets],
+                                 type=pa.list_(pa.string())),
+            "outcome_prices": pa.array([m.outcome_prices.tolist()
+                                        for m in markets],
+                                       type=pa.list_(pa.float64())),
+            "volume": pa.array(columns.market_volume),
+            "volume_24hr": pa.array(columns.market_volume_24hr),
+            "liquidity": pa.array(columns.market_liquidity),
+            "active": pa.array([m.active for m in markets], type=pa.bool_()),
+            "closed": pa.array([m.closed for m in markets], type=pa.bool_()),
+            "end_date": strings([m.end_date for m in markets]),
+            "oracle_type": dictionary(columns.market_oracle_code,
+                                      columns.oracle_names),
+            "oracle_link": strings([m.oracle_link for m in markets]),
+            "resolved_by": strings([m.resolved_by for m in markets]),
+            "uma_bond": pa.array([m.uma_bond for m in markets],
+                                 type=pa.float64()),
+            "uma_reward": pa.array([m.uma_reward for m in markets],
+                                   type=pa.float64()),
+            "created_at": strings([m.created_at for m in markets]),
+            "description": strings([m.description for m in markets]),
+            "polymarket_url": strings([m.polymarket_url for m in markets]),
+        })
+        metadata = {b"scraped_at": snapshot.timestamp.encode("utf-8")}
+
+        events_path = self.store.path("polymarket_events_{}.parquet")
+        directory, name = os.path.split(events_path)
+        markets_path = os.path.join(
+            directory, name.replace("polymarket_events_",
+                                    "polymarket_markets_", 1))
+        for path, table in ((events_path, events_table),
+                            (markets_path, markets_table)):
+            with atomic_write(path, "wb") as f:
+                pq.write_table(table.replace_schema_metadata(metadata), f)
+        return [events_path, markets_path]
+
     def export_json(self, snapshot: ScraperSnapshot) -> str:
-        filepath = self._generate_filename("polymarket_events_{}.json")
-        data = {
+        """Stream the snapshot to JSON, serializing each event exactly once.
+
+        ``categories`` maps each category to the ids of its events; the full
+        event objects appear only under ``events``.
+        """
+        filepath = self.store.path("polymarket_events_{}.json", compress=True)
+        indent = not self.json_compact
+        dumps = self._dumps
+        header = {
             "scraped_at": snapshot.timestamp,
             "total_events": snapshot.total_events,
             "total_markets": snapshot.total_markets,
             "total_volume": round(snapshot.total_volume, 2),
             "fetch_duration_seconds": snapshot.fetch_duration_seconds,
-            "categories": {
-                cat: [asdict(e) for e in events]
-                for cat, events in snapshot.categories.items()
-            },
-            "events": [asdict(e) for e in snapshot.events],
+            "categories": snapshot_index(snapshot).event_ids_by_category(),
         }
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # Nested values are indented one level deeper than the top object
+        nl, sep = (b"\n  ", b": ") if indent else (b"", b":")
+        item_nl = b"\n    " if indent else b""
+
+        with self.store.open(filepath) as f:
+            f.write(b"{")
+            for i, (key, value) in enumerate(header.items()):
+                f.write((b"," if i else b"") + nl + dumps(key, False) + sep)
+                f.write(dumps(value, indent).replace(b"\n", nl))
+            f.write(b"," + nl + b'"events"' + sep + b"[")
+            refreshed_at = snapshot.refreshed_at
+            for i, event in enumerate(snapshot.events):
+                record = asdict(event)
+                record["refreshed_at"] = _utc(refreshed_at.get(event.id))
+                encoded = dumps(record, indent)
+                f.write((b"," if i else b"") + item_nl
+                        + encoded.replace(b"\n", item_nl))
+            if snapshot.events:
+                f.write(nl)
+            f.write(b"]" + (b"\n}\n" if indent else b"}"))
         return filepath
 
     def export_excel(self, snapshot: ScraperSnapshot) -> str:
-        filepath = self._generate_filename("polymarket_events_{}.xlsx")
+        filepath = self.store.path("polymarket_events_{}.xlsx")
+        if self.excel_write_only:
+            self._export_excel_write_only(snapshot, filepath)
+        else:
+            self._export_excel_standard(snapshot, filepath)
+        return filepath
+
+    def _export_excel_standard(self, snapshot: ScraperSnapshot,
+                               filepath: str) -> None:
+        """In-memory workbook with per-cell styling."""
         wb = Workbook()
 
         # Sheet 名使用采集时间戳（Excel sheet 名不能含 : 等特殊字符）
@@ -91,17 +440,7 @@ class Exporter:
         ws = wb.active
         ws.title = sheet_ts
 
-        headers = [
-            "Event Name",
-            "Event Link",
-            "Volume (USD)",
-            "End Date",
-            "Created At",
-            "Rules",
-            "Background",
-            "Oracle Link",
-            "Oracle Type",
-        ]
+        headers = EXCEL_EVENT_HEADERS
 
         header_font = Font(bold=True, color="FFFFFF", size=11)
         header_fill = PatternFill(start_color="2F5496", end_color="2F5496",
@@ -125,22 +464,19 @@ class Exporter:
         stripe_fill = PatternFill(start_color="F2F6FC", end_color="F2F6FC",
                                   fill_type="solid")
         url_font = Font(color="0563C1", underline="single")
-        money_format = '#,##0.00'
+        money_format = MONEY_FORMAT
         wrap_alignment = Alignment(vertical="top", wrap_text=True)
 
-        events_sorted = sorted(snapshot.events,
-                                key=lambda e: e.volume, reverse=True)
+        columns = snapshot_columns(snapshot)
+        events_sorted = snapshot_index(snapshot).query("volume")
 
         for event in events_sorted:
-            top_market = max(event.markets, key=lambda m: m.volume,
-                             default=None)
+            top_market = event.top_market
 
             oracle_link = ""
-            oracle_type = ""
             rules = ""
             if top_market:
                 oracle_link = top_market.oracle_link
-                oracle_type = top_market.oracle_type
                 rules = top_market.description
 
             row_data = [
@@ -152,7 +488,7 @@ class Exporter:
                 rules,                             # Rules (子市场的解析规则)
                 event.description,                 # Background (事件盘口背景)
                 oracle_link,                       # Oracle Link
-                oracle_type,                       # Oracle Type
+                event.oracle_type,                 # Oracle Type
             ]
 
             for col_idx, value in enumerate(row_data, 1):
@@ -173,22 +509,12 @@ class Exporter:
 
             row_num += 1
 
-        col_widths = {
-            1: 45, 2: 55, 3: 20,
-            4: 22, 5: 22,
-            6: 60, 7: 60,
-            8: 55, 9: 12,
-        }
-        for col_idx, width in col_widths.items():
+        for col_idx, width in EXCEL_EVENT_WIDTHS.items():
             ws.column_dimensions[get_column_letter(col_idx)].width = width
 
         # ── Sheet 2: 分类汇总 ──
         ws2 = wb.create_sheet("Category_Summary")
-        summary_headers = ["Category", "Events", "Markets",
-                           "Total Volume (USD)", "24h Volume (USD)",
-                           "Liquidity (USD)"]
-
-        for col_idx, header in enumerate(summary_headers, 1):
+        for col_idx, header in enumerate(EXCEL_CATEGORY_HEADERS, 1):
             cell = ws2.cell(row=1, column=col_idx, value=header)
             cell.font = header_font
             cell.fill = header_fill
@@ -196,15 +522,7 @@ class Exporter:
 
         ws2.freeze_panes = "A2"
 
-        cat_rows = []
-        for cat_name, cat_events in snapshot.categories.items():
-            cat_markets = sum(len(e.markets) for e in cat_events)
-            cat_vol = sum(e.volume for e in cat_events)
-            cat_24h = sum(e.volume_24hr for e in cat_events)
-            cat_liq = sum(e.liquidity for e in cat_events)
-            cat_rows.append((cat_name, len(cat_events), cat_markets,
-                             cat_vol, cat_24h, cat_liq))
-
+        cat_rows = columns.category_totals()
         cat_rows.sort(key=lambda r: r[3], reverse=True)
 
         for r_idx, row_data in enumerate(cat_rows, 2):
@@ -216,19 +534,12 @@ class Exporter:
             for money_col in [4, 5, 6]:
                 ws2.cell(row=r_idx, column=money_col).number_format = money_format
 
-        ws2.column_dimensions["A"].width = 20
-        ws2.column_dimensions["B"].width = 10
-        ws2.column_dimensions["C"].width = 10
-        ws2.column_dimensions["D"].width = 20
-        ws2.column_dimensions["E"].width = 20
-        ws2.column_dimensions["F"].width = 20
+        for col_idx, width in EXCEL_CATEGORY_WIDTHS.items():
+            ws2.column_dimensions[get_column_letter(col_idx)].width = width
 
         # ── Sheet 3: 预言机汇总 ──
         ws_oracle = wb.create_sheet("Oracle_Summary")
-        oracle_headers = ["Oracle Type", "Events", "Markets",
-                          "Total Volume (USD)", "24h Volume (USD)"]
-
-        for col_idx, header in enumerate(oracle_headers, 1):
+        for col_idx, header in enumerate(EXCEL_ORACLE_HEADERS, 1):
             cell = ws_oracle.cell(row=1, column=col_idx, value=header)
             cell.font = header_font
             cell.fill = header_fill
@@ -236,24 +547,10 @@ class Exporter:
 
         ws_oracle.freeze_panes = "A2"
 
-        from collections import defaultdict
-        oracle_stats = defaultdict(lambda: {
-            "events": 0, "markets": 0, "volume": 0.0, "volume_24hr": 0.0,
-        })
-        for event in snapshot.events:
-            top_m = max(event.markets, key=lambda m: m.volume, default=None)
-            otype = top_m.oracle_type if top_m else "Unknown"
-            oracle_stats[otype]["events"] += 1
-            oracle_stats[otype]["markets"] += len(event.markets)
-            oracle_stats[otype]["volume"] += event.volume
-            oracle_stats[otype]["volume_24hr"] += event.volume_24hr
-
-        oracle_rows = sorted(oracle_stats.items(),
-                              key=lambda x: x[1]["volume"], reverse=True)
-
-        for r_idx, (otype, stats) in enumerate(oracle_rows, 2):
-            row_data = [otype, stats["events"], stats["markets"],
-                        stats["volume"], stats["volume_24hr"]]
+        oracle_rows = sorted(columns.oracle_totals(),
+                              key=lambda r: r[3], reverse=True)
+
+        for r_idx, row_data in enumerate(oracle_rows, 2):
             for c_idx, value in enumerate(row_data, 1):
                 cell = ws_oracle.cell(row=r_idx, column=c_idx, value=value)
                 cell.border = thin_border
@@ -266,35 +563,24 @@ class Exporter:
         total_font = Font(bold=True, size=11)
         ws_oracle.cell(row=total_row, column=1, value="Total").font = total_font
         ws_oracle.cell(row=total_row, column=2,
-                       value=sum(s["events"] for s in oracle_stats.values())).font = total_font
+                       value=int(columns.market_count.size)).font = total_font
         ws_oracle.cell(row=total_row, column=3,
-                       value=sum(s["markets"] for s in oracle_stats.values())).font = total_font
+                       value=int(columns.market_count.sum())).font = total_font
         ws_oracle.cell(row=total_row, column=4,
-                       value=sum(s["volume"] for s in oracle_stats.values()))
+                       value=float(columns.volume.sum()))
         ws_oracle.cell(row=total_row, column=4).font = total_font
         ws_oracle.cell(row=total_row, column=4).number_format = money_format
         ws_oracle.cell(row=total_row, column=5,
-                       value=sum(s["volume_24hr"] for s in oracle_stats.values()))
+                       value=float(columns.volume_24hr.sum()))
         ws_oracle.cell(row=total_row, column=5).font = total_font
         ws_oracle.cell(row=total_row, column=5).number_format = money_format
 
-        ws_oracle.column_dimensions["A"].width = 16
-        ws_oracle.column_dimensions["B"].width = 10
-        ws_oracle.column_dimensions["C"].width = 10
-        ws_oracle.column_dimensions["D"].width = 22
-        ws_oracle.column_dimensions["E"].width = 22
+        for col_idx, width in EXCEL_ORACLE_WIDTHS.items():
+            ws_oracle.column_dimensions[get_column_letter(col_idx)].width = width
 
         # ── Sheet 4: 抓取信息 ──
         ws3 = wb.create_sheet("Scrape_Info")
-        info_data = [
-            ("Scraped At", snapshot.timestamp),
-            ("Total Events", snapshot.total_events),
-            ("Total Markets", snapshot.total_markets),
-            ("Total Volume (USD)", round(snapshot.total_volume, 2)),
-            ("Total Categories", len(snapshot.categories)),
-            ("Oracle Types", len(oracle_stats)),
-            ("Fetch Duration (seconds)", round(snapshot.fetch_duration_seconds, 2)),
-        ]
+        info_data = _scrape_info_rows(snapshot, len(oracle_rows))
         label_font = Font(bold=True, size=11)
         for r_idx, (label, value) in enumerate(info_data, 1):
             cell_l = ws3.cell(row=r_idx, column=1, value=label)
@@ -304,9 +590,106 @@ class Exporter:
         ws3.column_dimensions["A"].width = 28
         ws3.column_dimensions["B"].width = 30
 
-        wb.save(filepath)
-        return filepath
+        with atomic_write(filepath, "wb") as f:
+            wb.save(f)
+
+    def _export_excel_write_only(self, snapshot: ScraperSnapshot,
+                                 filepath: str) -> None:
+        """Same four sheets as the standard engine, streamed through
+        write-only worksheets and shared named styles so memory stays flat
+        regardless of row count."""
+        wb = Workbook(write_only=True)
+        for style in _excel_named_styles():
+            wb.add_named_style(style)
+        columns = snapshot_columns(snapshot)
+
+        def styled(ws, value, style):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            return cell
+
+        def header_row(ws, headers):
+            return [styled(ws, h, "pm_header") for h in headers]
+
+        def data_row(ws, values, kinds, row_num):
+            suffix = "_stripe" if row_num % 2 == 0 else ""
+            return [styled(ws, v, f"pm_{kind}{suffix}")
+                    for v, kind in zip(values, kinds)]
+
+        def setup(ws, widths):
+            for col_idx, width in widths.items():
+                ws.column_dimensions[get_column_letter(col_idx)].width = width
+            ws.freeze_panes = "A2"
+
+        # ── Sheet 1: 事件明细 ──
+        ws = wb.create_sheet(
+            snapshot.timestamp.replace(":", "").replace(" ", "_"))
+        setup(ws, EXCEL_EVENT_WIDTHS)
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(EXCEL_EVENT_HEADERS))}1"
+        ws.append(header_row(ws, EXCEL_EVENT_HEADERS))
+        for row_num, event in enumerate(
+                snapshot_index(snapshot).query("volume"), 2):
+            top_market = event.top_market
+            oracle_link = top_market.oracle_link if top_market else ""
+            values = (
+                event.title,
+                event.polymarket_url,
+                event.volume,
+                event.end_date or "",
+                event.created_at or "",
+                top_market.description if top_market else "",
+                event.description,
+                oracle_link,
+                event.oracle_type,
+            )
+            kinds = (
+                "text",
+                "url" if event.polymarket_url else "text",
+                "money",
+                "text",
+                "text",
+                "wrap",
+                "wrap",
+                "url" if oracle_link else "text",
+                "text",
+            )
+            ws.append(data_row(ws, values, kinds, row_num))
+
+        # ── Sheet 2: 分类汇总 ──
+        ws2 = wb.create_sheet("Category_Summary")
+        setup(ws2, EXCEL_CATEGORY_WIDTHS)
+        ws2.append(header_row(ws2, EXCEL_CATEGORY_HEADERS))
+        cat_rows = sorted(columns.category_totals(), key=lambda r: r[3],
+                          reverse=True)
+        cat_kinds = ("text", "text", "text", "money", "money", "money")
+        for row_num, row_data in enumerate(cat_rows, 2):
+            ws2.append(data_row(ws2, row_data, cat_kinds, row_num))
+
+        # ── Sheet 3: 预言机汇总 ──
+        ws_oracle = wb.create_sheet("Oracle_Summary")
+        setup(ws_oracle, EXCEL_ORACLE_WIDTHS)
+        ws_oracle.append(header_row(ws_oracle, EXCEL_ORACLE_HEADERS))
+        oracle_rows = sorted(columns.oracle_totals(), key=lambda r: r[3],
+                             reverse=True)
+        oracle_kinds = ("text", "text", "text", "money", "money")
+        for row_num, row_data in enumerate(oracle_rows, 2):
+            ws_oracle.append(data_row(ws_oracle, row_data, oracle_kinds,
+                                      row_num))
+        ws_oracle.append([
+            styled(ws_oracle, "Total", "pm_total"),
+            styled(ws_oracle, int(columns.market_count.size), "pm_total"),
+            styled(ws_oracle, int(columns.market_count.sum()), "pm_total"),
+            styled(ws_oracle, float(columns.volume.sum()), "pm_total_money"),
+            styled(ws_oracle, float(columns.volume_24hr.sum()),
+                   "pm_total_money"),
+        ])
+
+        # ── Sheet 4: 抓取信息 ──
+        ws3 = wb.create_sheet("Scrape_Info")
+        ws3.column_dimensions["A"].width = 28
+        ws3.column_dimensions["B"].width = 30
+        for label, value in _scrape_info_rows(snapshot, len(oracle_rows)):
+            ws3.append([styled(ws3, label, "pm_total"), value])
 
-    def _generate_filename(self, template: str) -> str:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        return os.path.join(EXPORT_DIR, template.format(timestamp))
+        with atomic_write(filepath, "wb") as f:
+            wb.save(f)
@@ -0,0 +1,178 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from models import ScraperSnapshot
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS market_history (
+    market_id      TEXT NOT NULL,
+    event_id       TEXT NOT NULL,
+    ts             REAL NOT NULL,
+    outcome_prices TEXT NOT NULL,
+    volume         REAL NOT NULL,
+    volume_24hr    REAL NOT NULL,
+    liquidity      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_market_history_market_ts
+    ON market_history (market_id, ts);
+CREATE INDEX IF NOT EXISTS idx_market_history_event_ts
+    ON market_history (event_id, ts);
+CREATE INDEX IF NOT EXISTS idx_market_history_ts
+    ON market_history (ts);
+"""
+
+# (outcome_prices JSON, volume, volume_24hr, liquidity)
+_Values = Tuple[str, float, float, float]
+
+
+class HistoryStore:
+    """Append-only per-market price/volume history in SQLite (WAL mode).
+
+    Each cycle appends one row per market whose prices, volume or
+    liquidity changed since the last row written for it. A cycle's rows
+    go in a single transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._last: Dict[str, _Values] = self._load_latest()
+
+    def _load_latest(self) -> Dict[str, _Values]:
+        # SQLite returns the bare columns from the row holding MAX(ts)
+        rows = self.conn.execute(
+            "SELECT market_id, outcome_prices, volume, volume_24hr, "
+            "liquidity, MAX(ts) FROM market_history GROUP BY market_id")
+        return {r[0]: (r[1], r[2], r[3], r[4]) for r in rows}
+
+    def record(self, snapshot: ScraperSnapshot,
+               ts: Optional[float] = None) -> int:
+        """Append rows for markets that changed; returns rows written.
+
+        With a snapshot delta, only added/changed events are inspected,
+        so every snapshot must be recorded, tier refreshes included: an
+        event a refresh updated is reused, and reported unchanged, by the
+        next full sweep.
+        """
+        ts = time.time() if ts is None else ts
+        events = snapshot.events
+        if snapshot.delta is not None:
+            touched = set(snapshot.delta.added)
+            touched.update(snapshot.delta.changed)
+            events = [e for e in events if e.id in touched]
+
+        rows = []
+        for event in events:
+            for m in event.markets:
+                values = (json.dumps(m.outcome_prices.tolist()), m.volume,
+                          m.volume_24hr, m.liquidity)
+                if self._last.get(m.id) == values:
+                    continue
+                self._last[m.id] = values
+                rows.append((m.id, event.id, ts) + values)
+
+        if rows:
+            with self._lock, self.conn:
+                self.conn.executemany(
+                    "INSERT INTO market_history (market_id, event_id, ts, "
+                    "outcome_prices, volume, volume_24hr, liquidity) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def price_series(self, market_id: str, since: float = 0.0
+                     ) -> List[Tuple[float, List[float], float, float, float]]:
+        """(ts, outcome_prices, volume, volume_24hr, liquidity) rows."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT ts, outcome_prices, volume, volume_24hr, liquidity "
+                "FROM market_history WHERE market_id = ? AND ts >= ? "
+                "ORDER BY ts", (market_id, since)).fetchall()
+        return [(r[0], json.loads(r[1]), r[2], r[3], r[4]) for r in rows]
+
+    def event_history(self, event_id: str, since: float = 0.0
+                      ) -> List[Tuple[str, float, List[float], float]]:
+        """(market_id, ts, outcome_prices, volume) rows for one event."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT market_id, ts, outcome_prices, volume "
+                "FROM market_history WHERE event_id = ? AND ts >= ? "
+                "ORDER BY ts", (event_id, since)).fetchall()
+        return [(r[0], r[1], json.loads(r[2]), r[3]) for r in rows]
+
+    def changed_since(self, seconds: float) -> List[str]:
+        """Ids of markets with a row written in the last ``seconds``."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT market_id FROM market_history WHERE ts >= ?",
+                (time.time() - seconds,)).fetchall()
+        return [r[0] for r in rows]
+
+    def compact(self, retention_days: float, downsample_after_hours: float,
+                bucket_seconds: float) -> Tuple[int, int]:
+        """Retention and downsampling job.
+
+        Deletes rows older than ``retention_days`` and, for rows older
+        than ``downsample_after_hours``, keeps only the last row per market
+        per ``bucket_seconds`` bucket. Returns (expired, downsampled) counts.
+        """
+        now = time.time()
+        retention_cutoff = now - retention_days * 86400
+        downsample_cutoff = now - downsample_after_hours * 3600
+        with self._lock, self.conn:
+            expired = self.conn.execute(
+                "DELETE FROM market_history WHERE ts < ?",
+                (retention_cutoff,)).rowcount
+            # Rows are appended in time order, so MAX(rowid) is the latest
+            downsampled = self.conn.execute(
+                "DELETE FROM market_history WHERE ts < :cutoff AND rowid NOT IN "
+                "(SELECT MAX(rowid) FROM market_history WHERE ts < :cutoff "
+                "GROUP BY market_id, CAST(ts / :bucket AS INTEGER))",
+                {"cutoff": downsample_cutoff, "bucket": bucket_seconds},
+            ).rowcount
+            if expired:
+                self._last = self._load_latest()
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        logger.info("History compacted: %d expired, %d downsampled rows",
+                    expired, downsampled)
+        return expired, downsampled
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    from config import (HISTORY_RETENTION_DAYS,
+                        HISTORY_DOWNSAMPLE_AFTER_HOURS,
+                        HISTORY_DOWNSAMPLE_BUCKET_SECONDS)
+
+    parser = argparse.ArgumentParser(
+        description="Run the history retention/downsampling job")
+    parser.add_argument("db", help="Path to the history SQLite database")
+    parser.add_argument("--retention-days", type=float,
+                        default=HISTORY_RETENTION_DAYS)
+    parser.add_argument("--downsample-after-hours", type=float,
+                        default=HISTORY_DOWNSAMPLE_AFTER_HOURS)
+    parser.add_argument("--bucket-seconds", type=float,
+                        default=HISTORY_DOWNSAMPLE_BUCKET_SECONDS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = HistoryStore(args.db)
+    expired, downsampled = store.compact(args.retention_days,
+                                         args.downsample_after_hours,
+                                         args.bucket_seconds)
+    print(f"Expired {expired} rows, downsampled {downsampled} rows")
+    store.close()
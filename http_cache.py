@@ -0,0 +1,163 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".cache"
+
+
+@dataclass
+class CacheEntry:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    size: int
+    path: str
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPCache:
+    """Size-bounded on-disk LRU of GET response bodies and their validators.
+
+    Each entry is one file: a JSON header line (ETag, Last-Modified)
+    followed by the decoded response body. Recency survives restarts via
+    file mtimes, which are bumped on every hit.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key(url: str, params: dict = None) -> str:
+        query = urlencode(sorted((params or {}).items()))
+        return hashlib.sha1(f"{url}?{query}".encode()).hexdigest()
+
+    def _load_index(self) -> None:
+        found = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if _SUFFIX + ".tmp" in name:
+                # Left behind by a write interrupted before its rename
+                self._unlink(path)
+                continue
+            if not name.endswith(_SUFFIX):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    meta = json.loads(f.readline())
+                st = os.stat(path)
+            except (OSError, ValueError):
+                logger.warning("Dropping unreadable cache file %s", path)
+                self._unlink(path)
+                continue
+            entry = CacheEntry(meta.get("etag"), meta.get("last_modified"),
+                               st.st_size, path)
+            found.append((st.st_mtime, name[:-len(_SUFFIX)], entry))
+        for _, key, entry in sorted(found, key=lambda item: item[0]):
+            self._entries[key] = entry
+            self._total_bytes += entry.size
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            try:
+                os.utime(entry.path)
+            except OSError:
+                pass
+        return entry
+
+    def read_body(self, key: str, entry: CacheEntry) -> Optional[bytes]:
+        """Cached body for ``entry``, or None (and the entry dropped) if its
+        file has gone missing."""
+        try:
+            with open(entry.path, "rb") as f:
+                f.readline()
+                return f.read()
+        except OSError:
+            self.discard(key)
+            return None
+
+    def put(self, key: str, etag: Optional[str],
+            last_modified: Optional[str], body: bytes) -> None:
+        """Store a response; responses without validators are not cached."""
+        if not etag and not last_modified:
+            self.discard(key)
+            return
+        header = json.dumps({"etag": etag,
+                             "last_modified": last_modified}).encode()
+        size = len(header) + 1 + len(body)
+        if size > self.max_bytes:
+            self.discard(key)
+            return
+
+        path = os.path.join(self.directory, key + _SUFFIX)
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(b"\n")
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write cache entry %s: %s", path, e)
+            self._unlink(tmp_path)
+            return
+
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old.size
+            self._entries[key] = CacheEntry(etag, last_modified, size, path)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes:
+                _, victim = self._entries.popitem(last=False)
+                self._total_bytes -= victim.size
+                evicted.append(victim.path)
+        for victim_path in evicted:
+            self._unlink(victim_path)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry.size
+        if entry is not None:
+            self._unlink(entry.path)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,17 +1,42 @@
 import time
+import queue
 import signal
-import sys
 import logging
 import argparse
+from typing import Optional
 
 from rich.live import Live
 
 from config import (GAMMA_BASE_URL, REFRESH_INTERVAL_SECONDS,
-                    API_PAGE_LIMIT, MAX_PAGES, REQUEST_DELAY_SECONDS)
-from api_client import GammaAPIClient
-from data_processor import DataProcessor
-from display import Dashboard
-from exporter import Exporter
+                    API_PAGE_LIMIT, MAX_PAGES, REQUEST_DELAY_SECONDS,
+                    FETCH_WORKERS, MAX_REQUESTS_PER_SECOND, JSON_COMPACT,
+                    CSV_GZIP, CSV_ROWS_PER_FILE, HISTORY_RETENTION_DAYS,
+                    HISTORY_DOWNSAMPLE_AFTER_HOURS,
+                    HISTORY_DOWNSAMPLE_BUCKET_SECONDS,
+                    HISTORY_COMPACT_INTERVAL_SECONDS, DASHBOARD_PAGE_SIZE,
+                    HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES,
+                    RATE_LIMIT_MIN_RATE, RATE_LIMIT_RECOVERY_STEP,
+                    METRICS_PORT, PROFILE_DIR, PARSE_WORKERS,
+                    HOT_REFRESH_SECONDS, WARM_REFRESH_SECONDS,
+                    CHANGELOG_DIR, EXPORT_COMPRESSION,
+                    EXPORT_RETENTION_HOURS, EXPORT_MAX_BYTES)
+from api_client import GammaAPIClient, IncompleteCrawl
+from cassette import CassetteRecorder, CassettePlayer, CassetteExhausted
+from http_cache import HTTPCache
+from rate_limiter import RateLimiter
+from typed_decode import event_page_decoder
+from models import ScraperSnapshot
+from data_processor import SnapshotBuilder, EventCache
+from parse_pool import ParsePool
+from scheduler import RefreshScheduler, TieredScraperThread, TierPolicy
+from display import Dashboard, KeyReader, SORT_LABELS
+from exporter import Exporter, EXPORT_FORMATS
+from export_store import ExportStore, COMPRESSION_SUFFIXES
+from history_store import HistoryStore
+from changelog import Changelog
+from alerts import AlertEngine, LogSink, FileSink, WebhookSink, load_rules
+from background import SnapshotBuffer, ScraperThread, ExportWorker
+from metrics import REGISTRY, CycleProfiler, start_metrics_server
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +48,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+EXPORT_LABELS = {
+    "csv": "CSV",
+    "json": "JSON",
+    "excel": "Excel",
+    "markets": "Markets CSV",
+    "parquet": "Parquet",
+}
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -32,6 +65,13 @@ def parse_args():
         "--interval", type=int, default=REFRESH_INTERVAL_SECONDS,
         help="Refresh interval in seconds (default: 30)",
     )
+    parser.add_argument(
+        "--hot-interval", type=float, default=HOT_REFRESH_SECONDS,
+        metavar="SECONDS",
+        help="Re-fetch hot events this often between full refreshes "
+             f"(default: {HOT_REFRESH_SECONDS}, 0 = off; warm events every "
+             f"{WARM_REFRESH_SECONDS}s)",
+    )
     parser.add_argument(
         "--export", action="store_true",
         help="Export data to CSV and JSON on each refresh",
@@ -48,45 +88,294 @@ def parse_args():
         "--category", type=str, default=None,
         help="Filter by category (e.g., Politics, Crypto)",
     )
+    parser.add_argument(
+        "--sort", choices=list(SORT_LABELS), default="volume_24hr",
+        help="Initial events table sort key (default: volume_24hr; "
+             "press 's' to cycle)",
+    )
+    parser.add_argument(
+        "--page-size", type=int, default=DASHBOARD_PAGE_SIZE,
+        help=f"Events table rows per page (default: {DASHBOARD_PAGE_SIZE})",
+    )
+    parser.add_argument(
+        "--export-format", nargs="+", choices=EXPORT_FORMATS, default=None,
+        metavar="FORMAT",
+        help="Formats written by --export / --export-once: "
+             f"{', '.join(EXPORT_FORMATS)} (default: csv json, "
+             "plus excel for --export-once)",
+    )
+    parser.add_argument(
+        "--export-markets", action="store_true",
+        help="Also export a market-level CSV (one row per market)",
+    )
+    parser.add_argument(
+        "--csv-gzip", action="store_true",
+        help="Gzip market-level CSV exports on the fly",
+    )
+    parser.add_argument(
+        "--csv-rows-per-file", type=int, default=CSV_ROWS_PER_FILE,
+        help="Roll market-level CSV into files of at most N rows "
+             "(default: 0 = single file)",
+    )
+    parser.add_argument(
+        "--export-compression", choices=tuple(COMPRESSION_SUFFIXES),
+        default=EXPORT_COMPRESSION,
+        help="Compress CSV/JSON exports on the fly "
+             f"(default: {EXPORT_COMPRESSION})",
+    )
+    parser.add_argument(
+        "--export-retention-hours", type=float,
+        default=EXPORT_RETENTION_HOURS, metavar="H",
+        help="Delete exports and hourly archives older than H hours "
+             f"(default: {EXPORT_RETENTION_HOURS}, 0 = keep)",
+    )
+    parser.add_argument(
+        "--export-max-mb", type=float,
+        default=EXPORT_MAX_BYTES / (1024 * 1024), metavar="MB",
+        help="Delete the oldest exports while the export directory is "
+             "over MB megabytes (0 = no limit)",
+    )
+    parser.add_argument(
+        "--json-compact", action="store_true",
+        help="Write JSON exports without indentation",
+    )
+    parser.add_argument(
+        "--history-db", type=str, default=None, metavar="PATH",
+        help="Append changed market prices/volumes to a SQLite history "
+             "database each cycle",
+    )
+    parser.add_argument(
+        "--changelog", nargs="?", const=CHANGELOG_DIR, default=None,
+        metavar="DIR",
+        help="Append market-level changes to a JSONL changelog with "
+             f"periodic checkpoints (default dir: {CHANGELOG_DIR})",
+    )
+    parser.add_argument(
+        "--alert-rules", type=str, default=None, metavar="PATH",
+        help="Evaluate the alert rules in this JSON file on every snapshot "
+             "(alerts are logged)",
+    )
+    parser.add_argument(
+        "--alert-file", type=str, default=None, metavar="PATH",
+        help="Also append alerts to this JSONL file",
+    )
+    parser.add_argument(
+        "--alert-webhook", type=str, default=None, metavar="URL",
+        help="Also POST alerts as JSON to this URL",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=FETCH_WORKERS,
+        help=f"Concurrent page fetches (default: {FETCH_WORKERS}, "
+             "1 = sequential)",
+    )
+    parser.add_argument(
+        "--parse-workers", type=int, default=PARSE_WORKERS, metavar="N",
+        help="Parse large batches of events on N worker processes when "
+             "pages are decoded as plain JSON "
+             f"(default: {PARSE_WORKERS} = in-process)",
+    )
+    parser.add_argument(
+        "--max-rps", type=float, default=MAX_REQUESTS_PER_SECOND,
+        help=f"Global API request rate cap per second "
+             f"(default: {MAX_REQUESTS_PER_SECOND:g}, 0 = unlimited)",
+    )
+    parser.add_argument(
+        "--no-http-cache", action="store_true",
+        help="Always download full pages instead of revalidating cached "
+             f"responses in {HTTP_CACHE_DIR}/",
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=METRICS_PORT,
+        help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics "
+             "(default: disabled)",
+    )
+    parser.add_argument(
+        "--stats-file", type=str, default=None, metavar="PATH",
+        help="Rewrite a JSON file with all metrics after every cycle",
+    )
+    parser.add_argument(
+        "--profile-cycle", type=int, default=0, metavar="N",
+        help=f"Dump a cProfile + tracemalloc profile of scrape cycle N "
+             f"to {PROFILE_DIR}/",
+    )
+    tape = parser.add_mutually_exclusive_group()
+    tape.add_argument(
+        "--record", type=str, default=None, metavar="DIR",
+        help="Save every cycle's raw API responses (gzip, with timings) "
+             "to a cassette directory",
+    )
+    tape.add_argument(
+        "--replay", type=str, default=None, metavar="DIR",
+        help="Serve cycles from a recorded cassette instead of the API",
+    )
+    parser.add_argument(
+        "--replay-speed", type=float, default=1.0, metavar="X",
+        help="Replay time multiplier (default: 1 = recorded speed, "
+             "0 = as fast as possible)",
+    )
     return parser.parse_args()
 
 
-def scrape_cycle(client: GammaAPIClient) -> 'ScraperSnapshot':
-    start = time.time()
-    raw_events = client.fetch_all_active_events()
+def resolve_export_formats(args, once: bool) -> list:
+    """Export formats for this run, honoring the shorthand flags."""
+    formats = []
+    if once and args.export_once:
+        formats = list(args.export_format or ["csv", "json", "excel"])
+    elif not once and args.export:
+        formats = list(args.export_format or ["csv", "json"])
+    if args.export_excel:
+        formats.append("excel")
+    if args.export_markets:
+        formats.append("markets")
+    return list(dict.fromkeys(formats))
+
+
+def scrape_cycle(client: GammaAPIClient, cache: EventCache = None,
+                 pool: ParsePool = None) -> Optional[ScraperSnapshot]:
+    # Pages are parsed as they arrive, overlapping with in-flight requests,
+    # so the measured duration covers both fetch and parse.
+    try:
+        if client.player:
+            # Wait for the recorded cycle start outside the timed section
+            client.player.advance()
+        start = time.time()
+        builder = SnapshotBuilder(cache, pool)
+        for page in client.iter_active_event_pages():
+            builder.add_page(page)
+        builder.flush()
+    except CassetteExhausted:
+        logger.info("Replay finished: no more recorded cycles")
+        return None
+    except IncompleteCrawl:
+        # Nothing is finalized, so the EventCache still holds the last
+        # complete crawl and no event is reported removed
+        log_transfer_stats(client)
+        raise
     duration = time.time() - start
-    return DataProcessor.build_snapshot(raw_events, duration)
+    log_transfer_stats(client)
+    return builder.finalize(duration)
+
+
+def log_transfer_stats(client: GammaAPIClient) -> None:
+    stats = client.take_transfer_stats()
+    logger.info(
+        "Transfer: %d requests (%d not modified), %.1f KB on the wire, "
+        "%.1f KB decoded",
+        stats.requests, stats.not_modified,
+        stats.wire_bytes / 1024, stats.body_bytes / 1024,
+    )
+    limits = client.rate_limiter.take_stats()
+    logger.info(
+        "Rate limiter: %.1f req/s, %.1fs throttled, %d retries, "
+        "%d rate-limited",
+        limits.rate, limits.throttled_seconds, limits.retries,
+        limits.rate_limited,
+    )
 
 
 def main():
     args = parse_args()
+    # Start worker processes before any other thread exists
+    decoder = event_page_decoder()
+    pool = None
+    if args.parse_workers > 0:
+        if decoder is not None:
+            # Typed events are mostly object building, which stays in this
+            # process; python -m benchmarks.parse_pool shows no break-even
+            logger.warning("--parse-workers ignored: pages are decoded "
+                           "with msgspec, and pooled parsing only pays off "
+                           "for JSON_DECODER='json'")
+        else:
+            pool = ParsePool(args.parse_workers)
     client = GammaAPIClient(
         base_url=GAMMA_BASE_URL,
         page_limit=API_PAGE_LIMIT,
         max_pages=MAX_PAGES,
         request_delay=REQUEST_DELAY_SECONDS,
+        max_workers=args.workers,
+        max_requests_per_second=args.max_rps,
+        http_cache=(None if args.no_http_cache
+                    else HTTPCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES)),
+        rate_limiter=RateLimiter(
+            args.max_rps, burst=args.workers,
+            min_rate=RATE_LIMIT_MIN_RATE,
+            recovery_step=RATE_LIMIT_RECOVERY_STEP,
+        ),
+        recorder=CassetteRecorder(args.record) if args.record else None,
+        player=(CassettePlayer(args.replay, args.replay_speed)
+                if args.replay else None),
+        event_decoder=decoder,
     )
-    dashboard = Dashboard()
-    exporter = Exporter()
+    dashboard = Dashboard(page_size=args.page_size, sort_key=args.sort)
+    exporter = Exporter(
+        json_compact=args.json_compact or JSON_COMPACT,
+        csv_gzip=args.csv_gzip or CSV_GZIP,
+        csv_rows_per_file=args.csv_rows_per_file,
+        store=ExportStore(
+            compression=args.export_compression,
+            retention_hours=args.export_retention_hours,
+            max_bytes=int(args.export_max_mb * 1024 * 1024),
+        ),
+    )
+    event_cache = EventCache()
+    history = HistoryStore(args.history_db) if args.history_db else None
+    changelog = Changelog(args.changelog) if args.changelog else None
+    alerts = None
+    if args.alert_rules:
+        sinks = [LogSink()]
+        if args.alert_file:
+            sinks.append(FileSink(args.alert_file))
+        if args.alert_webhook:
+            sinks.append(WebhookSink(args.alert_webhook))
+        alerts = AlertEngine(load_rules(args.alert_rules), sinks)
+    profiler = (CycleProfiler(args.profile_cycle, PROFILE_DIR)
+                if args.profile_cycle > 0 else None)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+
+    def write_stats():
+        if args.stats_file:
+            REGISTRY.write_json(args.stats_file)
+
+    def cycle(cache=None):
+        if profiler:
+            return profiler.run(lambda: scrape_cycle(client, cache, pool))
+        return scrape_cycle(client, cache, pool)
 
     # --export-once / --export-excel mode: scrape, export, exit
     if args.export_once or args.export_excel:
-        snapshot = scrape_cycle(client)
+        try:
+            snapshot = cycle()
+        except IncompleteCrawl as e:
+            if pool:
+                pool.close()
+            raise SystemExit(f"Scrape incomplete, nothing exported: {e}")
+        if snapshot is None:
+            print("No recorded cycles to replay.")
+            return
         print(f"\nScraped {snapshot.total_events} events, "
               f"{snapshot.total_markets} markets")
         print(f"Total Volume: ${snapshot.total_volume:,.2f}")
+        if history:
+            print(f"History rows written: {history.record(snapshot)}")
+        if changelog:
+            stats = changelog.record(snapshot)
+            changelog.close()
+            print(f"Changelog checkpoint: {stats.checkpoint}")
         print(f"\nExported to:")
-        if args.export_once:
-            csv_path = exporter.export_csv(snapshot)
-            json_path = exporter.export_json(snapshot)
-            print(f"  CSV:  {csv_path}")
-            print(f"  JSON: {json_path}")
-        if args.export_excel or args.export_once:
-            xlsx_path = exporter.export_excel(snapshot)
-            print(f"  Excel: {xlsx_path}")
+        formats = resolve_export_formats(args, once=True)
+        for fmt, path in exporter.export(snapshot, formats):
+            print(f"  {EXPORT_LABELS[fmt]}: {path}")
+        write_stats()
+        if pool:
+            pool.close()
         return
 
-    # Live dashboard mode
+    # Live dashboard mode: a background thread scrapes on a start-to-start
+    # cadence and publishes snapshots; exports/history run on their own
+    # worker; this thread only renders the latest published snapshot.
+    export_formats = resolve_export_formats(args, once=False)
+    next_compact_at = time.time() + HISTORY_COMPACT_INTERVAL_SECONDS
     shutdown = False
 
     def signal_handler(sig, frame):
@@ -95,42 +384,136 @@ def main():
 
     signal.signal(signal.SIGINT, signal_handler)
 
+    def persist(snapshot):
+        nonlocal next_compact_at
+        if history:
+            rows = history.record(snapshot)
+            logger.info("History: %d market rows written", rows)
+            if time.time() >= next_compact_at:
+                history.compact(HISTORY_RETENTION_DAYS,
+                                HISTORY_DOWNSAMPLE_AFTER_HOURS,
+                                HISTORY_DOWNSAMPLE_BUCKET_SECONDS)
+                next_compact_at = time.time() + HISTORY_COMPACT_INTERVAL_SECONDS
+
+        if export_formats and not snapshot.partial:
+            written = exporter.export(snapshot, export_formats)
+            logger.info("Exported: %s", ", ".join(path for _, path in written))
+        write_stats()
+
+    export_worker = None
+    if history or export_formats:
+        export_worker = ExportWorker(persist)
+        export_worker.start()
+
+    def write_changelog(snapshot):
+        stats = changelog.record(snapshot)
+        if stats.bytes:
+            logger.info("Changelog: %d added, %d changed, %d removed "
+                        "(%d bytes)", stats.added, stats.changed,
+                        stats.removed, stats.bytes)
+
+    # Every snapshot, tier refreshes included, in order, so the changelog
+    # keeps their finer time resolution; its diffing and checkpoint writes
+    # run on their own thread
+    changelog_worker = None
+    if changelog:
+        changelog_worker = ExportWorker(write_changelog, name="changelog",
+                                        coalesce=False)
+        changelog_worker.start()
+
+    def on_snapshot(snapshot):
+        if changelog_worker:
+            changelog_worker.submit(snapshot)
+        if alerts:
+            alerts.process(snapshot)
+        if snapshot.partial:
+            # Tier refresh: the dashboard picks it up from the buffer and
+            # exports follow the full refreshes, but history records it:
+            # the next sweep reuses the refreshed events as unchanged
+            if history:
+                export_worker.submit(snapshot)
+            return
+        logger.info(
+            "Scraped %d events, %d markets in %.1fs (lag %.1fs)",
+            snapshot.total_events,
+            snapshot.total_markets,
+            snapshot.fetch_duration_seconds,
+            snapshot.cycle_lag_seconds,
+        )
+        logger.info(
+            "Delta: %d added, %d changed, %d removed",
+            len(snapshot.delta.added),
+            len(snapshot.delta.changed),
+            len(snapshot.delta.removed),
+        )
+        if export_worker:
+            export_worker.submit(snapshot)
+        else:
+            write_stats()
+
+    buffer = SnapshotBuffer()
+    # Tier refreshes happen outside recorded cycles, so cassettes only
+    # ever hold full refreshes
+    if args.hot_interval > 0 and not (args.record or args.replay):
+        policy = TierPolicy(sweep_interval=args.interval,
+                            hot_interval=args.hot_interval,
+                            warm_interval=max(args.hot_interval,
+                                              WARM_REFRESH_SECONDS))
+        scheduler = RefreshScheduler(client, lambda: cycle(event_cache),
+                                     event_cache, policy, pool)
+        scraper = TieredScraperThread(scheduler, buffer, on_snapshot)
+    else:
+        # When replaying, the cassette paces cycles at the recorded cadence
+        interval = 0 if client.player else args.interval
+        scraper = ScraperThread(lambda: cycle(event_cache),
+                                interval, buffer, on_snapshot)
+    scraper.start()
+
+    keys: "queue.Queue[str]" = queue.Queue()
+    key_reader = KeyReader(keys) if KeyReader.available() else None
+    if key_reader:
+        key_reader.start()
+
     with Live(
         dashboard.render(None),
         refresh_per_second=1,
         screen=False,
         console=dashboard.console,
     ) as live:
-        while not shutdown:
+        while not shutdown and scraper.is_alive():
+            _, snapshot = buffer.latest()
+            live.update(dashboard.render(snapshot, args.category))
+            # Wake up early on a keypress so navigation feels immediate
             try:
-                snapshot = scrape_cycle(client)
-                live.update(dashboard.render(snapshot, args.category))
-                logger.info(
-                    "Scraped %d events, %d markets in %.1fs",
-                    snapshot.total_events,
-                    snapshot.total_markets,
-                    snapshot.fetch_duration_seconds,
-                )
-
-                if args.export:
-                    csv_path = exporter.export_csv(snapshot)
-                    json_path = exporter.export_json(snapshot)
-                    logger.info("Exported: %s, %s", csv_path, json_path)
-
-                if args.export_excel:
-                    xlsx_path = exporter.export_excel(snapshot)
-                    logger.info("Exported Excel: %s", xlsx_path)
-
-                # Wait with 1-second granularity for responsive shutdown
-                for _ in range(args.interval):
-                    if shutdown:
-                        break
-                    time.sleep(1)
-
-            except Exception as e:
-                logger.error("Scrape cycle failed: %s", e, exc_info=True)
-                time.sleep(5)
+                key = keys.get(timeout=1)
+            except queue.Empty:
+                continue
+            if key == "quit":
+                shutdown = True
+            else:
+                dashboard.handle_key(key)
+
+    if key_reader:
+        key_reader.stop()
+        key_reader.join()
 
+    if client.player:
+        client.player.close()
+    scraper.stop()
+    scraper.join()
+    for worker in (export_worker, changelog_worker):
+        if worker:
+            worker.stop()
+            worker.join()
+    if history:
+        history.close()
+    if changelog:
+        changelog.close()
+    if alerts:
+        alerts.close()
+    if pool:
+        pool.close()
+    write_stats()
     print("\nShutdown complete. Goodbye.")
 
 
@@ -0,0 +1,316 @@
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+                   1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str],
+                   extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}",
+                f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, optionally split by labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} "
+                         f"{_format_value(value)}")
+        return lines
+
+    def to_dict(self):
+        with self._lock:
+            return {",".join(k) or "": v for k, v in self._values.items()}
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with a running sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((k, ([*s[0]], s[1], s[2]))
+                           for k, s in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def to_dict(self):
+        with self._lock:
+            return {",".join(k) or "": {"count": s[2], "sum": s[1],
+                                        "avg": s[1] / s[2] if s[2] else 0.0}
+                    for k, s in self._series.items()}
+
+
+class Registry:
+    """Holds every metric for exposition in Prometheus text or JSON."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str,
+                labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str,
+              labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> dict:
+        return {name: m.to_dict() for name, m in self._metrics.items()}
+
+    def write_json(self, path: str) -> None:
+        """Write all metrics as JSON, replacing ``path`` atomically."""
+        tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"updated_at": time.time(), "metrics": self.to_dict()},
+                      f, indent=2)
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+
+# ── API client ──
+REQUEST_SECONDS = REGISTRY.histogram(
+    "gamma_request_seconds", "Gamma API request latency by status",
+    ("endpoint", "status"))
+REQUEST_RETRIES = REGISTRY.counter(
+    "gamma_request_retries_total", "Gamma API request retries by reason",
+    ("reason",))
+RATE_LIMITED = REGISTRY.counter(
+    "gamma_rate_limited_total", "Gamma API 429 responses")
+RESPONSE_BYTES = REGISTRY.counter(
+    "gamma_response_bytes_total",
+    "Response body bytes, as sent (wire) and decoded", ("kind",))
+RATE_LIMIT = REGISTRY.gauge(
+    "gamma_rate_limit_per_second", "Current adaptive request rate cap")
+
+# ── Parsing ──
+PAGE_PARSE_SECONDS = REGISTRY.histogram(
+    "snapshot_page_parse_seconds", "Time to parse one page of events",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+SNAPSHOT_SECONDS = REGISTRY.histogram(
+    "snapshot_cycle_seconds", "Fetch + parse time of a scrape cycle")
+TIER_REFRESH_SECONDS = REGISTRY.histogram(
+    "tier_refresh_seconds", "Fetch + merge time of a hot/warm tier refresh",
+    ("tiers",))
+TIER_SIZE = REGISTRY.gauge(
+    "tier_size", "Events assigned to each refresh tier", ("tier",))
+CYCLE_LAG_SECONDS = REGISTRY.gauge(
+    "scrape_cycle_lag_seconds", "How late the last cycle started")
+SNAPSHOT_SIZE = REGISTRY.gauge(
+    "snapshot_size", "Events and markets in the last snapshot", ("kind",))
+
+# ── Alerts ──
+ALERTS_FIRED = REGISTRY.counter(
+    "alerts_fired_total", "Alerts sent to the sinks by rule kind", ("kind",))
+ALERTS_SUPPRESSED = REGISTRY.counter(
+    "alerts_suppressed_total", "Alerts dropped by the cooldown by rule kind",
+    ("kind",))
+
+# ── Export / display ──
+EXPORT_SECONDS = REGISTRY.histogram(
+    "export_seconds", "Time to write one export format", ("format",))
+EXPORT_STORE_BYTES = REGISTRY.gauge(
+    "export_store_bytes", "Bytes of exports and archives on disk")
+RENDER_SECONDS = REGISTRY.histogram(
+    "dashboard_render_seconds", "Time to build the dashboard renderable",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1",
+                         registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve ``registry`` in Prometheus text format at ``/metrics`` on a
+    daemon thread."""
+    handler = type("MetricsHandler", (_MetricsHandler,),
+                   {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics",
+                     daemon=True).start()
+    logger.info("Metrics at http://%s:%d/metrics", host,
+                server.server_address[1])
+    return server
+
+
+class CycleProfiler:
+    """Profiles one scrape cycle with cProfile and tracemalloc.
+
+    Wrap every cycle with :meth:`run`; the ``cycle``-th call (1-based) is
+    profiled and dumped to ``<directory>/cycle<N>.prof`` (load with
+    ``pstats``/snakeviz) and ``cycle<N>_memory.txt`` (top allocations).
+    """
+
+    def __init__(self, cycle: int, directory: str, top: int = 25):
+        self.cycle = cycle
+        self.directory = directory
+        self.top = top
+        self._count = 0
+
+    def run(self, fn: Callable[[], T]) -> T:
+        self._count += 1
+        if self._count != self.cycle:
+            return fn()
+
+        os.makedirs(self.directory, exist_ok=True)
+        profiler = cProfile.Profile()
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        profiler.enable()
+        try:
+            return fn()
+        finally:
+            profiler.disable()
+            memory = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+            self._dump(profiler, memory, peak)
+
+    def _dump(self, profiler: cProfile.Profile,
+              memory: tracemalloc.Snapshot, peak: int) -> None:
+        base = os.path.join(self.directory, f"cycle{self.cycle}")
+        profiler.dump_stats(f"{base}.prof")
+        with open(f"{base}_memory.txt", "w", encoding="utf-8") as f:
+            f.write(f"Peak traced memory: {peak / 1e6:.1f} MB\n\n")
+            for stat in memory.statistics("lineno")[:self.top]:
+                f.write(f"{stat}\n")
+        logger.info("Profile of cycle %d written to %s.prof",
+                    self.cycle, base)
@@ -1,21 +1,25 @@
+import sys
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 
+# __slots__ drop the per-instance __dict__ (dataclass(slots=...) needs 3.10+)
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class Tag:
     id: str
     label: str
     slug: str
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Market:
     id: str
     question: str
     slug: str
     outcomes: List[str]
-    outcome_prices: List[str]
+    outcome_prices: Sequence[float]  # array('d'), one float per outcome
     volume: float
     volume_24hr: float
     liquidity: float
@@ -32,7 +36,7 @@ class Market:
     created_at: Optional[str] = None
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Event:
     id: str
     title: str
@@ -50,6 +54,26 @@ class Event:
     end_date: Optional[str]
     description: str = ""
     created_at: Optional[str] = None
+    # Derived once in DataProcessor.parse_event for display/export
+    top_market_index: int = -1
+    top_outcome: str = ""
+    top_price: Optional[float] = None
+    oracle_type: str = ""
+    short_url: str = ""
+
+    @property
+    def top_market(self) -> Optional[Market]:
+        """Highest-volume market, or None for an event without markets."""
+        if self.top_market_index < 0:
+            return None
+        return self.markets[self.top_market_index]
+
+
+@dataclass
+class SnapshotDelta:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -61,3 +85,14 @@ class ScraperSnapshot:
     total_volume: float
     categories: dict = field(default_factory=dict)
     fetch_duration_seconds: float = 0.0
+    delta: Optional[SnapshotDelta] = None
+    captured_at: float = 0.0          # epoch seconds when finalized
+    cycle_lag_seconds: float = 0.0    # late start vs. the refresh schedule
+    # event id -> epoch seconds its data was last fetched from the API
+    refreshed_at: Dict[str, float] = field(default_factory=dict)
+    # True for a tier refresh merged into the last full sweep
+    partial: bool = False
+    # columnar.SnapshotColumns, built lazily by columnar.snapshot_columns()
+    columns: Optional[Any] = field(default=None, repr=False, compare=False)
+    # snapshot_index.SnapshotIndex, built lazily by snapshot_index()
+    index: Optional[Any] = field(default=None, repr=False, compare=False)
@@ -0,0 +1,204 @@
+"""Parse raw events on a persistent process pool.
+
+The parent ships each batch as one bytes payload: the events re-encoded
+as JSON by msgspec (or pickled dicts without it). Workers decode and run
+the normal single-process parse, then send the batch back in columns:
+one list per Market field across all of the batch's markets, with the
+outcome prices flattened into a single ``array('d')``, and one small
+tuple per event. Descriptions, most of an event's bytes, are left out;
+the parent still holds them in the raw events. Per-object tuples (and
+an ``array`` per market) cost the parent more to unpickle and rebuild
+than parsing in-process; columns unpickle in bulk and the parent builds
+all Markets with one ``map(Market, *columns)``, re-interning the strings
+that repeat across batches. SnapshotBuilder keeps deduplication, the
+EventCache check, ordering and category bucketing in the parent.
+
+``python -m benchmarks.parse_pool`` measures the parent's share against
+an in-process parse and the worker count the pool needs to break even.
+"""
+import logging
+import pickle
+import signal
+from array import array
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import fields
+from itertools import accumulate, chain
+from operator import attrgetter
+from typing import List, Tuple
+
+from config import PARSE_POOL_MIN_EVENTS
+from data_processor import _intern, _parse, _shared_tag
+from models import Event, Market
+from typed_decode import decode_event_page, msgspec
+
+logger = logging.getLogger(__name__)
+
+# Fields sent back by the workers; descriptions come from the raw events
+_MARKET_FIELDS = tuple(f.name for f in fields(Market)
+                       if f.name != "description")
+_EVENT_FIELDS = tuple(f.name for f in fields(Event)
+                      if f.name != "description")
+_MARKET_DESCRIPTION = [f.name for f in fields(Market)].index("description")
+_EVENT_DESCRIPTION = [f.name for f in fields(Event)].index("description")
+_MARKET_VALUES = attrgetter(*_MARKET_FIELDS)
+_TAGS = _EVENT_FIELDS.index("tags")
+_MARKETS = _EVENT_FIELDS.index("markets")
+_OUTCOMES = _MARKET_FIELDS.index("outcomes")
+_PRICES = _MARKET_FIELDS.index("outcome_prices")
+# Low-cardinality strings shared across events once interned again
+_INTERNED_MARKET = tuple(_MARKET_FIELDS.index(n) for n in (
+    "resolved_by", "oracle_type", "oracle_link"))
+_INTERNED_EVENT = tuple(_EVENT_FIELDS.index(n) for n in (
+    "category", "top_outcome", "oracle_type"))
+
+if msgspec is not None:
+    _ENCODER = msgspec.json.Encoder()
+
+
+def _encode(raws: list) -> Tuple[bool, bytes]:
+    """(is JSON, payload) for a batch of raw dicts or RawEvents."""
+    if msgspec is not None:
+        return True, _ENCODER.encode(raws)
+    return False, pickle.dumps(raws, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(is_json: bool, payload: bytes) -> list:
+    return decode_event_page(payload) if is_json else pickle.loads(payload)
+
+
+def _pack(events: List[Event]) -> tuple:
+    """(event rows, market columns) of a parsed batch; an event row holds
+    its market count in place of the markets."""
+    rows = []
+    for event in events:
+        row = [getattr(event, name) for name in _EVENT_FIELDS]
+        row[_TAGS] = tuple((t.id, t.label, t.slug) for t in event.tags)
+        row[_MARKETS] = len(event.markets)
+        rows.append(tuple(row))
+    markets = [m for event in events for m in event.markets]
+    columns = ([list(c) for c in zip(*map(_MARKET_VALUES, markets))]
+               if markets else [[] for _ in _MARKET_FIELDS])
+    prices = columns[_PRICES]
+    columns[_PRICES] = (array("d", chain.from_iterable(prices)),
+                        [len(p) for p in prices])
+    return rows, columns
+
+
+def _interned(values: list) -> list:
+    """``values`` with every string interned; the workers' pickles share
+    each distinct string, so only the distinct ones are looked up."""
+    shared = {v: _intern(v) for v in set(values)}
+    return list(map(shared.__getitem__, values))
+
+
+def _unpack(packed: tuple, raws: list) -> List[Event]:
+    """Events of a packed batch, with the descriptions of ``raws``."""
+    rows, columns = packed
+    flat, counts = columns[_PRICES]
+    columns[_PRICES] = [flat[end - n:end]
+                        for end, n in zip(accumulate(counts), counts)]
+    outcomes = columns[_OUTCOMES]
+    shared = {o: _intern(o) for o in set(chain.from_iterable(outcomes))}
+    columns[_OUTCOMES] = [list(map(shared.__getitem__, o)) for o in outcomes]
+    for i in _INTERNED_MARKET:
+        columns[i] = _interned(columns[i])
+    if raws and isinstance(raws[0], dict):
+        descriptions = [m.get("description", "") for raw in raws
+                        for m in raw.get("markets", [])]
+    else:
+        descriptions = [m.description for raw in raws for m in raw.markets]
+    columns.insert(_MARKET_DESCRIPTION, descriptions)
+    markets = list(map(Market, *columns))
+
+    tags = {}
+    event_columns = [list(c) for c in zip(*rows)] if rows else []
+    for i in _INTERNED_EVENT:
+        event_columns[i] = _interned(event_columns[i])
+    events = []
+    start = 0
+    for values, raw in zip(zip(*event_columns), raws):
+        values = list(values)
+        end = start + values[_MARKETS]
+        values[_MARKETS] = markets[start:end]
+        start = end
+        values[_TAGS] = [tags.get(t) or tags.setdefault(t, _shared_tag(*t))
+                         for t in values[_TAGS]]
+        values.insert(_EVENT_DESCRIPTION, raw.get("description", "")
+                      if isinstance(raw, dict) else raw.description)
+        events.append(Event(*values))
+    return events
+
+
+def _parse_chunk(is_json: bool, payload: bytes) -> tuple:
+    return _pack([_parse(raw) for raw in _decode(is_json, payload)])
+
+
+def _init_worker() -> None:
+    # Ctrl+C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _noop() -> None:
+    pass
+
+
+class ParsePool:
+    """Process pool for parsing raw events, kept alive across cycles.
+
+    Create it early, before other threads start: the worker processes are
+    started right away so no cycle pays for them. ``min_events`` is the
+    smallest batch worth shipping to the pool; SnapshotBuilder parses
+    anything smaller in-process, so small snapshots (and cycles where the
+    EventCache leaves little to parse) never touch the pool.
+    """
+
+    def __init__(self, workers: int, min_events: int = PARSE_POOL_MIN_EVENTS):
+        self.workers = max(1, workers)
+        self.min_events = max(1, min_events)
+        self._executor = None
+        self._start()
+
+    def _start(self) -> None:
+        self._executor = ProcessPoolExecutor(self.workers,
+                                             initializer=_init_worker)
+        for future in [self._executor.submit(_noop)
+                       for _ in range(self.workers)]:
+            future.result()
+
+    def _discard(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, raws: list) -> Future:
+        """Start parsing ``raws`` (dicts or typed RawEvents). If the pool
+        is broken, the returned future fails and :meth:`result` parses
+        ``raws`` in-process."""
+        if self._executor is None:
+            self._start()
+        try:
+            return self._executor.submit(_parse_chunk, *_encode(raws))
+        except BrokenProcessPool as e:
+            self._discard()
+            future = Future()
+            future.set_exception(e)
+            return future
+
+    def result(self, future: Future, raws: list) -> List[Event]:
+        """Events parsed by ``future``, in ``raws`` order. If the pool broke
+        (e.g. a worker was killed), ``raws`` are parsed in-process instead
+        and the pool is restarted on the next submit."""
+        try:
+            packed = future.result()
+        except BrokenProcessPool:
+            logger.warning("Parse pool broke; parsing %d events in-process",
+                           len(raws))
+            self._discard()
+            return [_parse(raw) for raw in raws]
+        return _unpack(packed, raws)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,147 @@
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+@dataclass
+class RateLimiterStats:
+    """Limiter counters since they were last taken, plus the current rate."""
+    rate: float = 0.0
+    throttled_seconds: float = 0.0   # time callers spent waiting for tokens
+    retries: int = 0
+    rate_limited: int = 0            # 429 responses reported
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or an
+    HTTP date), or None if absent or unparseable."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class RateLimiter:
+    """Token bucket whose rate adapts to the server (AIMD).
+
+    Every request takes a token; tokens refill at ``rate`` per second up
+    to ``burst``. A 429 halves the rate (down to ``min_rate``) and, with a
+    Retry-After, pauses all callers until it has passed; each success
+    adds ``recovery_step`` back, up to ``max_rate``. With ``max_rate`` 0
+    there is no token limit, but Retry-After pauses still apply.
+
+    Tokens are reserved under a plain lock that is never held across a
+    wait, so one limiter can be shared by threads and asyncio tasks.
+    """
+
+    def __init__(self, max_rate: float, burst: float = 1.0,
+                 min_rate: float = 1.0, decrease_factor: float = 0.5,
+                 recovery_step: float = 0.5, backoff_base: float = 1.0,
+                 backoff_cap: float = 30.0):
+        self.max_rate = max_rate
+        self.burst = max(1.0, burst)
+        self.min_rate = min(min_rate, max_rate) if max_rate > 0 else 0.0
+        self.decrease_factor = decrease_factor
+        self.recovery_step = recovery_step
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.rate = max_rate
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._stats = RateLimiterStats()
+
+    def _reserve(self) -> float:
+        """Take a token; return how long the caller must wait before using
+        it."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self.rate > 0:
+                if now > self._stamp:
+                    self._tokens = min(
+                        self.burst,
+                        self._tokens + (now - self._stamp) * self.rate)
+                    self._stamp = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.rate)
+            if wait > 0:
+                self._stats.throttled_seconds += wait
+            return wait
+
+    def _pause_remaining(self) -> float:
+        with self._lock:
+            remaining = self._paused_until - time.monotonic()
+            if remaining > 0:
+                self._stats.throttled_seconds += remaining
+            return remaining
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        wait = self._reserve()
+        while wait > 0:
+            time.sleep(wait)
+            # A Retry-After may have arrived while we slept
+            wait = self._pause_remaining()
+
+    async def acquire_async(self) -> None:
+        """Asyncio counterpart of :meth:`acquire`."""
+        wait = self._reserve()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._pause_remaining()
+
+    def on_success(self) -> None:
+        """Additive increase after a request the server accepted."""
+        if self.max_rate <= 0 or self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease after a 429; honor Retry-After for every
+        caller sharing this limiter."""
+        with self._lock:
+            self._stats.rate_limited += 1
+            if self.max_rate > 0:
+                self.rate = max(self.min_rate,
+                                self.rate * self.decrease_factor)
+            if retry_after:
+                self._paused_until = max(self._paused_until,
+                                         time.monotonic() + retry_after)
+
+    def backoff(self, attempt: int,
+                retry_after: Optional[float] = None) -> float:
+        """Delay before retry ``attempt`` (0-based), counted as a retry.
+
+        The server's Retry-After plus up to ``backoff_base`` of jitter when
+        given, so paused callers don't all resume at once; otherwise
+        full-jitter exponential backoff.
+        """
+        with self._lock:
+            self._stats.retries += 1
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.backoff_base)
+        ceiling = min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    def take_stats(self) -> RateLimiterStats:
+        """Return the counters (with the current rate) and reset them."""
+        with self._lock:
+            stats, self._stats = self._stats, RateLimiterStats()
+            stats.rate = self.rate
+        return stats
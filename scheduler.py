@@ -0,0 +1,200 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from api_client import GammaAPIClient
+from background import ScraperThread, SnapshotBuffer
+from config import (REFRESH_INTERVAL_SECONDS, HOT_REFRESH_SECONDS,
+                    WARM_REFRESH_SECONDS, HOT_VOLUME_24HR, WARM_VOLUME_24HR,
+                    HOT_ENDS_WITHIN_SECONDS, WARM_ENDS_WITHIN_SECONDS,
+                    HOT_PRICE_MOVE, MAX_HOT_EVENTS, MAX_WARM_EVENTS)
+from data_processor import EventCache, SnapshotBuilder, _epoch
+from metrics import TIER_REFRESH_SECONDS, TIER_SIZE
+from models import Event, ScraperSnapshot
+
+logger = logging.getLogger(__name__)
+
+HOT = "hot"
+WARM = "warm"
+COLD = "cold"
+
+
+@dataclass
+class TierPolicy:
+    """Thresholds and cadences of the refresh tiers (see config.py)."""
+    sweep_interval: float = REFRESH_INTERVAL_SECONDS
+    hot_interval: float = HOT_REFRESH_SECONDS
+    warm_interval: float = WARM_REFRESH_SECONDS
+    hot_volume_24hr: float = HOT_VOLUME_24HR
+    warm_volume_24hr: float = WARM_VOLUME_24HR
+    hot_ends_within: float = HOT_ENDS_WITHIN_SECONDS
+    warm_ends_within: float = WARM_ENDS_WITHIN_SECONDS
+    hot_price_move: float = HOT_PRICE_MOVE
+    max_hot: int = MAX_HOT_EVENTS
+    max_warm: int = MAX_WARM_EVENTS
+
+
+def assign_tiers(events: List[Event], policy: TierPolicy,
+                 moving: set, now: float) -> Dict[str, List[str]]:
+    """Event ids of the hot and warm tiers, highest 24h volume first.
+
+    Overflow past ``max_hot`` drops to warm and past ``max_warm`` to cold,
+    i.e. to the full sweep only.
+    """
+    hot, warm = [], []
+    for event in events:
+        ends = _epoch(event.end_date)
+        ends_in = ends - now if ends is not None else None
+        if (event.volume_24hr >= policy.hot_volume_24hr
+                or event.id in moving
+                or (ends_in is not None
+                    and 0 <= ends_in <= policy.hot_ends_within)):
+            hot.append(event)
+        elif (event.volume_24hr >= policy.warm_volume_24hr
+              or (ends_in is not None
+                  and 0 <= ends_in <= policy.warm_ends_within)):
+            warm.append(event)
+
+    def by_volume(e: Event) -> float:
+        return -e.volume_24hr
+
+    hot.sort(key=by_volume)
+    warm.extend(hot[policy.max_hot:])
+    warm.sort(key=by_volume)
+    return {HOT: [e.id for e in hot[:policy.max_hot]],
+            WARM: [e.id for e in warm[:policy.max_warm]]}
+
+
+class RefreshScheduler:
+    """Decides what to fetch next: a full sweep or a tier refresh.
+
+    ``sweep`` is the usual full scrape cycle. Between sweeps, the hot and
+    warm tiers are re-fetched by id every ``hot_interval`` /
+    ``warm_interval`` seconds and merged into the latest snapshot
+    (``SnapshotBuilder.merge``), so one snapshot is continuously updated
+    and its ``refreshed_at`` records when each event was last fetched.
+    Tiers are reassigned after every sweep and refresh.
+    """
+
+    def __init__(self, client: GammaAPIClient,
+                 sweep: Callable[[], Optional[ScraperSnapshot]],
+                 cache: EventCache, policy: TierPolicy = None, pool=None):
+        self.client = client
+        self.sweep = sweep
+        self.cache = cache
+        self.policy = policy or TierPolicy()
+        self.pool = pool
+        self.tiers: Dict[str, List[str]] = {HOT: [], WARM: []}
+        self._snapshot: Optional[ScraperSnapshot] = None
+        self._prices: Dict[str, Optional[float]] = {}
+        self._moving: set = set()
+        self.exhausted = False
+        now = time.monotonic()
+        self._due = {COLD: now, HOT: now, WARM: now}
+
+    def _interval(self, tier: str) -> float:
+        return {COLD: self.policy.sweep_interval,
+                HOT: self.policy.hot_interval,
+                WARM: self.policy.warm_interval}[tier]
+
+    def next_due(self) -> float:
+        """Monotonic time of the next job."""
+        if self._snapshot is None:
+            return self._due[COLD]
+        return min(self._due.values())
+
+    def _observe(self, events: List[Event], sweep: bool) -> None:
+        """Track top-price moves; a full sweep starts a fresh move window
+        (and forgets events that are gone)."""
+        last_prices = self._prices
+        if sweep:
+            self._moving = set()
+            self._prices = {}
+        for event in events:
+            last = last_prices.get(event.id)
+            price = event.top_price
+            self._prices[event.id] = price
+            if (last is not None and price is not None
+                    and abs(price - last) >= self.policy.hot_price_move):
+                self._moving.add(event.id)
+
+    def _retier(self, snapshot: ScraperSnapshot) -> None:
+        self.tiers = assign_tiers(snapshot.events, self.policy,
+                                  self._moving, time.time())
+        for tier in (HOT, WARM):
+            TIER_SIZE.set(len(self.tiers[tier]), tier=tier)
+        TIER_SIZE.set(snapshot.total_events - len(self.tiers[HOT])
+                      - len(self.tiers[WARM]), tier=COLD)
+
+    def run_due(self) -> Optional[ScraperSnapshot]:
+        """Run the job that is due; the merged snapshot, or None if a
+        tier refresh failed or had nothing to fetch. A full sweep returning
+        None marks the scheduler ``exhausted``."""
+        now = time.monotonic()
+        if self._snapshot is None or now >= self._due[COLD]:
+            self._due[COLD] = now + self.policy.sweep_interval
+            # The sweep fetched every tier too
+            self._due[HOT] = now + self.policy.hot_interval
+            self._due[WARM] = now + self.policy.warm_interval
+            snapshot = self.sweep()
+            if snapshot is None:
+                self.exhausted = True
+                return None
+            self._observe(snapshot.events, sweep=True)
+            self._retier(snapshot)
+            self._snapshot = snapshot
+            return snapshot
+
+        due = [tier for tier in (HOT, WARM) if now >= self._due[tier]]
+        for tier in due:
+            self._due[tier] = now + self._interval(tier)
+        ids = [eid for tier in due for eid in self.tiers[tier]]
+        if not ids:
+            return None
+        label = "+".join(due)
+        with TIER_REFRESH_SECONDS.time(tiers=label):
+            start = time.time()
+            raw_events = self.client.fetch_events_by_id(ids)
+            if raw_events is None:
+                logger.warning("Refresh of %s tier failed", label)
+                return None
+            builder = SnapshotBuilder(self.cache, self.pool)
+            builder.add_page(raw_events)
+            snapshot = builder.merge(self._snapshot, ids,
+                                     time.time() - start)
+        fresh = set(ids)
+        self._observe([e for e in snapshot.events if e.id in fresh],
+                      sweep=False)
+        self._retier(snapshot)
+        self._snapshot = snapshot
+        logger.debug("Refreshed %d %s events in %.2fs: %d changed, "
+                     "%d removed", len(ids), label,
+                     snapshot.fetch_duration_seconds,
+                     len(snapshot.delta.changed), len(snapshot.delta.removed))
+        return snapshot
+
+
+class TieredScraperThread(ScraperThread):
+    """ScraperThread driven by a RefreshScheduler instead of one interval.
+
+    Publishes every sweep and every tier refresh; ``cycle_lag_seconds`` is
+    how late the job started. Ends when a sweep returns None.
+    """
+
+    def __init__(self, scheduler: RefreshScheduler, buffer: SnapshotBuffer,
+                 on_snapshot: Optional[Callable[[ScraperSnapshot], None]] = None):
+        super().__init__(scheduler.run_due, scheduler.policy.sweep_interval,
+                         buffer, on_snapshot)
+        self.scheduler = scheduler
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            due = self.scheduler.next_due()
+            wait = due - time.monotonic()
+            if wait > 0:
+                self._stop_event.wait(wait)
+                continue
+            self._run_cycle(self.scheduler.run_due, -wait)
+            if self.scheduler.exhausted:
+                return
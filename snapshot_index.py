@@ -0,0 +1,171 @@
+from functools import cached_property
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from columnar import snapshot_columns
+from data_processor import _epoch
+from models import Event, ScraperSnapshot
+
+# Event orderings: the amounts descending, end_date soonest first
+SORT_KEYS = ("volume", "volume_24hr", "liquidity", "market_count",
+             "end_date")
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _positions(groups: Dict[str, List[int]]) -> Dict[str, np.ndarray]:
+    return {key: np.array(positions, dtype=np.int64)
+            for key, positions in sorted(groups.items())}
+
+
+def _end_epoch(event: Event) -> float:
+    """End time for ordering; events without one sort last."""
+    end = _epoch(event.end_date)
+    return np.inf if end is None else end
+
+
+class SnapshotIndex:
+    """Secondary indexes over one ScraperSnapshot, built once per snapshot.
+
+    Hash indexes map a category, tag slug, oracle type or resolver address
+    to the positions of its events in ``snapshot.events`` (ascending, so in
+    snapshot order); an event is listed under every tag it carries and
+    every resolver of its markets. Each sort key has a presorted ordering
+    of all positions and its inverse (the rank of each position), so a
+    filtered query intersects the smallest hash buckets first and orders
+    only the events that are left. Ties keep snapshot order.
+
+    The category and oracle indexes are built up front; the tag and
+    resolver indexes and each ordering on first use, so a dashboard that
+    only filters by category never pays for the others.
+    """
+
+    def __init__(self, snapshot: ScraperSnapshot):
+        self.snapshot = snapshot
+        self.events = snapshot.events
+        self.position: Dict[str, int] = {}
+        categories: Dict[str, List[int]] = {}
+        oracles: Dict[str, List[int]] = {}
+        for i, event in enumerate(self.events):
+            self.position[event.id] = i
+            categories.setdefault(event.category, []).append(i)
+            oracles.setdefault(event.oracle_type or "Unknown", []).append(i)
+        self.by_category = _positions(categories)
+        self.by_oracle = _positions(oracles)
+        self._orders: Dict[str, np.ndarray] = {}
+        self._ranks: Dict[str, np.ndarray] = {}
+        self._filtered: Dict[tuple, np.ndarray] = {}
+
+    @cached_property
+    def by_tag(self) -> Dict[str, np.ndarray]:
+        tags: Dict[str, List[int]] = {}
+        for i, event in enumerate(self.events):
+            for slug in {t.slug for t in event.tags if t.slug}:
+                tags.setdefault(slug, []).append(i)
+        return _positions(tags)
+
+    @cached_property
+    def by_resolver(self) -> Dict[str, np.ndarray]:
+        resolvers: Dict[str, List[int]] = {}
+        for i, event in enumerate(self.events):
+            for address in {m.resolved_by for m in event.markets
+                            if m.resolved_by}:
+                resolvers.setdefault(address, []).append(i)
+        return _positions(resolvers)
+
+    def order(self, key: str) -> np.ndarray:
+        """Positions of all events in ``key`` order."""
+        order = self._orders.get(key)
+        if order is None:
+            if key not in SORT_KEYS:
+                raise ValueError(f"Unknown sort key: {key}")
+            if key == "end_date":
+                ends = np.fromiter(map(_end_epoch, self.events),
+                                   np.float64, len(self.events))
+                order = np.argsort(ends, kind="stable")
+            else:
+                values = getattr(snapshot_columns(self.snapshot), key)
+                order = np.argsort(-values, kind="stable")
+            self._orders[key] = order
+        return order
+
+    def _rank(self, key: str) -> np.ndarray:
+        rank = self._ranks.get(key)
+        if rank is None:
+            order = self.order(key)
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            self._ranks[key] = rank
+        return rank
+
+    def _matching(self, category: Optional[str], tag: Optional[str],
+                  oracle: Optional[str],
+                  resolver: Optional[str]) -> Optional[np.ndarray]:
+        """Positions passing every given filter, ascending; None if no
+        filter is given."""
+        buckets = []
+        if category is not None:
+            buckets.append(self.by_category.get(category, _EMPTY))
+        if tag is not None:
+            buckets.append(self.by_tag.get(tag, _EMPTY))
+        if oracle is not None:
+            buckets.append(self.by_oracle.get(oracle, _EMPTY))
+        if resolver is not None:
+            buckets.append(self.by_resolver.get(resolver, _EMPTY))
+        if not buckets:
+            return None
+        buckets.sort(key=len)
+        matching = buckets[0]
+        for bucket in buckets[1:]:
+            if not len(matching):
+                break
+            matching = np.intersect1d(matching, bucket, assume_unique=True)
+        return matching
+
+    def ordered(self, key: str = "volume_24hr", category: str = None,
+                tag: str = None, oracle: str = None,
+                resolver: str = None) -> np.ndarray:
+        """Positions of the matching events in ``key`` order."""
+        filters = (category, tag, oracle, resolver)
+        cache_key = (key,) + filters
+        order = self._filtered.get(cache_key)
+        if order is None:
+            matching = self._matching(*filters)
+            if matching is None:
+                order = self.order(key)
+            else:
+                order = matching[np.argsort(self._rank(key)[matching])]
+            self._filtered[cache_key] = order
+        return order
+
+    def query(self, key: str = "volume_24hr", n: Optional[int] = None,
+              offset: int = 0, category: str = None, tag: str = None,
+              oracle: str = None, resolver: str = None) -> List[Event]:
+        """Up to ``n`` matching events (all by default) in ``key`` order,
+        skipping the first ``offset``."""
+        order = self.ordered(key, category, tag, oracle, resolver)
+        stop = None if n is None else offset + n
+        return [self.events[i] for i in order[offset:stop]]
+
+    def count(self, category: str = None, tag: str = None,
+              oracle: str = None, resolver: str = None) -> int:
+        matching = self._matching(category, tag, oracle, resolver)
+        return len(self.events) if matching is None else len(matching)
+
+    def get(self, event_id: str) -> Optional[Event]:
+        i = self.position.get(event_id)
+        return None if i is None else self.events[i]
+
+    def event_ids_by_category(self) -> Dict[str, List[str]]:
+        """Category -> ids of its events, categories sorted by name."""
+        events = self.events
+        return {category: [events[i].id for i in positions]
+                for category, positions in self.by_category.items()}
+
+
+def snapshot_index(snapshot: ScraperSnapshot) -> SnapshotIndex:
+    """Index of ``snapshot``, built on first use and cached on it."""
+    if snapshot.index is None:
+        snapshot.index = SnapshotIndex(snapshot)
+    return snapshot.index
@@ -0,0 +1,191 @@
+"""Typed decoding of Gamma ``/events`` pages straight from response bytes.
+
+With msgspec installed, a page is decoded into slim structs holding only
+the fields DataProcessor reads, skipping the dozens of unused keys every
+event and market carries. The string-encoded ``outcomes`` /
+``outcomePrices`` arrays are decoded by msgspec too, once the event is
+parsed. ``RawEvent.parse`` then builds the same Event that
+``DataProcessor.parse_event`` builds from the equivalent dict. Pages that don't fit the schema fall back to plain
+``json.loads`` dicts, which SnapshotBuilder handles as before.
+"""
+import json
+import logging
+from array import array
+from typing import Callable, List, Optional, Union
+
+try:
+    import msgspec
+except ImportError:  # optional typed JSON decoder
+    msgspec = None
+
+from config import JSON_DECODER
+from data_processor import DataProcessor, _price_array, _shared_tag
+from models import Event
+
+logger = logging.getLogger(__name__)
+
+
+if msgspec is not None:
+    _Struct = msgspec.Struct
+    _field = msgspec.field
+    _ANY = msgspec.json.Decoder()
+    # strict=False parses the quoted prices ("0.52") in C
+    _PRICE_LIST = msgspec.json.Decoder(List[float], strict=False)
+else:
+    class _Struct:
+        def __init_subclass__(cls, **kwargs):
+            pass
+
+    def _field(*, name=None, default=None):
+        return default
+
+
+def _outcomes(value) -> list:
+    if isinstance(value, str):
+        try:
+            value = _ANY.decode(value)
+        except msgspec.DecodeError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+def _prices(value) -> array:
+    # Mirrors DataProcessor.parse_market: a bad string (or a null) gives
+    # no prices, an unparseable entry a NaN price
+    if isinstance(value, str):
+        try:
+            return array("d", _PRICE_LIST.decode(value))
+        except msgspec.DecodeError:
+            try:
+                value = _ANY.decode(value)
+            except msgspec.DecodeError:
+                return array("d")
+    return _price_array(value)
+
+
+# gc=False: decoded payloads hold no reference cycles, and untracked
+# structs keep the collector from rescanning every page
+class RawTag(_Struct, rename="camel", gc=False):
+    id: Union[str, int, None] = ""
+    label: Optional[str] = ""
+    slug: Optional[str] = ""
+
+
+class RawMarket(_Struct, rename="camel", gc=False):
+    id: Union[str, int, None] = ""
+    question: Optional[str] = ""
+    slug: Optional[str] = ""
+    # Usually JSON-encoded strings; decoded in parse() so events reused
+    # from the EventCache never pay for them
+    outcomes: Union[List[str], str, None] = []
+    outcome_prices: Union[List[Union[str, float]], str, None] = []
+    volume_num: Optional[float] = None
+    volume: Optional[float] = None
+    volume_24hr: Optional[float] = _field(name="volume24hr", default=None)
+    liquidity: Optional[float] = None
+    active: Optional[bool] = False
+    closed: Optional[bool] = False
+    end_date: Optional[str] = None
+    description: Optional[str] = ""
+    resolved_by: Optional[str] = None
+    uma_bond: Optional[float] = None
+    uma_reward: Optional[float] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    def parse(self, event_slug: str):
+        return DataProcessor.build_market(
+            id=self.id,
+            question=self.question,
+            slug=self.slug,
+            outcomes=_outcomes(self.outcomes),
+            outcome_prices=_prices(self.outcome_prices),
+            volume=self.volume_num or self.volume or 0.0,
+            volume_24hr=self.volume_24hr or 0.0,
+            liquidity=self.liquidity or 0.0,
+            active=self.active,
+            closed=self.closed,
+            end_date=self.end_date,
+            description=self.description,
+            resolved_by=self.resolved_by or "",
+            uma_bond=self.uma_bond,
+            uma_reward=self.uma_reward,
+            created_at=self.created_at,
+            event_slug=event_slug,
+        )
+
+
+class RawEvent(_Struct, rename="camel", gc=False):
+    id: Union[str, int, None] = ""
+    title: Optional[str] = ""
+    slug: Optional[str] = ""
+    active: Optional[bool] = False
+    closed: Optional[bool] = False
+    tags: List[RawTag] = []
+    markets: List[RawMarket] = []
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    description: Optional[str] = ""
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    @property
+    def event_id(self) -> str:
+        return str(self.id)
+
+    def parse(self) -> Event:
+        """Same Event as ``DataProcessor.parse_event`` on the dict."""
+        slug = self.slug
+        return DataProcessor.build_event(
+            id=str(self.id),
+            title=self.title,
+            slug=slug,
+            active=self.active,
+            closed=self.closed,
+            tags=[_shared_tag(str(t.id), t.label, t.slug) for t in self.tags],
+            markets=[m.parse(slug) for m in self.markets],
+            start_date=self.start_date,
+            end_date=self.end_date,
+            description=self.description,
+            created_at=self.created_at,
+        )
+
+    def fingerprint(self) -> int:
+        """Counterpart of ``DataProcessor.fingerprint`` over the decoded
+        fields; only ever compared with fingerprints of the same kind."""
+        return hash((self.updated_at, self.active, self.closed, tuple(
+            (m.id, m.updated_at, tuple(m.outcome_prices) if isinstance(
+                m.outcome_prices, list) else m.outcome_prices,
+             m.volume_num or m.volume, m.volume_24hr, m.liquidity)
+            for m in self.markets)))
+
+
+if msgspec is not None:
+    # strict=False accepts numbers sent as strings ("volume": "1234.5")
+    _PAGE = msgspec.json.Decoder(List[RawEvent], strict=False)
+
+
+def decode_event_page(body: bytes) -> list:
+    """RawEvents for an ``/events`` response body, or plain dicts if the
+    payload doesn't match the typed schema. Raises ValueError on invalid
+    JSON, like ``json.loads``."""
+    try:
+        return _PAGE.decode(body)
+    except msgspec.ValidationError as e:
+        logger.debug("Typed decode failed (%s); falling back to json", e)
+    except msgspec.DecodeError as e:
+        raise ValueError(str(e)) from e
+    return json.loads(body)
+
+
+def event_page_decoder(backend: str = JSON_DECODER
+                       ) -> Optional[Callable[[bytes], list]]:
+    """Return ``decode(body) -> events`` for the requested backend, or None
+    when pages should be decoded as plain JSON dicts."""
+    if backend not in ("auto", "msgspec", "json"):
+        raise ValueError(f"Unknown JSON decoder: {backend}")
+    if backend == "msgspec" and msgspec is None:
+        raise ImportError("JSON_DECODER='msgspec' requires the msgspec package")
+    if backend != "json" and msgspec is not None:
+        return decode_event_page
+    return None